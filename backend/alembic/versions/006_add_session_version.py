@@ -0,0 +1,26 @@
+"""Add version counter to sessions
+
+Revision ID: 006_add_session_version
+Revises: 005_add_deleted_at_to_users
+Create Date: 2025-02-03 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '006_add_session_version'
+down_revision: Union[str, None] = '005_add_deleted_at_to_users'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('sessions', sa.Column('version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade() -> None:
+    op.drop_column('sessions', 'version')
@@ -0,0 +1,27 @@
+"""Add indexes for session listing
+
+Revision ID: 007_add_session_listing_indexes
+Revises: 006_add_session_version
+Create Date: 2025-02-05 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '007_add_session_listing_indexes'
+down_revision: Union[str, None] = '006_add_session_version'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_sessions_status_date', 'sessions', ['status', 'date', 'id'])
+    op.create_index('ix_sessions_date', 'sessions', ['date', 'id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_sessions_date', table_name='sessions')
+    op.drop_index('ix_sessions_status_date', table_name='sessions')
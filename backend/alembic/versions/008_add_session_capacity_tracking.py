@@ -0,0 +1,39 @@
+"""Add sign-up counter and waitlist to sessions
+
+Revision ID: 008_add_session_capacity_tracking
+Revises: 007_add_session_listing_indexes
+Create Date: 2025-02-10 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '008_add_session_capacity_tracking'
+down_revision: Union[str, None] = '007_add_session_listing_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('sessions', sa.Column('yes_count', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('sessions', sa.Column('waitlist_seq', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('session_players', sa.Column('waitlist_position', sa.Integer(), nullable=True))
+
+    # Existing YES rows are all treated as confirmed.
+    op.execute("""
+        UPDATE sessions SET yes_count = (
+            SELECT COUNT(*) FROM session_players
+            WHERE session_players.session_id = sessions.id
+              AND session_players.availability = 'YES'
+        )
+    """)
+
+
+def downgrade() -> None:
+    op.drop_column('session_players', 'waitlist_position')
+    op.drop_column('sessions', 'waitlist_seq')
+    op.drop_column('sessions', 'yes_count')
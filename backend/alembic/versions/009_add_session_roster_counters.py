@@ -0,0 +1,51 @@
+"""Add denormalized roster counters to sessions
+
+Revision ID: 009_add_session_roster_counters
+Revises: 008_add_session_capacity_tracking
+Create Date: 2025-02-12 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '009_add_session_roster_counters'
+down_revision: Union[str, None] = '008_add_session_capacity_tracking'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COUNTERS = ('maybe_count', 'no_count', 'goalkeeper_count', 'waitlist_count')
+
+
+def upgrade() -> None:
+    for name in COUNTERS:
+        op.add_column('sessions', sa.Column(name, sa.Integer(), nullable=False, server_default='0'))
+
+    op.execute("""
+        UPDATE sessions SET
+            maybe_count = (
+                SELECT COUNT(*) FROM session_players sp
+                WHERE sp.session_id = sessions.id AND sp.availability = 'MAYBE'
+            ),
+            no_count = (
+                SELECT COUNT(*) FROM session_players sp
+                WHERE sp.session_id = sessions.id AND sp.availability = 'NO'
+            ),
+            goalkeeper_count = (
+                SELECT COUNT(*) FROM session_players sp
+                WHERE sp.session_id = sessions.id AND sp.availability = 'YES'
+                  AND sp.waitlist_position IS NULL AND sp.is_goalkeeper
+            ),
+            waitlist_count = (
+                SELECT COUNT(*) FROM session_players sp
+                WHERE sp.session_id = sessions.id AND sp.waitlist_position IS NOT NULL
+            )
+    """)
+
+
+def downgrade() -> None:
+    for name in reversed(COUNTERS):
+        op.drop_column('sessions', name)
@@ -0,0 +1,51 @@
+"""Add seasons and per-season player standings
+
+Revision ID: 010_add_seasons_and_standings
+Revises: 009_add_session_roster_counters
+Create Date: 2025-02-14 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '010_add_seasons_and_standings'
+down_revision: Union[str, None] = '009_add_session_roster_counters'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+AGGREGATES = ('matches_played', 'wins', 'draws', 'losses', 'points', 'goals', 'assists', 'minutes_played')
+
+
+def upgrade() -> None:
+    op.create_table(
+        'seasons',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=255), nullable=False),
+        sa.Column('starts_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('ends_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table(
+        'season_standings',
+        sa.Column('season_id', sa.Integer(), nullable=False),
+        sa.Column('player_id', sa.Integer(), nullable=False),
+        *(sa.Column(name, sa.Integer(), nullable=False, server_default='0') for name in AGGREGATES),
+        sa.ForeignKeyConstraint(['season_id'], ['seasons.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['player_id'], ['players.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('season_id', 'player_id')
+    )
+    op.create_index('ix_season_standings_points', 'season_standings', ['season_id', 'points'])
+    op.create_index('ix_season_standings_goals', 'season_standings', ['season_id', 'goals'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_season_standings_goals', table_name='season_standings')
+    op.drop_index('ix_season_standings_points', table_name='season_standings')
+    op.drop_table('season_standings')
+    op.drop_table('seasons')
@@ -0,0 +1,58 @@
+"""Add listing summaries to matches and index player_stats by player
+
+Revision ID: 011_add_match_summaries
+Revises: 010_add_seasons_and_standings
+Create Date: 2025-02-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '011_add_match_summaries'
+down_revision: Union[str, None] = '010_add_seasons_and_standings'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('matches', sa.Column('team_a_rating', sa.Float(), nullable=True))
+    op.add_column('matches', sa.Column('team_b_rating', sa.Float(), nullable=True))
+    op.add_column('matches', sa.Column('top_scorer_id', sa.Integer(), nullable=True))
+    op.add_column('matches', sa.Column('top_scorer_goals', sa.Integer(), nullable=False, server_default='0'))
+    op.create_foreign_key(
+        'fk_match_top_scorer',
+        'matches',
+        'players',
+        ['top_scorer_id'],
+        ['id'],
+        ondelete='SET NULL'
+    )
+    op.create_index('ix_player_stats_player_id', 'player_stats', ['player_id'])
+
+    # Pre-match rating sums cannot be derived after the fact; they are filled
+    # in when a match is next written or by scripts/replay_ratings.py.
+    op.execute("""
+        UPDATE matches SET
+            top_scorer_id = (
+                SELECT ps.player_id FROM player_stats ps
+                WHERE ps.match_id = matches.id AND ps.goals > 0
+                ORDER BY ps.goals DESC, ps.player_id
+                LIMIT 1
+            ),
+            top_scorer_goals = COALESCE(
+                (SELECT MAX(ps.goals) FROM player_stats ps WHERE ps.match_id = matches.id), 0
+            )
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_player_stats_player_id', table_name='player_stats')
+    op.drop_constraint('fk_match_top_scorer', 'matches', type_='foreignkey')
+    op.drop_column('matches', 'top_scorer_goals')
+    op.drop_column('matches', 'top_scorer_id')
+    op.drop_column('matches', 'team_b_rating')
+    op.drop_column('matches', 'team_a_rating')
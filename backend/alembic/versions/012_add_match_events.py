@@ -0,0 +1,40 @@
+"""Add the append-only match event log
+
+Revision ID: 012_add_match_events
+Revises: 011_add_match_summaries
+Create Date: 2025-02-19 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '012_add_match_events'
+down_revision: Union[str, None] = '011_add_match_summaries'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'match_events',
+        sa.Column('id', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), nullable=False),
+        sa.Column('match_id', sa.Integer(), nullable=False),
+        sa.Column('seq', sa.Integer(), nullable=False),
+        sa.Column('kind', sa.SmallInteger(), nullable=False),
+        sa.Column('player_id', sa.Integer(), nullable=True),
+        sa.Column('team', sa.SmallInteger(), nullable=True),
+        sa.Column('minute', sa.SmallInteger(), nullable=True),
+        sa.ForeignKeyConstraint(['match_id'], ['matches.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['player_id'], ['players.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        # Also the index for reading a match's timeline in order.
+        sa.UniqueConstraint('match_id', 'seq', name='uq_match_event_seq')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('match_events')
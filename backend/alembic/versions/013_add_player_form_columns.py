@@ -0,0 +1,40 @@
+"""Add rating deltas and play dates to player_stats for rolling form
+
+Revision ID: 013_add_player_form_columns
+Revises: 012_add_match_events
+Create Date: 2025-02-21 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '013_add_player_form_columns'
+down_revision: Union[str, None] = '012_add_match_events'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('player_stats', sa.Column('rating_delta', sa.Float(), nullable=True))
+    op.add_column('player_stats', sa.Column('played_at', sa.DateTime(timezone=True), nullable=True))
+    op.execute("""
+        UPDATE player_stats SET played_at = (
+            SELECT s.date FROM matches m JOIN sessions s ON s.id = m.session_id
+            WHERE m.id = player_stats.match_id
+        )
+    """)
+    # (player_id, played_at) also serves the lookups by player_id alone.
+    op.create_index('ix_player_stats_player_played', 'player_stats', ['player_id', 'played_at'])
+    op.drop_index('ix_player_stats_player_id', table_name='player_stats')
+    # Past rating deltas are filled in by scripts/replay_ratings.py.
+
+
+def downgrade() -> None:
+    op.create_index('ix_player_stats_player_id', 'player_stats', ['player_id'])
+    op.drop_index('ix_player_stats_player_played', table_name='player_stats')
+    op.drop_column('player_stats', 'played_at')
+    op.drop_column('player_stats', 'rating_delta')
@@ -0,0 +1,33 @@
+"""Make (template_id, date) unique on sessions
+
+Revision ID: 014_add_session_template_date_unique
+Revises: 013_add_player_form_columns
+Create Date: 2025-02-23 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '014_add_session_template_date_unique'
+down_revision: Union[str, None] = '013_add_player_form_columns'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Keep the oldest session of any duplicate; later copies keep their data but
+    # are detached from the template.
+    op.execute("""
+        UPDATE sessions SET template_id = NULL
+        WHERE template_id IS NOT NULL AND id NOT IN (
+            SELECT MIN(id) FROM sessions WHERE template_id IS NOT NULL GROUP BY template_id, date
+        )
+    """)
+    op.create_index('uq_sessions_template_date', 'sessions', ['template_id', 'date'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('uq_sessions_template_date', table_name='sessions')
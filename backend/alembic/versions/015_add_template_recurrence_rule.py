@@ -0,0 +1,26 @@
+"""Add RRULE-based recurrence to session templates
+
+Revision ID: 015_add_template_recurrence_rule
+Revises: 014_add_session_template_date_unique
+Create Date: 2025-02-25 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '015_add_template_recurrence_rule'
+down_revision: Union[str, None] = '014_add_session_template_date_unique'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('session_templates', sa.Column('recurrence_rule', sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('session_templates', 'recurrence_rule')
@@ -0,0 +1,32 @@
+"""Add scheduler leases for background jobs
+
+Revision ID: 016_add_scheduler_leases
+Revises: 015_add_template_recurrence_rule
+Create Date: 2025-02-27 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '016_add_scheduler_leases'
+down_revision: Union[str, None] = '015_add_template_recurrence_rule'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'scheduler_leases',
+        sa.Column('name', sa.String(length=64), nullable=False),
+        sa.Column('holder', sa.String(length=255), nullable=False),
+        sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('scheduler_leases')
@@ -0,0 +1,32 @@
+"""Add rate limit buckets shared between replicas
+
+Revision ID: 017_add_rate_limit_buckets
+Revises: 016_add_scheduler_leases
+Create Date: 2025-02-27 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '017_add_rate_limit_buckets'
+down_revision: Union[str, None] = '016_add_scheduler_leases'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'rate_limit_buckets',
+        sa.Column('key', sa.String(length=255), nullable=False),
+        sa.Column('tat', sa.Float(), nullable=False),
+        sa.Column('allowed', sa.Boolean(), nullable=False),
+        sa.PrimaryKeyConstraint('key')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('rate_limit_buckets')
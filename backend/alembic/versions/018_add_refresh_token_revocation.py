@@ -0,0 +1,37 @@
+"""Add refresh token revocation
+
+Revision ID: 018_add_refresh_token_revocation
+Revises: 017_add_rate_limit_buckets
+Create Date: 2025-02-27 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '018_add_refresh_token_revocation'
+down_revision: Union[str, None] = '017_add_rate_limit_buckets'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('tokens_revoked_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_table(
+        'revoked_tokens',
+        sa.Column('jti', sa.String(length=64), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('jti')
+    )
+    op.create_index('ix_revoked_tokens_expires_at', 'revoked_tokens', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_revoked_tokens_expires_at', table_name='revoked_tokens')
+    op.drop_table('revoked_tokens')
+    op.drop_column('users', 'tokens_revoked_at')
@@ -0,0 +1,26 @@
+"""Mark matches whose live scoring was finished
+
+Revision ID: 019_add_match_live_finished_at
+Revises: 018_add_refresh_token_revocation
+Create Date: 2025-02-28 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '019_add_match_live_finished_at'
+down_revision: Union[str, None] = '018_add_refresh_token_revocation'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('matches', sa.Column('live_finished_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('matches', 'live_finished_at')
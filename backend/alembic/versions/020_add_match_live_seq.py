@@ -0,0 +1,26 @@
+"""Track the live scoring watermark on matches
+
+Revision ID: 020_add_match_live_seq
+Revises: 019_add_match_live_finished_at
+Create Date: 2025-03-01 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '020_add_match_live_seq'
+down_revision: Union[str, None] = '019_add_match_live_finished_at'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('matches', sa.Column('live_seq', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('matches', 'live_seq')
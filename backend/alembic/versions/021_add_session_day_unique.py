@@ -0,0 +1,43 @@
+"""Make template sessions unique per calendar day
+
+Revision ID: 021_add_session_day_unique
+Revises: 020_add_match_live_seq
+Create Date: 2025-03-02 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '021_add_session_day_unique'
+down_revision: Union[str, None] = '020_add_match_live_seq'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    op.add_column('sessions', sa.Column('session_day', sa.Date(), nullable=True))
+    if bind.dialect.name == 'postgresql':
+        op.execute("UPDATE sessions SET session_day = (date AT TIME ZONE 'UTC')::date")
+    else:
+        op.execute("UPDATE sessions SET session_day = date(date)")
+    # Generating again after a time change put a second session on the same
+    # day; keep the oldest and detach the later copies from the template.
+    op.execute("""
+        UPDATE sessions SET template_id = NULL
+        WHERE template_id IS NOT NULL AND id NOT IN (
+            SELECT MIN(id) FROM sessions WHERE template_id IS NOT NULL GROUP BY template_id, session_day
+        )
+    """)
+    op.drop_index('uq_sessions_template_date', table_name='sessions')
+    op.create_index('uq_sessions_template_day', 'sessions', ['template_id', 'session_day'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('uq_sessions_template_day', table_name='sessions')
+    op.create_index('uq_sessions_template_date', 'sessions', ['template_id', 'date'], unique=True)
+    op.drop_column('sessions', 'session_day')
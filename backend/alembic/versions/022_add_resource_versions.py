@@ -0,0 +1,31 @@
+"""Add collection version counters
+
+Revision ID: 022_add_resource_versions
+Revises: 021_add_session_day_unique
+Create Date: 2025-03-03 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '022_add_resource_versions'
+down_revision: Union[str, None] = '021_add_session_day_unique'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'resource_versions',
+        sa.Column('name', sa.String(length=64), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('resource_versions')
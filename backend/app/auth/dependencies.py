@@ -3,12 +3,11 @@ from typing import Annotated
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
 from ..db import get_db
-from ..models import User
+from . import principals
+from .principals import Principal
 from .security import decode_token
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
@@ -17,8 +16,8 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 async def get_current_user(
     token: Annotated[str, Depends(oauth2_scheme)],
     db: Annotated[AsyncSession, Depends(get_db)],
-) -> User:
-    """Get the current authenticated user from JWT token."""
+) -> Principal:
+    """Get the current authenticated user from JWT token (cached per token)."""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -26,6 +25,9 @@ async def get_current_user(
     )
     try:
         payload = decode_token(token)
+        # Refresh tokens are signed by the same keys but only buy new tokens.
+        if payload.get("type") == "refresh":
+            raise credentials_exception
         user_id_str: str | None = payload.get("sub")
         if user_id_str is None:
             raise credentials_exception
@@ -33,20 +35,15 @@ async def get_current_user(
     except (ValueError, KeyError, TypeError):
         raise credentials_exception
 
-    result = await db.execute(
-        select(User)
-        .options(selectinload(User.player))
-        .where(User.id == user_id, User.deleted_at.is_(None))
-    )
-    user = result.scalar_one_or_none()
+    user = await principals.load(db, user_id, payload.get("iat"))
     if user is None:
         raise credentials_exception
     return user
 
 
 async def get_current_active_user(
-    current_user: Annotated[User, Depends(get_current_user)],
-) -> User:
+    current_user: Annotated[Principal, Depends(get_current_user)],
+) -> Principal:
     """Get the current active user."""
     if not current_user.is_active:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Inactive user")
@@ -54,8 +51,8 @@ async def get_current_active_user(
 
 
 async def get_current_admin_user(
-    current_user: Annotated[User, Depends(get_current_active_user)],
-) -> User:
+    current_user: Annotated[Principal, Depends(get_current_active_user)],
+) -> Principal:
     """Get the current admin user (admin or root)."""
     if not (current_user.is_admin or current_user.is_root):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions")
@@ -63,8 +60,8 @@ async def get_current_admin_user(
 
 
 async def get_current_root_user(
-    current_user: Annotated[User, Depends(get_current_active_user)],
-) -> User:
+    current_user: Annotated[Principal, Depends(get_current_active_user)],
+) -> Principal:
     """Get the current root user."""
     if not current_user.is_root:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Root access required")
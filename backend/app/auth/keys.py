@@ -0,0 +1,140 @@
+"""Token signing keys and the cache of already verified tokens.
+
+Tokens are signed either with the shared ``secret_key`` (HS256, no ``kid``
+header) or with an ES256 key pair from ``jwt_keys_dir``. That directory
+holds one ``<kid>.pem`` per key: private keys can sign and verify, and
+public keys only verify. The key named by ``jwt_signing_kid`` signs new
+tokens and stamps its ``kid`` in the header. Other services can verify the
+tokens with the public keys from ``/auth/jwks``, without the secret.
+
+To rotate, add a new key and point ``jwt_signing_kid`` at it. Keep the old
+file until the tokens it signed have expired, then delete it.
+
+Verification is cached. A token seen before with a valid signature is
+trusted again until its ``exp``, keyed by its SHA-256 digest, so repeat
+requests skip the signature check.
+"""
+from __future__ import annotations
+
+import hashlib
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from jose import JWTError, jwk, jwt
+
+from ..core.config import Settings, settings
+
+KEY_ALGORITHM = "ES256"
+
+
+@dataclass(frozen=True)
+class VerifyKey:
+    algorithm: str
+    key: Any
+
+
+class Keyring:
+    def __init__(
+        self,
+        signing_key: Any,
+        signing_algorithm: str,
+        signing_kid: str | None,
+        verify_keys: dict[str, VerifyKey],
+        secret: str | None,
+        secret_algorithm: str,
+    ) -> None:
+        self.signing_key = signing_key
+        self.signing_algorithm = signing_algorithm
+        self.signing_kid = signing_kid
+        self.verify_keys = verify_keys
+        self.secret = secret
+        self.secret_algorithm = secret_algorithm
+        self._headers = {"kid": signing_kid} if signing_kid else None
+
+    @classmethod
+    def from_settings(cls, config: Settings) -> Keyring:
+        secret = config.secret_key if config.jwt_accept_secret_tokens or not config.jwt_signing_kid else None
+        if not config.jwt_signing_kid:
+            return cls(config.secret_key, config.algorithm, None, {}, secret, config.algorithm)
+        if not config.jwt_keys_dir:
+            raise ValueError("jwt_signing_kid is set but jwt_keys_dir is not")
+
+        signing_key = None
+        verify_keys: dict[str, VerifyKey] = {}
+        for path in sorted(Path(config.jwt_keys_dir).glob("*.pem")):
+            pem = path.read_text()
+            kid = path.stem
+            verify_keys[kid] = VerifyKey(KEY_ALGORITHM, jwk.construct(pem, KEY_ALGORITHM).public_key())
+            if kid == config.jwt_signing_kid:
+                if "PRIVATE KEY" not in pem:
+                    raise ValueError(f"Signing key {kid} in {config.jwt_keys_dir} is not a private key")
+                signing_key = jwk.construct(pem, KEY_ALGORITHM)
+        if signing_key is None:
+            raise ValueError(f"No key {config.jwt_signing_kid}.pem in {config.jwt_keys_dir}")
+        return cls(signing_key, KEY_ALGORITHM, config.jwt_signing_kid, verify_keys, secret, config.algorithm)
+
+    def sign(self, claims: dict[str, Any]) -> str:
+        return jwt.encode(claims, self.signing_key, algorithm=self.signing_algorithm, headers=self._headers)
+
+    def verify(self, token: str) -> dict[str, Any]:
+        """Verify the signature and expiry; raises JWTError."""
+        kid = jwt.get_unverified_header(token).get("kid")
+        if kid is None:
+            if self.secret is None:
+                raise JWTError("Token has no key id")
+            return jwt.decode(token, self.secret, algorithms=[self.secret_algorithm])
+        key = self.verify_keys.get(kid)
+        if key is None:
+            raise JWTError("Unknown key id")
+        return jwt.decode(token, key.key, algorithms=[key.algorithm])
+
+    def jwks(self) -> dict[str, Any]:
+        """Public keys of the key pairs, as a JSON Web Key Set."""
+        return {
+            "keys": [
+                {**key.key.to_dict(), "kid": kid, "use": "sig"}
+                for kid, key in self.verify_keys.items()
+            ]
+        }
+
+
+class VerifiedTokenCache:
+    """Claims of tokens whose signature was checked, by token digest, until each token's ``exp``."""
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self._data: OrderedDict[bytes, tuple[float, dict[str, Any]]] = OrderedDict()
+
+    @staticmethod
+    def digest(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, digest: bytes) -> dict[str, Any] | None:
+        entry = self._data.get(digest)
+        if entry is None:
+            return None
+        expires_at, claims = entry
+        if expires_at <= time.time():
+            del self._data[digest]
+            return None
+        self._data.move_to_end(digest)
+        return claims
+
+    def set(self, digest: bytes, claims: dict[str, Any]) -> None:
+        expires_at = claims.get("exp")
+        if not isinstance(expires_at, (int, float)) or self.maxsize <= 0:
+            return
+        self._data[digest] = (float(expires_at), claims)
+        self._data.move_to_end(digest)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+
+keyring = Keyring.from_settings(settings)
+verified_tokens = VerifiedTokenCache(settings.token_cache_size)
@@ -0,0 +1,138 @@
+"""Cached snapshots of authenticated users.
+
+``get_current_user`` resolves a token to a ``Principal``: an immutable
+snapshot of the fields authorization needs, cached per (user id, token
+``iat``) so an authenticated request costs no query while its entry lives.
+Endpoints that change a user's role, player link, password or deletion call
+``invalidate`` after they commit. On PostgreSQL, that also sends a
+``NOTIFY``. Every worker runs ``listen``, so the user's snapshots are dropped
+from all workers, not just the one that handled the write. On other databases
+the other workers' entries expire after ``principal_cache_ttl_seconds``.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Hashable
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from ..core.cache import TTLCache
+from ..core.config import settings
+from ..models import Player, User
+
+logger = logging.getLogger("calcio.principals")
+
+NOTIFY_CHANNEL = "principal_invalidated"
+
+
+@dataclass(frozen=True, slots=True)
+class Principal:
+    id: int
+    email: str
+    username: str
+    is_active: bool
+    is_admin: bool
+    is_root: bool
+    player_id: int | None
+
+    @classmethod
+    def from_user(cls, user: User, player_id: int | None) -> Principal:
+        return cls(
+            id=user.id,
+            email=user.email,
+            username=user.username,
+            is_active=user.is_active,
+            is_admin=user.is_admin,
+            is_root=user.is_root,
+            player_id=player_id,
+        )
+
+
+class PrincipalCache:
+    """TTL/LRU cache of principals keyed by (user id, token iat), droppable per user."""
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._keys: dict[int, set[Hashable]] = {}
+
+    def get(self, user_id: int, issued_at: Hashable) -> Principal | None:
+        return self._cache.get((user_id, issued_at))
+
+    def set(self, principal: Principal, issued_at: Hashable) -> None:
+        self._cache.set((principal.id, issued_at), principal)
+        keys = self._keys.setdefault(principal.id, set())
+        keys.add(issued_at)
+        if len(keys) > 64:
+            # Drop token times whose entries were evicted or expired.
+            keys.intersection_update([iat for iat in keys if self._cache.get((principal.id, iat)) is not None])
+
+    def invalidate(self, user_id: int) -> None:
+        for issued_at in self._keys.pop(user_id, ()):
+            self._cache.pop((user_id, issued_at))
+
+    def clear(self) -> None:
+        self._cache.clear()
+        self._keys.clear()
+
+
+principal_cache = PrincipalCache(settings.principal_cache_maxsize, settings.principal_cache_ttl_seconds)
+
+
+async def load(db: AsyncSession, user_id: int, issued_at: Hashable) -> Principal | None:
+    """The cached principal for this token, or a fresh one from the database; None if the user is gone."""
+    principal = principal_cache.get(user_id, issued_at)
+    if principal is not None:
+        return principal
+    # The player link is on players, so one outer join fetches both.
+    result = await db.execute(
+        select(User, Player.id)
+        .outerjoin(Player, Player.user_id == User.id)
+        .where(User.id == user_id, User.deleted_at.is_(None))
+    )
+    row = result.first()
+    if row is None:
+        return None
+    principal = Principal.from_user(row[0], row[1])
+    principal_cache.set(principal, issued_at)
+    return principal
+
+
+async def invalidate(db: AsyncSession, user_id: int) -> None:
+    """Drop the user's cached principals here and, on PostgreSQL, in every worker. Call after committing."""
+    principal_cache.invalidate(user_id)
+    if settings.principal_cache_notify and db.get_bind().dialect.name == "postgresql":
+        await db.execute(
+            text("SELECT pg_notify(:channel, :payload)"), {"channel": NOTIFY_CHANNEL, "payload": str(user_id)}
+        )
+        await db.commit()
+
+
+async def listen(engine: AsyncEngine) -> None:
+    """Apply other workers' invalidations until cancelled; reconnects if the connection drops."""
+    def on_notify(connection, pid, channel, payload: str) -> None:
+        try:
+            principal_cache.invalidate(int(payload))
+        except ValueError:
+            pass
+
+    while True:
+        try:
+            async with engine.connect() as conn:
+                raw = (await conn.get_raw_connection()).driver_connection
+                await raw.add_listener(NOTIFY_CHANNEL, on_notify)
+                # Changes missed while disconnected are unknown; start over.
+                principal_cache.clear()
+                try:
+                    while not raw.is_closed():
+                        await asyncio.sleep(5)
+                finally:
+                    if not raw.is_closed():
+                        await raw.remove_listener(NOTIFY_CHANNEL, on_notify)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Principal invalidation listener failed; reconnecting")
+        await asyncio.sleep(5)
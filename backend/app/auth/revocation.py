@@ -0,0 +1,51 @@
+"""Revoked refresh tokens.
+
+Every refresh token carries a ``jti``. Using a refresh token revokes its
+``jti``: the row in ``revoked_tokens`` lives until the token would have
+expired. Presenting a revoked token again means it leaked, so all of the
+user's refresh tokens are revoked through ``users.tokens_revoked_at``.
+
+Checking and revoking are one statement: ``revoke`` inserts the ``jti`` with
+ON CONFLICT DO NOTHING, and no row inserted means the token was already used.
+That costs a primary-key write per refresh, which a refresh has to make
+anyway, and lets only one of two concurrent refreshes with the same token
+win, on any worker. Expired rows are deleted at most every
+``refresh_token_purge_seconds`` by the worker that next revokes a token.
+"""
+from __future__ import annotations
+
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .. import models
+from ..core.config import settings
+from ..db import dialect_insert
+
+
+class RevocationList:
+    """Writes to ``revoked_tokens`` and purges its expired rows."""
+
+    def __init__(self, purge_seconds: float) -> None:
+        self.purge_seconds = purge_seconds
+        self._purge_at = 0.0
+
+    async def revoke(self, db: AsyncSession, jti: str, user_id: int, expires_at: datetime) -> bool:
+        """Record the revocation (callers commit). False if ``jti`` was already revoked."""
+        if self._purge_at <= time.monotonic():
+            self._purge_at = time.monotonic() + self.purge_seconds
+            # They can no longer match a valid token; deleted with the caller's commit.
+            await db.execute(
+                delete(models.RevokedToken).where(models.RevokedToken.expires_at < datetime.now(timezone.utc))
+            )
+        result = await db.execute(
+            dialect_insert(db, models.RevokedToken)
+            .values(jti=jti, user_id=user_id, expires_at=expires_at)
+            .on_conflict_do_nothing(index_elements=[models.RevokedToken.jti])
+        )
+        return result.rowcount > 0
+
+
+revocation_list = RevocationList(settings.refresh_token_purge_seconds)
@@ -1,11 +1,17 @@
 """Security utilities for authentication."""
-from datetime import datetime, timedelta
-from typing import Any
+import asyncio
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, TypeVar
 
-from jose import JWTError, jwt
+from jose import JWTError
 import bcrypt
 
 from ..core.config import settings
+from .keys import keyring, verified_tokens
+
+T = TypeVar("T")
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -16,43 +22,100 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         return False
 
 
-def get_password_hash(password: str) -> str:
-    """Hash a password using bcrypt."""
+def get_password_hash(password: str, rounds: int | None = None) -> str:
+    """Hash a password using bcrypt at ``rounds`` (default: the configured work factor)."""
     # Bcrypt has a 72-byte limit, but we'll let bcrypt handle it
     # Convert to bytes and hash
     password_bytes = password.encode('utf-8')
     # Generate salt and hash
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=rounds or settings.bcrypt_rounds)
     hashed = bcrypt.hashpw(password_bytes, salt)
     return hashed.decode('utf-8')
 
 
+def needs_rehash(hashed_password: str) -> bool:
+    """Whether a bcrypt hash was made with a different work factor than the configured one."""
+    try:
+        return int(hashed_password.split("$")[2]) != settings.bcrypt_rounds
+    except (IndexError, ValueError):
+        return False
+
+
+class PasswordHasherBusy(Exception):
+    """Too many password hashes are queued; the caller should retry later."""
+
+
+class PasswordHasher:
+    """Runs bcrypt in a dedicated thread pool so it never blocks the event loop.
+
+    bcrypt releases the GIL, so ``workers`` hashes run in parallel. At most
+    ``max_pending`` calls (running or queued) are accepted; beyond that the
+    call fails fast with PasswordHasherBusy instead of queueing a login
+    burst behind seconds of hashing.
+    """
+
+    def __init__(self, workers: int, max_pending: int) -> None:
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self._executor: ThreadPoolExecutor | None = None
+
+    async def _run(self, func: Callable[..., T], *args: Any) -> T:
+        if self.pending >= self.max_pending:
+            raise PasswordHasherBusy()
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            self.pending -= 1
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(get_password_hash, password)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(settings.password_hash_workers, settings.password_hash_max_pending)
+
+
+ACCESS_TOKEN_LIFETIME = timedelta(minutes=settings.access_token_expire_minutes)
+REFRESH_TOKEN_LIFETIME = timedelta(days=settings.refresh_token_expire_days)
+
+
 def create_access_token(data: dict[str, Any], expires_delta: timedelta | None = None) -> str:
     """Create a JWT access token."""
     to_encode = data.copy()
-    if expires_delta:
-        expire = datetime.utcnow() + expires_delta
-    else:
-        expire = datetime.utcnow() + timedelta(minutes=settings.access_token_expire_minutes)
-    to_encode.update({"exp": expire, "iat": datetime.utcnow()})
-    encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
-    return encoded_jwt
+    now = datetime.now(timezone.utc)
+    to_encode.update({"exp": now + (expires_delta or ACCESS_TOKEN_LIFETIME), "iat": now})
+    return keyring.sign(to_encode)
 
 
 def create_refresh_token(data: dict[str, Any]) -> str:
     """Create a JWT refresh token."""
     to_encode = data.copy()
-    expire = datetime.utcnow() + timedelta(days=settings.refresh_token_expire_days)
-    to_encode.update({"exp": expire, "iat": datetime.utcnow(), "type": "refresh"})
-    encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
-    return encoded_jwt
+    now = datetime.now(timezone.utc)
+    to_encode.update(
+        {"exp": now + REFRESH_TOKEN_LIFETIME, "iat": now, "type": "refresh", "jti": uuid.uuid4().hex}
+    )
+    return keyring.sign(to_encode)
 
 
 def decode_token(token: str) -> dict[str, Any]:
-    """Decode and verify a JWT token."""
-    try:
-        payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
-        return payload
-    except JWTError:
-        raise ValueError("Invalid token")
-
+    """Decode and verify a JWT token, skipping the signature check for tokens verified before."""
+    digest = verified_tokens.digest(token)
+    payload = verified_tokens.get(digest)
+    if payload is None:
+        try:
+            payload = keyring.verify(token)
+        except JWTError:
+            raise ValueError("Invalid token")
+        verified_tokens.set(digest, payload)
+    return dict(payload)
@@ -18,6 +18,10 @@ class Settings(BaseSettings):
     cors_allow_credentials: bool = True
     cors_allow_methods: List[str] = ["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"]
     cors_allow_headers: List[str] = ["*"]
+    cors_expose_headers: List[str] = ["ETag", "X-Next-Cursor", "X-Total-Count"]
+
+    # HTTP caching
+    http_cache_control: str = "private, no-cache"
 
     # Database
     database_url: str = "sqlite+aiosqlite:///./calcio.db"
@@ -25,6 +29,42 @@ class Settings(BaseSettings):
     db_max_overflow: int = 20
     db_pool_timeout: int = 30
 
+    # Session listing
+    sessions_page_size: int = 100
+    sessions_page_size_max: int = 500
+    sessions_count_cache_ttl_seconds: int = 30
+
+    # Match listing
+    matches_page_size: int = 100
+    matches_page_size_max: int = 500
+
+    # Session event stream (SSE)
+    session_events_max_pending: int = 256
+    session_events_coalesce_ms: int = 250
+    session_events_heartbeat_seconds: int = 15
+
+    # Live scoring: how often taps recorded in the match timeline are written to the score and stat lines
+    live_scoring_flush_seconds: float = 5.0
+
+    # With/against pair analytics: how long a worker reuses its pair matrix
+    pair_analytics_ttl_seconds: int = 600
+
+    # Rolling form: default windows, and how much of the last-matches rating
+    # change balanced teams add to a rating when asked to use form
+    form_window_matches: int = 5
+    form_window_days: int = 30
+    form_rating_weight: float = 1.0
+
+    # Session materializer: how many weeks ahead recurring templates keep their
+    # sessions created, how often it runs, and how many templates per commit
+    session_materializer_enabled: bool = True
+    session_horizon_weeks: int = 8
+    session_materializer_interval_seconds: float = 300.0
+    session_materializer_batch_size: int = 50
+
+    # Historical match import
+    match_import_batch_size: int = 500
+
     # Team Balancing
     team_size_default: int = 5
     team_balance_optimization_threshold: int = 14
@@ -34,6 +74,44 @@ class Settings(BaseSettings):
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
     refresh_token_expire_days: int = 7
+    # ES256 key pairs (<kid>.pem) and the one that signs; unset signs with secret_key.
+    # Turn off accepting secret-signed tokens once those issued before switching expire.
+    jwt_keys_dir: str | None = None
+    jwt_signing_kid: str | None = None
+    jwt_accept_secret_tokens: bool = True
+    # Verified tokens whose signature check is skipped until they expire
+    token_cache_size: int = 4096
+    # How often expired rows are cleared from revoked_tokens
+    refresh_token_purge_seconds: float = 300.0
+
+    # Authenticated user snapshots: entries per worker, how long one is trusted,
+    # and whether changes are broadcast to other workers (PostgreSQL only)
+    principal_cache_maxsize: int = 4096
+    principal_cache_ttl_seconds: float = 60.0
+    principal_cache_notify: bool = True
+
+    # Rate limiting: per-route limits ("METHOD|METHOD /path" or "/prefix/*" ->
+    # "ip=N/period, account=N/period, email=N/period"), where bucket state
+    # lives (memory: per worker; database: shared by replicas), and whether
+    # to trust X-Forwarded-For
+    rate_limit_enabled: bool = True
+    rate_limit_backend: str = "memory"
+    rate_limit_max_keys: int = 100_000
+    rate_limit_trust_forwarded_for: bool = False
+    rate_limits: dict[str, str] = {
+        "POST /auth/login": "ip=20/minute, email=5/minute",
+        "POST /auth/register": "ip=5/minute, email=3/minute",
+        "POST /auth/refresh": "ip=60/minute",
+        "POST /auth/change-password": "account=5/minute",
+        "POST|PUT|PATCH|DELETE /*": "ip=600/minute, account=300/minute",
+    }
+
+    # Password hashing: bcrypt work factor (hashes made with another cost are
+    # upgraded on login), threads running bcrypt, and how many hashes may be
+    # running or queued before requests get a 503
+    bcrypt_rounds: int = 12
+    password_hash_workers: int = 2
+    password_hash_max_pending: int = 32
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,11 @@
+"""Datetime helpers shared by routers and services."""
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+
+def as_utc(value: datetime) -> datetime:
+    """``value`` in UTC; naive values, as SQLite returns stored ones, are taken to be UTC already."""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
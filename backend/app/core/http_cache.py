@@ -0,0 +1,38 @@
+"""Conditional GET helpers (ETag / If-None-Match)."""
+from __future__ import annotations
+
+import hashlib
+
+from fastapi import Request, Response, status
+
+from .config import settings
+
+
+def make_etag(*parts: object) -> str:
+    """Build a strong ETag from cheap version markers (counters, timestamps)."""
+    raw = "|".join("" if part is None else str(part) for part in parts)
+    return '"' + hashlib.blake2b(raw.encode("utf-8"), digest_size=12).hexdigest() + '"'
+
+
+def cache_headers(etag: str) -> dict[str, str]:
+    return {"ETag": etag, "Cache-Control": settings.http_cache_control}
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Return True if the request's If-None-Match header matches the given ETag."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cache_headers(etag))
@@ -0,0 +1,24 @@
+"""Keyset cursors over (date, id), passed to clients in the X-Next-Cursor header.
+
+Cursors are base64url, so clients can put them in a query string as they are.
+"""
+from __future__ import annotations
+
+import base64
+from datetime import datetime
+
+from fastapi import HTTPException, status
+
+
+def encode_cursor(date: datetime, row_id: int) -> str:
+    raw = f"{date.isoformat()},{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def parse_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        date_part, _, id_part = raw.rpartition(",")
+        return datetime.fromisoformat(date_part), int(id_part)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid pagination cursor")
@@ -0,0 +1,297 @@
+"""Per-IP and per-account rate limiting for selected routes.
+
+Limits are configured per route in ``settings.rate_limits``. A key is
+``"METHOD /path"``. Methods may be joined with ``|``, and a path ending in
+``/*`` matches the whole prefix. A value is ``"ip=20/minute, email=5/minute"``.
+An exact route wins over a prefix, and the longest prefix wins among
+prefixes. Limits are per client IP (``ip``), per token subject of
+authenticated requests (``account``), or per ``email`` in the JSON body, for
+login and register, where the body is read once and replayed to the app.
+
+Each limit is a token bucket, kept as GCRA: one "theoretical arrival time"
+(TAT) float per key. A request is let through while ``tat - now`` stays
+within the burst window, and advances the TAT by one emission interval. A key
+whose TAT is in the past is the same as a full bucket, so expired keys are
+dropped lazily. ``MemoryBackend`` keeps the TATs in a dict in the worker.
+``DatabaseBackend`` shares them between replicas with one UPSERT per check.
+"""
+from __future__ import annotations
+
+import json
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Protocol
+
+from sqlalchemy import case, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .. import models
+from ..auth.security import decode_token
+from ..db import dialect_insert
+from .config import settings
+
+PERIODS = {"second": 1.0, "minute": 60.0, "hour": 3600.0, "day": 86400.0}
+SCOPES = ("ip", "account", "email")
+MAX_BODY_BYTES = 64 * 1024
+
+
+@dataclass(frozen=True)
+class Limit:
+    """``count`` requests per ``period`` seconds, all of which may come in one burst."""
+
+    count: int
+    period: float
+
+    @property
+    def interval(self) -> float:
+        return self.period / self.count
+
+    @classmethod
+    def parse(cls, text: str) -> Limit:
+        count, _, unit = text.strip().partition("/")
+        unit = unit.strip().lower().rstrip("s")
+        period = PERIODS.get(unit) or PERIODS.get({"sec": "second", "min": "minute"}.get(unit, ""))
+        if not period or not count.strip().isdigit() or int(count) < 1:
+            raise ValueError(f"Invalid rate limit {text!r}; expected e.g. '10/minute'")
+        return cls(int(count), period)
+
+
+@dataclass(frozen=True)
+class Rule:
+    route: str
+    limits: dict[str, Limit]
+
+    @classmethod
+    def parse(cls, route: str, text: str) -> Rule:
+        limits = {}
+        for part in text.split(","):
+            scope, _, limit = part.partition("=")
+            scope = scope.strip()
+            if scope not in SCOPES:
+                raise ValueError(f"Invalid rate limit scope {scope!r} for {route}; expected ip, account or email")
+            limits[scope] = Limit.parse(limit)
+        return cls(route, limits)
+
+
+class Rules:
+    """Route lookup: one dict hit for exact routes, then a short scan of prefixes."""
+
+    def __init__(self, config: dict[str, str]) -> None:
+        self.exact: dict[tuple[str, str], Rule] = {}
+        self.prefixes: list[tuple[frozenset[str], str, Rule]] = []
+        for route, text in config.items():
+            methods, _, path = route.strip().partition(" ")
+            rule = Rule.parse(route, text)
+            method_set = frozenset(method.strip().upper() for method in methods.split("|"))
+            path = path.strip()
+            if path.endswith("/*"):
+                self.prefixes.append((method_set, path[:-1], rule))
+            else:
+                for method in method_set:
+                    self.exact[(method, path.rstrip("/") or "/")] = rule
+        self.prefixes.sort(key=lambda entry: len(entry[1]), reverse=True)
+
+    def match(self, method: str, path: str) -> Rule | None:
+        rule = self.exact.get((method, path.rstrip("/") or "/"))
+        if rule is not None:
+            return rule
+        for methods, prefix, rule in self.prefixes:
+            if method in methods and path.startswith(prefix):
+                return rule
+        return None
+
+
+class Backend(Protocol):
+    async def take(self, key: str, limit: Limit) -> float:
+        """Count one request against ``key``; 0.0 if allowed, else seconds until it would be."""
+
+
+class MemoryBackend:
+    """TATs in a dict in this worker. ``max_keys`` bounds memory; expired keys are swept lazily."""
+
+    def __init__(self, max_keys: int, clock: Callable[[], float] = time.monotonic) -> None:
+        self.max_keys = max_keys
+        self.clock = clock
+        self._tat: dict[str, float] = {}
+        self._calls = 0
+
+    async def take(self, key: str, limit: Limit) -> float:
+        now = self.clock()
+        tat = self._tat.get(key, now)
+        if tat < now:
+            tat = now
+        tat += limit.interval
+        excess = tat - now - limit.period
+        if excess > 0:
+            return excess
+        self._tat[key] = tat
+        self._calls += 1
+        if self._calls >= 1024 or len(self._tat) > self.max_keys:
+            self._sweep(now)
+        return 0.0
+
+    def _sweep(self, now: float) -> None:
+        self._calls = 0
+        self._tat = {key: tat for key, tat in self._tat.items() if tat > now}
+        # Still too many live keys: forget the oldest, which only ever lets a request through.
+        # Trim to 3/4 so a flood of new keys does not sweep on every request.
+        excess = len(self._tat) - self.max_keys * 3 // 4
+        if excess > 0 and len(self._tat) > self.max_keys:
+            for key in list(self._tat)[:excess]:
+                del self._tat[key]
+
+    def __len__(self) -> int:
+        return len(self._tat)
+
+
+class DatabaseBackend:
+    """TATs in the ``rate_limit_buckets`` table, shared by every replica.
+
+    Each check is a single INSERT ... ON CONFLICT DO UPDATE. The SET
+    expressions read the old row, so the row's ``allowed`` column reports
+    whether this request advanced the TAT.
+    """
+
+    def __init__(self, session_factory: Callable[[], AsyncSession], clock: Callable[[], float] = time.time) -> None:
+        self.session_factory = session_factory
+        self.clock = clock
+        self._calls = 0
+
+    async def take(self, key: str, limit: Limit) -> float:
+        now = self.clock()
+        bucket = models.RateLimitBucket
+        async with self.session_factory() as db:
+            stmt = dialect_insert(db, bucket).values(key=key, tat=now + limit.interval, allowed=True)
+            current = case((bucket.tat < now, now), else_=bucket.tat)
+            allowed = current + limit.interval - now <= limit.period
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[bucket.key],
+                set_={
+                    "tat": case((allowed, current + limit.interval), else_=bucket.tat),
+                    "allowed": allowed,
+                },
+            ).returning(bucket.tat, bucket.allowed)
+            tat, was_allowed = (await db.execute(stmt)).one()
+            await db.commit()
+        self._calls += 1
+        if self._calls >= 1024:
+            self._calls = 0
+            await self.purge()
+        if was_allowed:
+            return 0.0
+        # Denied requests leave the TAT as it was.
+        return max(tat + limit.interval - now - limit.period, 1e-3)
+
+    async def purge(self) -> int:
+        """Delete buckets that are full again; returns how many."""
+        async with self.session_factory() as db:
+            result = await db.execute(
+                delete(models.RateLimitBucket).where(models.RateLimitBucket.tat < self.clock())
+            )
+            await db.commit()
+        return result.rowcount
+
+
+class RateLimitMiddleware:
+    """ASGI middleware answering 429 with ``Retry-After`` once a client exceeds its route's limits."""
+
+    def __init__(self, app, rules: Rules, backend: Backend, trust_forwarded_for: bool = False) -> None:
+        self.app = app
+        self.rules = rules
+        self.backend = backend
+        self.trust_forwarded_for = trust_forwarded_for
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        rule = self.rules.match(scope["method"], scope["path"])
+        if rule is None:
+            return await self.app(scope, receive, send)
+
+        retry_after = 0.0
+        limits = rule.limits
+        if "ip" in limits:
+            retry_after = await self.backend.take(f"ip:{self._client_ip(scope)}:{rule.route}", limits["ip"])
+        if not retry_after and "account" in limits:
+            subject = self._token_subject(scope)
+            if subject is not None:
+                retry_after = await self.backend.take(f"account:{subject}:{rule.route}", limits["account"])
+        if not retry_after and "email" in limits:
+            email, receive = await self._body_email(receive)
+            if email is not None:
+                retry_after = await self.backend.take(f"email:{email}:{rule.route}", limits["email"])
+        if retry_after:
+            return await self._reject(send, retry_after)
+        await self.app(scope, receive, send)
+
+    def _client_ip(self, scope) -> str:
+        if self.trust_forwarded_for:
+            for name, value in scope["headers"]:
+                if name == b"x-forwarded-for":
+                    return value.decode("latin-1").split(",")[0].strip()
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    @staticmethod
+    def _token_subject(scope) -> str | None:
+        for name, value in scope["headers"]:
+            if name == b"authorization":
+                scheme, _, token = value.decode("latin-1").partition(" ")
+                if scheme.lower() != "bearer":
+                    return None
+                try:
+                    return decode_token(token.strip()).get("sub")
+                except ValueError:
+                    return None
+        return None
+
+    @staticmethod
+    async def _body_email(receive) -> tuple[str | None, Any]:
+        """The ``email`` of a JSON body, and a ``receive`` that replays the body to the app."""
+        messages = []
+        size = 0
+        while True:
+            message = await receive()
+            messages.append(message)
+            size += len(message.get("body", b""))
+            if message["type"] != "http.request" or not message.get("more_body") or size > MAX_BODY_BYTES:
+                break
+
+        async def replay():
+            if messages:
+                return messages.pop(0)
+            return await receive()
+
+        if size > MAX_BODY_BYTES:
+            return None, replay
+        try:
+            email = json.loads(b"".join(message.get("body", b"") for message in messages)).get("email")
+        except (ValueError, AttributeError):
+            email = None
+        return (email.strip().lower() if isinstance(email, str) else None), replay
+
+    @staticmethod
+    async def _reject(send, retry_after: float) -> None:
+        body = b'{"detail":"Too many requests"}'
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 429,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", str(max(1, int(retry_after + 0.999))).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+
+def backend_from_settings() -> Backend:
+    if settings.rate_limit_backend == "database":
+        from ..db import SessionLocal
+
+        return DatabaseBackend(SessionLocal)
+    if settings.rate_limit_backend != "memory":
+        raise ValueError(f"Unknown rate_limit_backend {settings.rate_limit_backend!r}; expected memory or database")
+    return MemoryBackend(settings.rate_limit_max_keys)
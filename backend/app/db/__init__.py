@@ -1,6 +1,7 @@
 import os
 from typing import AsyncGenerator
 
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
 from ..core.config import settings
@@ -46,3 +47,10 @@ SessionLocal = async_sessionmaker(bind=engine, autoflush=False, autocommit=False
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     async with SessionLocal() as session:
         yield session
+
+
+def dialect_insert(db: AsyncSession, model):
+    """Return an INSERT for ``model`` that supports ``on_conflict_do_*`` on the bound dialect."""
+    if db.get_bind().dialect.name == "postgresql":
+        return postgresql.insert(model)
+    return sqlite.insert(model)
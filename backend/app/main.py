@@ -1,25 +1,41 @@
+import asyncio
 import logging
 import time
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.ext.asyncio import AsyncEngine
 
+from .auth import principals
+from .auth.security import password_hasher
+from .core import rate_limit
 from .core.config import settings
 from .db import engine
 from .models import Base
-from .routers import auth, matches, players, sessions, templates
+from .routers import auth, matches, players, seasons, sessions, templates
+from .services.live_scoring import live_scoring
+from .services.materializer import session_materializer
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("calcio")
 
 app = FastAPI(title=settings.api_title, version=settings.api_version, debug=settings.debug)
 
+# Added before CORS so that 429 responses still carry CORS headers.
+if settings.rate_limit_enabled:
+    app.add_middleware(
+        rate_limit.RateLimitMiddleware,
+        rules=rate_limit.Rules(settings.rate_limits),
+        backend=rate_limit.backend_from_settings(),
+        trust_forwarded_for=settings.rate_limit_trust_forwarded_for,
+    )
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.cors_origins,
     allow_credentials=settings.cors_allow_credentials,
     allow_methods=settings.cors_allow_methods,
     allow_headers=settings.cors_allow_headers,
+    expose_headers=settings.cors_expose_headers,
 )
 
 @app.middleware("http")
@@ -36,6 +52,7 @@ def register_routers(application: FastAPI) -> None:
     application.include_router(sessions.router)
     application.include_router(matches.router)
     application.include_router(templates.router)
+    application.include_router(seasons.router)
 
 register_routers(app)
 
@@ -50,3 +67,48 @@ async def init_db() -> None:
     # Database schema is managed by Alembic migrations.
     # Run migrations with: alembic upgrade head
     pass
+
+
+@app.on_event("startup")
+async def start_live_scoring() -> None:
+    recovered = await live_scoring.recover()
+    if recovered:
+        logger.info("Recovered %d live match(es) with unflushed taps", recovered)
+    live_scoring.start()
+
+
+@app.on_event("shutdown")
+async def stop_live_scoring() -> None:
+    await live_scoring.stop()
+
+
+@app.on_event("startup")
+async def start_session_materializer() -> None:
+    if settings.session_materializer_enabled:
+        session_materializer.start()
+
+
+@app.on_event("shutdown")
+async def stop_session_materializer() -> None:
+    await session_materializer.stop()
+
+
+@app.on_event("shutdown")
+async def stop_password_hasher() -> None:
+    password_hasher.shutdown()
+
+
+_principal_listener: asyncio.Task | None = None
+
+
+@app.on_event("startup")
+async def start_principal_listener() -> None:
+    global _principal_listener
+    if settings.principal_cache_notify and engine.dialect.name == "postgresql":
+        _principal_listener = asyncio.create_task(principals.listen(engine))
+
+
+@app.on_event("shutdown")
+async def stop_principal_listener() -> None:
+    if _principal_listener is not None:
+        _principal_listener.cancel()
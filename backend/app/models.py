@@ -1,21 +1,27 @@
 from __future__ import annotations
 
 import enum
-from datetime import datetime
+from datetime import date, datetime
 
 from sqlalchemy import (
+    BigInteger,
     Boolean,
+    Date,
     DateTime,
     Enum,
     ForeignKey,
+    Index,
     Integer,
+    SmallInteger,
     String,
     Text,
     Time,
     UniqueConstraint,
     func,
 )
-from sqlalchemy.orm import Mapped, declarative_base, mapped_column, relationship
+from sqlalchemy.orm import Mapped, declarative_base, mapped_column, relationship, validates
+
+from .core.dates import as_utc
 
 
 Base = declarative_base()
@@ -44,6 +50,19 @@ class MatchTeam(enum.Enum):
     B = "B"
 
 
+class MatchEventKind(enum.IntEnum):
+    """Stored as a small integer in match_events.kind; values must never change."""
+
+    GOAL = 1
+    ASSIST = 2
+    SUB_ON = 3
+    SUB_OFF = 4
+    FULL_TIME = 5
+    # Corrections: take back an earlier goal or assist of the same player.
+    GOAL_UNDONE = 6
+    ASSIST_UNDONE = 7
+
+
 class RecurrenceType(enum.Enum):
     NONE = "NONE"
     WEEKLY = "WEEKLY"
@@ -66,6 +85,8 @@ class User(Base):
         DateTime(timezone=True), nullable=False, server_default=func.now()
     )
     last_login: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    # Refresh tokens issued before this are rejected (deleted account, password change, token reuse).
+    tokens_revoked_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
 
     player: Mapped["Player | None"] = relationship("Player", back_populates="user", uselist=False)
 
@@ -99,11 +120,23 @@ class Session(Base):
 
     id: Mapped[int] = mapped_column(primary_key=True)
     date: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    # UTC calendar day of ``date``. Set with ``date`` on ORM objects; Core inserts and updates set it themselves.
+    session_day: Mapped[date | None] = mapped_column(Date, nullable=True)
     location: Mapped[str] = mapped_column(String(255), nullable=False)
     max_players: Mapped[int] = mapped_column(Integer, nullable=False)
     status: Mapped[SessionStatus] = mapped_column(
         Enum(SessionStatus), nullable=False, default=SessionStatus.PLANNED
     )
+    # Bumped on every availability, team or match change; drives ETags.
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    # Roster counters maintained by services.availability (YES excludes the waitlist).
+    yes_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    maybe_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    no_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    goalkeeper_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    waitlist_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    # Last waitlist position handed out.
+    waitlist_seq: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), nullable=False, server_default=func.now()
     )
@@ -121,6 +154,19 @@ class Session(Base):
         "SessionTemplate", back_populates="sessions", lazy="select"
     )
 
+    __table_args__ = (
+        # Keyset pagination over (date, id), optionally filtered by status.
+        Index("ix_sessions_status_date", "status", "date", "id"),
+        Index("ix_sessions_date", "date", "id"),
+        # One session per template and day, whatever its time; template generation relies on it to skip duplicates.
+        Index("uq_sessions_template_day", "template_id", "session_day", unique=True),
+    )
+
+    @validates("date")
+    def _set_session_day(self, key: str, value: datetime) -> datetime:
+        self.session_day = as_utc(value).date() if value is not None else None
+        return value
+
 
 class SessionPlayer(Base):
     __tablename__ = "session_players"
@@ -131,6 +177,8 @@ class SessionPlayer(Base):
     availability: Mapped[Availability] = mapped_column(Enum(Availability), nullable=False)
     team: Mapped[SessionTeam | None] = mapped_column(Enum(SessionTeam), nullable=True)
     is_goalkeeper: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    # Set while a YES is waiting for a free place; lower positions are promoted first.
+    waitlist_position: Mapped[int | None] = mapped_column(Integer, nullable=True)
 
     session: Mapped["Session"] = relationship(back_populates="session_players")
     player: Mapped["Player"] = relationship(back_populates="session_players")
@@ -148,6 +196,16 @@ class Match(Base):
     score_team_a: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
     score_team_b: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
     notes: Mapped[str | None] = mapped_column(Text)
+    # Summary for listings, kept in step with the stat lines on every match write.
+    # Rating sums are taken before the match is applied to the ratings.
+    team_a_rating: Mapped[float | None] = mapped_column(nullable=True)
+    team_b_rating: Mapped[float | None] = mapped_column(nullable=True)
+    top_scorer_id: Mapped[int | None] = mapped_column(ForeignKey("players.id", ondelete="SET NULL"), nullable=True)
+    top_scorer_goals: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    # Last match_events seq written into the score and stat lines by live scoring; NULL if never scored live.
+    live_seq: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    # Set in the transaction that finishes live scoring and rates the match; guards against a second finish.
+    live_finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
 
     session: Mapped["Session"] = relationship(back_populates="match")
     stats: Mapped[list["PlayerStats"]] = relationship(back_populates="match", cascade="all, delete-orphan")
@@ -164,11 +222,37 @@ class PlayerStats(Base):
     assists: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
     minutes_played: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
     rating_after_match: Mapped[int | None] = mapped_column(Integer)
+    # Rating change from this match, set when the match is rated.
+    rating_delta: Mapped[float | None] = mapped_column(nullable=True)
+    # Copy of the session date, so a player's recent lines are an index range scan.
+    played_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
 
     match: Mapped["Match"] = relationship(back_populates="stats")
     player: Mapped["Player"] = relationship(back_populates="stats")
 
-    __table_args__ = (UniqueConstraint("match_id", "player_id", name="uq_match_player_stats"),)
+    __table_args__ = (
+        UniqueConstraint("match_id", "player_id", name="uq_match_player_stats"),
+        Index("ix_player_stats_player_played", "player_id", "played_at"),
+    )
+
+
+class MatchEvent(Base):
+    """Append-only timeline entry. Kept narrow: codes instead of enums, no timestamps."""
+
+    __tablename__ = "match_events"
+
+    id: Mapped[int] = mapped_column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    match_id: Mapped[int] = mapped_column(ForeignKey("matches.id", ondelete="CASCADE"), nullable=False)
+    # Position in the match timeline, from 1.
+    seq: Mapped[int] = mapped_column(Integer, nullable=False)
+    # A MatchEventKind value.
+    kind: Mapped[int] = mapped_column(SmallInteger, nullable=False)
+    player_id: Mapped[int | None] = mapped_column(ForeignKey("players.id", ondelete="CASCADE"), nullable=True)
+    # 1 = team A, 2 = team B (see services.match_events.TEAM_CODES).
+    team: Mapped[int | None] = mapped_column(SmallInteger, nullable=True)
+    minute: Mapped[int | None] = mapped_column(SmallInteger, nullable=True)
+
+    __table_args__ = (UniqueConstraint("match_id", "seq", name="uq_match_event_seq"),)
 
 
 class PlayerRating(Base):
@@ -183,6 +267,52 @@ class PlayerRating(Base):
     player: Mapped["Player"] = relationship(back_populates="rating")
 
 
+class Season(Base):
+    __tablename__ = "seasons"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    name: Mapped[str] = mapped_column(String(255), nullable=False)
+    # Inclusive range of session dates that count towards the season.
+    starts_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    ends_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now()
+    )
+
+    standings: Mapped[list["SeasonStanding"]] = relationship(
+        back_populates="season", cascade="all, delete-orphan"
+    )
+
+
+class SeasonStanding(Base):
+    """Per-season, per-player aggregates maintained by services.standings."""
+
+    __tablename__ = "season_standings"
+
+    season_id: Mapped[int] = mapped_column(ForeignKey("seasons.id", ondelete="CASCADE"), primary_key=True)
+    player_id: Mapped[int] = mapped_column(ForeignKey("players.id", ondelete="CASCADE"), primary_key=True)
+    matches_played: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    wins: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    draws: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    losses: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    # 3 per win, 1 per draw.
+    points: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    goals: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    assists: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    minutes_played: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    season: Mapped["Season"] = relationship(back_populates="standings")
+    player: Mapped["Player"] = relationship()
+
+    __table_args__ = (
+        Index("ix_season_standings_points", "season_id", "points"),
+        Index("ix_season_standings_goals", "season_id", "goals"),
+    )
+
+
 class SessionTemplate(Base):
     __tablename__ = "session_templates"
 
@@ -198,6 +328,8 @@ class SessionTemplate(Base):
     recurrence_type: Mapped[RecurrenceType | None] = mapped_column(Enum(RecurrenceType), nullable=True)
     recurrence_start: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     recurrence_end: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    # RRULE/EXDATE lines (see services.recurrence); takes precedence over recurrence_type.
+    recurrence_rule: Mapped[str | None] = mapped_column(Text, nullable=True)
     last_generated: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     
     created_at: Mapped[datetime] = mapped_column(
@@ -210,3 +342,43 @@ class SessionTemplate(Base):
     sessions: Mapped[list["Session"]] = relationship(
         "Session", back_populates="template"
     )
+
+
+class SchedulerLease(Base):
+    """Named lease so only one replica runs a background job at a time."""
+
+    __tablename__ = "scheduler_leases"
+
+    name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    holder: Mapped[str] = mapped_column(String(255), nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+
+class ResourceVersion(Base):
+    """Version counter of a whole collection (e.g. the player list), for ETags."""
+
+    __tablename__ = "resource_versions"
+
+    name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class RateLimitBucket(Base):
+    """Shared rate limit state: the key's theoretical arrival time (epoch seconds)."""
+
+    __tablename__ = "rate_limit_buckets"
+
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    tat: Mapped[float] = mapped_column(nullable=False)
+    # Whether the last check let its request through; returned by the upsert.
+    allowed: Mapped[bool] = mapped_column(Boolean, nullable=False, default=True)
+
+
+class RevokedToken(Base):
+    """A used or revoked refresh token, kept until the token would have expired."""
+
+    __tablename__ = "revoked_tokens"
+
+    jti: Mapped[str] = mapped_column(String(64), primary_key=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, index=True)
@@ -1,5 +1,5 @@
 """Authentication router."""
-from datetime import timedelta
+from datetime import datetime, timedelta, timezone
 from typing import Annotated
 
 from fastapi import APIRouter, Depends, HTTPException, status
@@ -8,9 +8,15 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from ..core.config import settings
+from ..core.dates import as_utc
 from ..db import get_db
 from ..models import Player, User
+from ..services import resource_versions
 from ..auth.dependencies import get_current_active_user, get_current_admin_user, get_current_root_user
+from ..auth import principals
+from ..auth.keys import keyring
+from ..auth.revocation import revocation_list
+from ..auth.principals import Principal
 from ..auth.schemas import (
     GrantAdminRequest,
     LinkUserToPlayerRequest,
@@ -22,16 +28,39 @@ from ..auth.schemas import (
     UserRegister,
 )
 from ..auth.security import (
+    PasswordHasherBusy,
     create_access_token,
     create_refresh_token,
     decode_token,
-    get_password_hash,
-    verify_password,
+    needs_rehash,
+    password_hasher,
 )
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
 
+def _hasher_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many sign-in requests, please retry shortly",
+        headers={"Retry-After": "1"},
+    )
+
+
+async def _verify_password(plain_password: str, hashed_password: str) -> bool:
+    try:
+        return await password_hasher.verify(plain_password, hashed_password)
+    except PasswordHasherBusy:
+        raise _hasher_busy()
+
+
+async def _hash_password(password: str) -> str:
+    try:
+        return await password_hasher.hash(password)
+    except PasswordHasherBusy:
+        raise _hasher_busy()
+
+
 @router.post("/register", response_model=Token, status_code=status.HTTP_201_CREATED)
 async def register(
     user_in: UserRegister,
@@ -68,6 +97,7 @@ async def register(
         )
         db.add(new_player)
         await db.flush()
+        await resource_versions.bump(db, resource_versions.PLAYERS)
         user_in.player_id = new_player.id
 
     # If player_id is provided, verify it exists and is not already linked
@@ -86,7 +116,7 @@ async def register(
             )
 
     # Create user
-    hashed_password = get_password_hash(user_in.password)
+    hashed_password = await _hash_password(user_in.password)
     user = User(
         email=user_in.email,
         username=user_in.username,
@@ -122,7 +152,7 @@ async def login(
     )
     user = result.scalar_one_or_none()
 
-    if not user or not verify_password(user_in.password, user.hashed_password):
+    if not user or not await _verify_password(user_in.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -135,8 +165,14 @@ async def login(
             detail="Inactive user",
         )
 
+    # Upgrade the hash to the configured work factor while the password is at hand
+    if needs_rehash(user.hashed_password):
+        try:
+            user.hashed_password = await password_hasher.hash(user_in.password)
+        except PasswordHasherBusy:
+            pass  # Upgraded on a later login
+
     # Update last login
-    from datetime import datetime, timezone
     user.last_login = datetime.now(timezone.utc)
     await db.commit()
 
@@ -177,6 +213,30 @@ async def refresh_token(
             detail="User not found or inactive",
         )
 
+    # iat has whole seconds, so tokens from the second of the revocation go too.
+    revoked_at = user.tokens_revoked_at
+    if revoked_at is not None and payload.get("iat", 0) <= as_utc(revoked_at).timestamp():
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Refresh token revoked",
+        )
+
+    # Rotate: the presented token is used up. Tokens issued before rotation have no jti
+    # and stay usable until they expire.
+    jti = payload.get("jti")
+    if jti is not None:
+        expires_at = datetime.fromtimestamp(payload["exp"], timezone.utc)
+        if not await revocation_list.revoke(db, jti, user.id, expires_at):
+            # A used token came back: it leaked, so end every session of the user.
+            await db.rollback()
+            user.tokens_revoked_at = datetime.now(timezone.utc)
+            await db.commit()
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Refresh token revoked",
+            )
+        await db.commit()
+
     # Create new tokens
     access_token = create_access_token(data={"sub": str(user.id), "email": user.email})
     new_refresh_token = create_refresh_token(data={"sub": str(user.id), "email": user.email})
@@ -184,16 +244,41 @@ async def refresh_token(
     return Token(access_token=access_token, refresh_token=new_refresh_token)
 
 
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(
+    request: RefreshTokenRequest,
+    db: Annotated[AsyncSession, Depends(get_db)],
+) -> None:
+    """Revoke a refresh token."""
+    try:
+        payload = decode_token(request.refresh_token)
+        if payload.get("type") != "refresh":
+            raise ValueError("Invalid token type")
+        user_id = int(payload.get("sub"))
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token",
+        )
+
+    if payload.get("jti") is not None:
+        expires_at = datetime.fromtimestamp(payload["exp"], timezone.utc)
+        await revocation_list.revoke(db, payload["jti"], user_id, expires_at)
+        await db.commit()
+
+
+@router.get("/jwks")
+async def get_jwks() -> dict:
+    """Public keys that verify access tokens (empty while tokens are signed with the shared secret)."""
+    return keyring.jwks()
+
+
 @router.get("/me", response_model=UserRead)
 async def get_current_user_info(
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    current_user: Annotated[Principal, Depends(get_current_active_user)],
     db: Annotated[AsyncSession, Depends(get_db)],
 ) -> UserRead:
     """Get current user information."""
-    player_id = None
-    if current_user.player:
-        player_id = current_user.player.id
-
     return UserRead(
         id=current_user.id,
         email=current_user.email,
@@ -201,30 +286,33 @@ async def get_current_user_info(
         is_active=current_user.is_active,
         is_admin=current_user.is_admin,
         is_root=current_user.is_root,
-        player_id=player_id,
+        player_id=current_user.player_id,
     )
 
 
 @router.post("/change-password", status_code=status.HTTP_204_NO_CONTENT)
 async def change_password(
     password_change: PasswordChangeRequest,
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    current_user: Annotated[Principal, Depends(get_current_active_user)],
     db: Annotated[AsyncSession, Depends(get_db)],
 ) -> None:
     """Change password for the current user."""
-    if not verify_password(password_change.current_password, current_user.hashed_password):
+    user = await db.get(User, current_user.id)
+    if not await _verify_password(password_change.current_password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Incorrect current password",
         )
 
-    current_user.hashed_password = get_password_hash(password_change.new_password)
+    user.hashed_password = await _hash_password(password_change.new_password)
+    user.tokens_revoked_at = datetime.now(timezone.utc)
     await db.commit()
+    await principals.invalidate(db, user.id)
 
 
 @router.get("/users", response_model=list[UserRead])
 async def list_users(
-    root_user: Annotated[User, Depends(get_current_root_user)],
+    root_user: Annotated[Principal, Depends(get_current_root_user)],
     db: Annotated[AsyncSession, Depends(get_db)],
 ) -> list[UserRead]:
     """List all users. Only root user can perform this action."""
@@ -252,7 +340,7 @@ async def list_users(
 @router.post("/grant-admin", status_code=status.HTTP_204_NO_CONTENT)
 async def grant_admin_role(
     request: GrantAdminRequest,
-    root_user: Annotated[User, Depends(get_current_root_user)],
+    root_user: Annotated[Principal, Depends(get_current_root_user)],
     db: Annotated[AsyncSession, Depends(get_db)],
 ) -> None:
     """Grant admin role to a user. Only root user can perform this action."""
@@ -271,12 +359,13 @@ async def grant_admin_role(
 
     target_user.is_admin = True
     await db.commit()
+    await principals.invalidate(db, target_user.id)
 
 
 @router.post("/link-user-to-player", status_code=status.HTTP_204_NO_CONTENT)
 async def link_user_to_player(
     request: LinkUserToPlayerRequest,
-    admin_user: Annotated[User, Depends(get_current_admin_user)],
+    admin_user: Annotated[Principal, Depends(get_current_admin_user)],
     db: Annotated[AsyncSession, Depends(get_db)],
 ) -> None:
     """Link or unlink a user to/from a player. Only admin users can perform this action."""
@@ -305,6 +394,7 @@ async def link_user_to_player(
         if target_user.player:
             target_user.player.user_id = None
             await db.commit()
+            await principals.invalidate(db, target_user.id)
         return
 
     # If linking to a player
@@ -332,12 +422,13 @@ async def link_user_to_player(
     # Link new player (target_user.player is None or same player, so safe to link)
     player.user_id = target_user.id
     await db.commit()
+    await principals.invalidate(db, target_user.id)
 
 
 @router.delete("/users/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_user(
     user_id: int,
-    root_user: Annotated[User, Depends(get_current_root_user)],
+    root_user: Annotated[Principal, Depends(get_current_root_user)],
     db: Annotated[AsyncSession, Depends(get_db)],
 ) -> None:
     """Delete a user account. Only root user can perform this action."""
@@ -361,8 +452,8 @@ async def delete_user(
         )
 
     # Soft delete: mark as deleted
-    from datetime import datetime, timezone
     target_user.deleted_at = datetime.now(timezone.utc)
+    target_user.tokens_revoked_at = target_user.deleted_at
     # Also deactivate the account
     target_user.is_active = False
     
@@ -371,4 +462,4 @@ async def delete_user(
         target_user.player.user_id = None
     
     await db.commit()
-
+    await principals.invalidate(db, target_user.id)
@@ -1,20 +1,65 @@
 from __future__ import annotations
 
-from typing import Annotated, Optional
-
-from fastapi import APIRouter, Depends, HTTPException, status
-from pydantic import BaseModel
-from sqlalchemy import delete, select
+import io
+import json
+import tempfile
+from datetime import datetime
+from typing import Annotated, Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field, model_validator
+from sqlalchemy import and_, or_, select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import aliased, selectinload
 
 from .. import models, schemas
 from ..auth.dependencies import get_current_admin_user
+from ..auth.principals import Principal
+from ..core import http_cache, pagination
+from ..core.config import settings
 from ..db import get_db
-from ..services import ratings
+from ..services import analytics, live_scoring, match_events, match_import, match_stats, ratings, session_events, session_versions, standings
 
 router = APIRouter(tags=["matches"])
 
+# Import bodies larger than this are spooled to disk instead of memory.
+IMPORT_SPOOL_BYTES = 8 * 1024 * 1024
+
+# team_a/team_b/draw filter on the score; win/loss are relative to ``player_id``.
+MatchResultFilter = Literal["team_a", "team_b", "draw", "win", "loss"]
+
+
+class LiveEventInput(BaseModel):
+    type: Literal["goal", "assist"]
+    player_id: int = Field(..., gt=0)
+    # -1 takes back a mistaken tap.
+    delta: Literal[1, -1] = 1
+
+
+class LiveEventsPayload(BaseModel):
+    events: list[LiveEventInput] = Field(..., min_length=1, max_length=50)
+
+
+class MatchEventInput(BaseModel):
+    kind: Literal["goal", "assist", "sub_on", "sub_off", "full_time", "goal_undone", "assist_undone"]
+    player_id: Optional[int] = Field(None, gt=0)
+    team: Optional[models.MatchTeam] = None
+    minute: Optional[int] = Field(None, ge=0, le=150)
+
+    @model_validator(mode="after")
+    def check_fields(self) -> "MatchEventInput":
+        if self.kind == "full_time":
+            if self.minute is None:
+                raise ValueError("full_time requires a minute")
+        elif self.player_id is None or self.team is None:
+            raise ValueError(f"{self.kind} requires player_id and team")
+        return self
+
+
+class MatchEventsPayload(BaseModel):
+    events: list[MatchEventInput] = Field(..., min_length=1, max_length=500)
+
 
 class MatchCompletionPayload(BaseModel):
     score_team_a: int
@@ -23,35 +68,117 @@ class MatchCompletionPayload(BaseModel):
     player_stats: list[schemas.PlayerStatsCreate]
 
 
+@router.get("/matches", response_model=list[schemas.MatchSummaryRead])
+async def list_matches(
+    response: Response,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    player_id: Optional[int] = Query(default=None, description="Only matches this player has a stat line in"),
+    result: Optional[MatchResultFilter] = None,
+    after: Optional[str] = Query(
+        default=None, description="Opaque keyset cursor taken from the X-Next-Cursor header"
+    ),
+    limit: int = Query(default=settings.matches_page_size, ge=1, le=settings.matches_page_size_max),
+    db: AsyncSession = Depends(get_db),
+) -> list[schemas.MatchSummaryRead]:
+    """List match summaries ordered by (session date, id), one keyset page at a time.
+
+    Rows come from the summary columns on matches, so no roster or stats are loaded.
+    """
+    if result in ("win", "loss") and player_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="The win and loss filters need a player_id",
+        )
+
+    match, session = models.Match, models.Session
+    top_scorer = aliased(models.Player)
+    stmt = (
+        select(
+            match.id,
+            match.session_id,
+            session.date.label("date"),
+            session.location.label("location"),
+            match.score_team_a,
+            match.score_team_b,
+            match.team_a_rating,
+            match.team_b_rating,
+            match.top_scorer_id,
+            top_scorer.name.label("top_scorer_name"),
+            match.top_scorer_goals,
+        )
+        .join(session, session.id == match.session_id)
+        .outerjoin(top_scorer, top_scorer.id == match.top_scorer_id)
+    )
+    if date_from:
+        stmt = stmt.where(session.date >= date_from)
+    if date_to:
+        stmt = stmt.where(session.date <= date_to)
+    if player_id is not None:
+        stmt = stmt.join(
+            models.PlayerStats,
+            and_(models.PlayerStats.match_id == match.id, models.PlayerStats.player_id == player_id),
+        )
+
+    team_a_won = match.score_team_a > match.score_team_b
+    team_b_won = match.score_team_b > match.score_team_a
+    if result == "team_a":
+        stmt = stmt.where(team_a_won)
+    elif result == "team_b":
+        stmt = stmt.where(team_b_won)
+    elif result == "draw":
+        stmt = stmt.where(match.score_team_a == match.score_team_b)
+    elif result in ("win", "loss"):
+        won_side, lost_side = (team_a_won, team_b_won) if result == "win" else (team_b_won, team_a_won)
+        stmt = stmt.where(
+            or_(
+                and_(models.PlayerStats.team == models.MatchTeam.A, won_side),
+                and_(models.PlayerStats.team == models.MatchTeam.B, lost_side),
+            )
+        )
+
+    if after:
+        cursor_date, cursor_id = pagination.parse_cursor(after)
+        stmt = stmt.where(tuple_(session.date, match.id) > tuple_(cursor_date, cursor_id))
+    stmt = stmt.order_by(session.date, match.id).limit(limit + 1)
+
+    rows = (await db.execute(stmt)).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = pagination.encode_cursor(rows[-1].date, rows[-1].id)
+    return [schemas.MatchSummaryRead(**row._mapping) for row in rows]
+
+
 @router.post("/matches", response_model=schemas.SessionMatchRead, status_code=status.HTTP_201_CREATED)
 async def create_match(
     payload: schemas.MatchWithStatsCreate,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[models.User, Depends(get_current_admin_user)],
+    current_user: Annotated[Principal, Depends(get_current_admin_user)],
 ) -> schemas.SessionMatchRead:
     session = await db.get(
         models.Session,
         payload.session_id,
-        options=[
-            selectinload(models.Session.session_players).selectinload(models.SessionPlayer.player).selectinload(
-                models.Player.rating
-            )
-        ],
+        options=[selectinload(models.Session.session_players)],
     )
     if not session:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
 
     existing_match_result = await db.execute(
-        select(models.Match).where(models.Match.session_id == payload.session_id)
+        select(models.Match.id).where(models.Match.session_id == payload.session_id)
     )
-    existing_match = existing_match_result.scalars().first()
-    if existing_match:
+    if existing_match_result.first():
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="Match already exists for this session",
         )
 
-    session_roster = {sp.player_id: sp for sp in session.session_players}
+    missing = await match_stats.find_missing_players(db, (stat.player_id for stat in payload.player_stats))
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Player {missing[0]} not found",
+        )
+    _check_roster(session.session_players, payload.player_stats)
 
     match = models.Match(
         session_id=payload.session_id,
@@ -62,40 +189,56 @@ async def create_match(
     db.add(match)
     await db.flush()
 
-    for stat_input in payload.player_stats:
-        player = await db.get(models.Player, stat_input.player_id)
-        if not player:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Player {stat_input.player_id} not found",
-            )
+    stats = await match_stats.upsert_player_stats(db, match.id, payload.player_stats)
+    match.top_scorer_id, match.top_scorer_goals = match_stats.top_scorer(stats)
+    session.status = models.SessionStatus.COMPLETED
+    await ratings.update_ratings_after_match(db, match, stats)
+    await standings.refresh(db, [session.date], (stat.player_id for stat in stats))
+    version = await session_versions.bump(db, match.session_id)
+    await db.commit()
+    analytics.pair_analytics.apply(None, _match_result(match, stats))
+    _publish_match(match, version)
+    return _compose_session_match_response(match, session_players=session.session_players, stats=stats)
+
 
-        session_player = session_roster.get(stat_input.player_id)
-        if not session_player:
+@router.post("/matches/import", response_model=schemas.MatchImportSummary)
+async def import_matches(
+    request: Request,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    current_user: Annotated[Principal, Depends(get_current_admin_user)],
+    import_format: Optional[Literal["csv", "ndjson"]] = Query(
+        default=None,
+        alias="format",
+        description="Body format; defaults from Content-Type (NDJSON for JSON types, else CSV)",
+    ),
+) -> schemas.MatchImportSummary:
+    """Bulk-import historical matches streamed as CSV or NDJSON.
+
+    Existing matches (same date and location) are skipped. Ratings are replayed
+    over the full history once the import is done.
+    """
+    if import_format is None:
+        import_format = "ndjson" if "json" in request.headers.get("content-type", "") else "csv"
+
+    with tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_BYTES) as spool:
+        async for chunk in request.stream():
+            spool.write(chunk)
+        spool.seek(0)
+        text = io.TextIOWrapper(spool, encoding="utf-8", newline="")
+        importer = match_import.MatchImporter(db)
+        try:
+            summary = await importer.run(match_import.parse(text, import_format))
+        except match_import.MatchImportError as exc:
+            analytics.pair_analytics.invalidate()
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Player {stat_input.player_id} is not part of the session roster",
+                detail=f"{exc} ({importer.summary.matches_imported} matches imported before it)",
             )
-
-        stat = models.PlayerStats(
-            match_id=match.id,
-            player_id=stat_input.player_id,
-            team=stat_input.team,
-            goals=stat_input.goals,
-            assists=stat_input.assists,
-            minutes_played=stat_input.minutes_played,
-        )
-        db.add(stat)
-
-    await db.flush()
-    await ratings.update_ratings_after_match(db, match)
-    await db.commit()
-    # Load stats explicitly for response
-    stats_result = await db.execute(
-        select(models.PlayerStats).where(models.PlayerStats.match_id == match.id)
-    )
-    match_stats = stats_result.scalars().all()
-    return _compose_session_match_response(match, session_players=session.session_players, stats=match_stats)
+        except UnicodeDecodeError:
+            analytics.pair_analytics.invalidate()
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Import must be UTF-8 encoded")
+    analytics.pair_analytics.invalidate()
+    return schemas.MatchImportSummary.model_validate(summary)
 
 
 @router.put("/matches/{match_id}", response_model=schemas.SessionMatchRead)
@@ -103,7 +246,7 @@ async def update_match(
     match_id: int,
     payload: schemas.MatchWithStatsCreate,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[models.User, Depends(get_current_admin_user)],
+    current_user: Annotated[Principal, Depends(get_current_admin_user)],
 ) -> schemas.SessionMatchRead:
     match = await db.get(
         models.Match,
@@ -115,6 +258,7 @@ async def update_match(
     )
     if not match:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Match not found")
+    _check_not_live(match)
 
     session = match.session
     if not session or session.id != payload.session_id:
@@ -123,44 +267,27 @@ async def update_match(
             detail="Match does not belong to the provided session",
         )
 
-    session_roster = {sp.player_id: sp for sp in session.session_players}
+    _check_roster(session.session_players, payload.player_stats)
 
+    before = _match_result(match, match.stats)
     match.score_team_a = payload.score_team_a
     match.score_team_b = payload.score_team_b
     match.notes = payload.notes
 
-    # Delete existing stats explicitly to avoid lazy loading issues
-    await db.execute(
-        delete(models.PlayerStats).where(models.PlayerStats.match_id == match.id)
-    )
-
-    # Add new stats directly to session
-    for stat_input in payload.player_stats:
-        if stat_input.player_id not in session_roster:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Player {stat_input.player_id} is not part of the session roster",
-            )
-
-        stat = models.PlayerStats(
-            match_id=match.id,
-            player_id=stat_input.player_id,
-            team=stat_input.team,
-            goals=stat_input.goals,
-            assists=stat_input.assists,
-            minutes_played=stat_input.minutes_played,
-        )
-        db.add(stat)
-
+    # Replace the stat lines: players dropped from the payload are deleted.
+    previous_player_ids = {stat.player_id for stat in match.stats}
+    stats = await match_stats.upsert_player_stats(db, match.id, payload.player_stats, replace=True)
+    match.top_scorer_id, match.top_scorer_goals = match_stats.top_scorer(stats)
+    session.status = models.SessionStatus.COMPLETED
     await db.flush()
-    await ratings.update_ratings_after_match(db, match)
+    await ratings.update_ratings_after_match(db, match, stats)
+    await standings.refresh(db, [session.date], previous_player_ids.union(stat.player_id for stat in stats))
+    version = await session_versions.bump(db, match.session_id)
     await db.commit()
-    # Load stats explicitly for response
-    stats_result = await db.execute(
-        select(models.PlayerStats).where(models.PlayerStats.match_id == match.id)
-    )
-    match_stats = stats_result.scalars().all()
-    return _compose_session_match_response(match, session_players=session.session_players, stats=match_stats)
+    live_scoring.live_scoring.discard(match.id)
+    analytics.pair_analytics.apply(before, _match_result(match, stats))
+    _publish_match(match, version)
+    return _compose_session_match_response(match, session_players=session.session_players, stats=stats)
 
 
 @router.get("/matches/{match_id}", response_model=schemas.SessionMatchRead)
@@ -181,7 +308,19 @@ async def get_match(match_id: int, db: AsyncSession = Depends(get_db)) -> schema
 
 
 @router.get("/sessions/{session_id}/match", response_model=schemas.SessionMatchRead)
-async def get_match_for_session(session_id: int, db: AsyncSession = Depends(get_db)) -> schemas.SessionMatchRead:
+async def get_match_for_session(
+    session_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+) -> schemas.SessionMatchRead:
+    version = await session_versions.current(db, session_id)
+    if version is not None:
+        etag = http_cache.make_etag("match", session_id, version)
+        if http_cache.etag_matches(request, etag):
+            return http_cache.not_modified(etag)
+        response.headers.update(http_cache.cache_headers(etag))
+
     result = await db.execute(
         select(models.Match)
         .options(
@@ -196,7 +335,7 @@ async def get_match_for_session(session_id: int, db: AsyncSession = Depends(get_
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Match not found for session",
         )
-    return _compose_session_match_response(match)
+    return _compose_session_match_response(match, stats=list(match.stats))
 
 
 @router.post("/matches/{match_id}/complete", response_model=schemas.SessionMatchRead)
@@ -204,7 +343,7 @@ async def complete_match(
     match_id: int,
     payload: MatchCompletionPayload,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[models.User, Depends(get_current_admin_user)],
+    current_user: Annotated[Principal, Depends(get_current_admin_user)],
 ) -> schemas.SessionMatchRead:
     match = await db.get(
         models.Match,
@@ -216,51 +355,227 @@ async def complete_match(
     )
     if not match:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Match not found")
+    _check_not_live(match)
+
+    _check_unique_players(payload.player_stats)
+    missing = await match_stats.find_missing_players(db, (stat.player_id for stat in payload.player_stats))
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Player {missing[0]} not found",
+        )
 
+    before = _match_result(match, match.stats)
     match.score_team_a = payload.score_team_a
     match.score_team_b = payload.score_team_b
     match.notes = payload.notes
 
-    # Load existing stats explicitly to avoid lazy loading
-    existing_result = await db.execute(
-        select(models.PlayerStats).where(models.PlayerStats.match_id == match.id)
+    # Stat lines of players not in the payload are kept, so rate and return the full set.
+    stats_by_player = {stat.player_id: stat for stat in match.stats}
+    for stat in await match_stats.upsert_player_stats(db, match.id, payload.player_stats):
+        stats_by_player[stat.player_id] = stat
+    stats = list(stats_by_player.values())
+    match.top_scorer_id, match.top_scorer_goals = match_stats.top_scorer(stats)
+    match.session.status = models.SessionStatus.COMPLETED
+    await db.flush()
+    await ratings.update_ratings_after_match(db, match, stats)
+    await standings.refresh(db, [match.session.date], stats_by_player)
+    version = await session_versions.bump(db, match.session_id)
+    await db.commit()
+    live_scoring.live_scoring.discard(match.id)
+    analytics.pair_analytics.apply(before, _match_result(match, stats))
+    _publish_match(match, version)
+    return _compose_session_match_response(match, stats=stats)
+
+
+@router.post("/matches/{match_id}/live/events", response_model=schemas.LiveMatchRead)
+async def post_live_events(
+    match_id: int,
+    payload: LiveEventsPayload,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    current_user: Annotated[Principal, Depends(get_current_admin_user)],
+) -> schemas.LiveMatchRead:
+    """Record goal/assist taps in the match timeline; the score and stat lines are written in batches."""
+    events = [live_scoring.LiveEvent(event.type, event.player_id, event.delta) for event in payload.events]
+    try:
+        live = await live_scoring.live_scoring.apply(db, match_id, events)
+    except live_scoring.LiveScoringError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    if live is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Match not found")
+    return _live_response(live)
+
+
+@router.get("/matches/{match_id}/live", response_model=schemas.LiveMatchRead)
+async def get_live_match(match_id: int) -> schemas.LiveMatchRead:
+    live = live_scoring.live_scoring.get(match_id)
+    if live is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Match is not being scored live")
+    return _live_response(live)
+
+
+@router.post("/matches/{match_id}/live/finish", response_model=schemas.LiveMatchRead)
+async def finish_live_match(
+    match_id: int,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    current_user: Annotated[Principal, Depends(get_current_admin_user)],
+) -> schemas.LiveMatchRead:
+    """Write the final live state and apply ratings and standings, as complete_match does."""
+    try:
+        live = await live_scoring.live_scoring.finish(db, match_id)
+    except live_scoring.LiveScoringError as exc:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc))
+    if live is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Match not found")
+    analytics.pair_analytics.invalidate()
+    return _live_response(live)
+
+
+@router.post(
+    "/matches/{match_id}/events",
+    response_model=list[schemas.MatchEventRead],
+    status_code=status.HTTP_201_CREATED,
+)
+async def append_match_events(
+    match_id: int,
+    payload: MatchEventsPayload,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    current_user: Annotated[Principal, Depends(get_current_admin_user)],
+) -> list[schemas.MatchEventRead]:
+    """Append events to the match timeline. Stats change only when the match is rebuilt."""
+    events = [
+        match_events.NewEvent(
+            kind=models.MatchEventKind[event.kind.upper()],
+            player_id=event.player_id if event.kind != "full_time" else None,
+            team=event.team if event.kind != "full_time" else None,
+            minute=event.minute,
+        )
+        for event in payload.events
+    ]
+    match = await db.get(models.Match, match_id)
+    if match is not None:
+        _check_not_live(match)
+    try:
+        rows = await match_events.append(db, match_id, events)
+    except match_events.MatchEventError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    if rows is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Match not found")
+    await db.commit()
+    live_scoring.live_scoring.discard(match_id)
+    return [
+        schemas.MatchEventRead(**match_events.decode(row.seq, row.kind, row.player_id, row.team, row.minute))
+        for row in rows
+    ]
+
+
+@router.get("/matches/{match_id}/timeline")
+async def get_match_timeline(
+    match_id: int,
+    db: Annotated[AsyncSession, Depends(get_db)],
+) -> StreamingResponse:
+    """Stream the match events in order, one JSON object per line."""
+    if await db.scalar(select(models.Match.id).where(models.Match.id == match_id)) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Match not found")
+
+    async def lines():
+        async for event in match_events.timeline(db, match_id):
+            yield json.dumps(event) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@router.post("/matches/{match_id}/events/rebuild", response_model=schemas.SessionMatchRead)
+async def rebuild_match_from_events(
+    match_id: int,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    current_user: Annotated[Principal, Depends(get_current_admin_user)],
+) -> schemas.SessionMatchRead:
+    """Replace the score and stat lines with the projection of the event log.
+
+    Ratings are not reapplied; complete the match to rate it.
+    """
+    match = await db.get(
+        models.Match,
+        match_id,
+        options=[selectinload(models.Match.session).selectinload(models.Session.session_players)],
     )
-    existing_stats = {stat.player_id: stat for stat in existing_result.scalars().all()}
+    if not match:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Match not found")
+    _check_not_live(match)
+    try:
+        stats, version = await match_events.rebuild_match(db, match, match.session)
+    except match_events.MatchEventError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    await db.commit()
+    live_scoring.live_scoring.discard(match.id)
+    analytics.pair_analytics.invalidate()
+    _publish_match(match, version)
+    return _compose_session_match_response(match, stats=stats)
+
+
+def _live_response(live: live_scoring.LiveMatch) -> schemas.LiveMatchRead:
+    return schemas.LiveMatchRead(
+        match_id=live.match_id,
+        score_team_a=live.score_team_a,
+        score_team_b=live.score_team_b,
+        seq=live.seq,
+        pending=live.pending,
+        stats=[schemas.LiveStatRead.model_validate(line) for line in live.lines.values()],
+    )
+
 
-    for stat_input in payload.player_stats:
-        player = await db.get(models.Player, stat_input.player_id)
-        if not player:
+def _check_not_live(match: models.Match) -> None:
+    if live_scoring.is_live(match):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Match is being scored live; finish it first",
+        )
+
+
+def _check_unique_players(player_stats: list[schemas.PlayerStatsCreate]) -> None:
+    # One INSERT ... ON CONFLICT cannot touch the same row twice. MatchWithStatsCreate
+    # payloads are checked by their schema already.
+    seen: set[int] = set()
+    for stat_input in player_stats:
+        if stat_input.player_id in seen:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Player {stat_input.player_id} not found",
+                detail=f"Player {stat_input.player_id} is listed twice",
             )
+        seen.add(stat_input.player_id)
 
-        stat = existing_stats.get(stat_input.player_id)
-        if stat:
-            stat.team = stat_input.team
-            stat.goals = stat_input.goals
-            stat.assists = stat_input.assists
-            stat.minutes_played = stat_input.minutes_played
-        else:
-            new_stat = models.PlayerStats(
-                match_id=match.id,
-                player_id=stat_input.player_id,
-                team=stat_input.team,
-                goals=stat_input.goals,
-                assists=stat_input.assists,
-                minutes_played=stat_input.minutes_played,
+
+def _check_roster(
+    session_players: list[models.SessionPlayer],
+    player_stats: list[schemas.PlayerStatsCreate],
+) -> None:
+    roster = {sp.player_id for sp in session_players}
+    for stat_input in player_stats:
+        if stat_input.player_id not in roster:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Player {stat_input.player_id} is not part of the session roster",
             )
-            db.add(new_stat)
 
-    await db.flush()
-    await ratings.update_ratings_after_match(db, match)
-    await db.commit()
-    # Load stats explicitly for response (stats already loaded via selectinload, but refresh to get latest)
-    stats_result = await db.execute(
-        select(models.PlayerStats).where(models.PlayerStats.match_id == match.id)
+
+def _match_result(match: models.Match, stats) -> analytics.MatchResult:
+    return analytics.MatchResult.of(stats, match.score_team_a, match.score_team_b)
+
+
+def _publish_match(match: models.Match, version: int | None) -> None:
+    session_events.broker.publish(
+        session_events.SessionEvent(
+            type="match",
+            session_id=match.session_id,
+            version=version,
+            data={
+                "match_id": match.id,
+                "score_team_a": match.score_team_a,
+                "score_team_b": match.score_team_b,
+            },
+        )
     )
-    match_stats = stats_result.scalars().all()
-    return _compose_session_match_response(match, stats=match_stats)
 
 
 def _compose_session_match_response(
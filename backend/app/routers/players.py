@@ -1,14 +1,20 @@
 from datetime import datetime, timezone
-from typing import Annotated
+from typing import Annotated, Literal
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from .. import models, schemas
 from ..auth.dependencies import get_current_active_user, get_current_admin_user
+from ..auth.principals import Principal
+from ..core import http_cache
+from ..core.config import settings
 from ..db import get_db
+from ..services import resource_versions
+from ..services.analytics import pair_analytics
+from ..services.form import player_form
 from ..services.ratings import BASE_RATING
 
 router = APIRouter(prefix="/players", tags=["players"])
@@ -19,7 +25,7 @@ router = APIRouter(prefix="/players", tags=["players"])
 async def create_player(
     player_in: schemas.PlayerCreate,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[models.User, Depends(get_current_admin_user)],
+    current_user: Annotated[Principal, Depends(get_current_admin_user)],
 ) -> schemas.PlayerRead:
     player = models.Player(
         name=player_in.name,
@@ -35,6 +41,7 @@ async def create_player(
         overall_rating=BASE_RATING,
     )
     db.add(rating)
+    await resource_versions.bump(db, resource_versions.PLAYERS)
     await db.commit()
     
     # Reload player with rating relationship to avoid lazy loading issues
@@ -50,19 +57,41 @@ async def create_player(
 @router.get("/", response_model=list[schemas.PlayerRead])
 @router.get("", response_model=list[schemas.PlayerRead], include_in_schema=False)
 async def list_players(
+    request: Request,
+    response: Response,
     active: bool | None = Query(default=None, description="Filter by active status"),
     db: AsyncSession = Depends(get_db),
 ) -> list[schemas.PlayerRead]:
-    # Exclude deleted players by default
-    stmt = select(models.Player).options(selectinload(models.Player.rating)).where(
-        models.Player.deleted_at.is_(None)
+    etag = await _players_etag(db, active)
+    if http_cache.etag_matches(request, etag):
+        return http_cache.not_modified(etag)
+    response.headers.update(http_cache.cache_headers(etag))
+
+    result = await db.execute(
+        select(models.Player).options(selectinload(models.Player.rating)).where(*_players_filter(active))
     )
-    if active is not None:
-        stmt = stmt.where(models.Player.active == active)
-    result = await db.execute(stmt)
     return result.scalars().all()
 
 
+def _players_filter(active: bool | None) -> list:
+    # Exclude deleted players by default
+    criteria = [models.Player.deleted_at.is_(None)]
+    if active is not None:
+        criteria.append(models.Player.active == active)
+    return criteria
+
+
+async def _players_etag(db: AsyncSession, active: bool | None) -> str:
+    """Derive the player list ETag from the players version counter.
+
+    Every write to players or their ratings bumps the counter, so this is one
+    primary-key read, and exact where timestamps have second resolution or an
+    Elo update leaves aggregates unchanged.
+    """
+    version = await resource_versions.current(db, resource_versions.PLAYERS)
+    return http_cache.make_etag("players", active, version)
+
+
 @router.get("/{player_id}", response_model=schemas.PlayerRead)
 async def get_player(player_id: int, db: AsyncSession = Depends(get_db)) -> schemas.PlayerRead:
     result = await db.execute(
@@ -80,9 +109,11 @@ async def get_player(player_id: int, db: AsyncSession = Depends(get_db)) -> sche
 async def get_player_profile(
     player_id: int,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[models.User, Depends(get_current_active_user)],
+    current_user: Annotated[Principal, Depends(get_current_active_user)],
+    form_matches: int = Query(settings.form_window_matches, ge=1, le=100),
+    form_days: int = Query(settings.form_window_days, ge=1, le=3650),
 ) -> schemas.PlayerProfileResponse:
-    """Get player profile with statistics and match history.
+    """Get player profile with statistics, recent form and match history.
     
     Regular users can only view their own profile.
     Admins can view any profile.
@@ -162,19 +193,87 @@ async def get_player_profile(
             )
         )
 
+    forms = await player_form(db, [player_id], matches=form_matches, days=form_days)
+    form = forms[player_id]
+
     return schemas.PlayerProfileResponse(
         player=player,
         stats_summary=stats_summary,
+        form=schemas.PlayerFormRead(
+            window_matches=form_matches,
+            window_days=form_days,
+            last_matches=schemas.FormWindowRead.model_validate(form.last_matches),
+            last_days=schemas.FormWindowRead.model_validate(form.last_days),
+        ),
         match_history=match_history,
     )
 
 
+@router.get("/{player_id}/partners", response_model=list[schemas.PartnerRead])
+async def list_player_partners(
+    player_id: int,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    sort: Literal["games", "wins", "goal_difference"] = "games",
+    limit: int = Query(20, ge=1, le=100),
+) -> list[schemas.PartnerRead]:
+    """Players this player has shared a team with, and how those games went."""
+    await _require_player(db, player_id)
+    matrix = await pair_analytics.matrix(db)
+    partners = sorted(
+        matrix.partners(player_id).items(),
+        key=lambda item: (-getattr(item[1], sort), item[0]),
+    )[:limit]
+    names = await _player_names(db, [partner_id for partner_id, _ in partners])
+    return [
+        schemas.PartnerRead(
+            player_id=partner_id,
+            name=names.get(partner_id, ""),
+            **schemas.PairRecordRead.model_validate(record).model_dump(),
+        )
+        for partner_id, record in partners
+    ]
+
+
+@router.get("/{player_id}/vs/{other_player_id}", response_model=schemas.HeadToHeadRead)
+async def get_head_to_head(
+    player_id: int,
+    other_player_id: int,
+    db: Annotated[AsyncSession, Depends(get_db)],
+) -> schemas.HeadToHeadRead:
+    """Record of ``player_id`` alongside and against ``other_player_id``."""
+    await _require_player(db, player_id)
+    await _require_player(db, other_player_id)
+    matrix = await pair_analytics.matrix(db)
+    together, against = matrix.head_to_head(player_id, other_player_id)
+    return schemas.HeadToHeadRead(
+        player_id=player_id,
+        other_player_id=other_player_id,
+        together=schemas.PairRecordRead.model_validate(together),
+        against=schemas.PairRecordRead.model_validate(against),
+    )
+
+
+async def _require_player(db: AsyncSession, player_id: int) -> None:
+    found = await db.scalar(
+        select(models.Player.id).where(models.Player.id == player_id, models.Player.deleted_at.is_(None))
+    )
+    if found is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Player not found")
+
+
+async def _player_names(db: AsyncSession, player_ids: list[int]) -> dict[int, str]:
+    if not player_ids:
+        return {}
+    result = await db.execute(select(models.Player.id, models.Player.name).where(models.Player.id.in_(player_ids)))
+    return dict(result.all())
+
+
 @router.put("/{player_id}", response_model=schemas.PlayerRead)
 async def update_player(
     player_id: int,
     player_in: schemas.PlayerCreate,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[models.User, Depends(get_current_admin_user)],
+    current_user: Annotated[Principal, Depends(get_current_admin_user)],
 ) -> schemas.PlayerRead:
     result = await db.execute(
         select(models.Player)
@@ -188,6 +287,7 @@ async def update_player(
     player.name = player_in.name
     player.preferred_position = player_in.preferred_position
     player.active = player_in.active
+    await resource_versions.bump(db, resource_versions.PLAYERS)
 
     await db.commit()
     # Reload player with rating relationship to avoid lazy loading issues
@@ -204,7 +304,7 @@ async def update_player(
 async def soft_delete_player(
     player_id: int,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[models.User, Depends(get_current_admin_user)],
+    current_user: Annotated[Principal, Depends(get_current_admin_user)],
 ) -> schemas.PlayerRead:
     result = await db.execute(
         select(models.Player)
@@ -217,6 +317,7 @@ async def soft_delete_player(
 
     # Mark as deleted (soft delete)
     player.deleted_at = datetime.now(timezone.utc)
+    await resource_versions.bump(db, resource_versions.PLAYERS)
     await db.commit()
     # Reload player with rating relationship to avoid lazy loading issues
     result = await db.execute(
@@ -0,0 +1,139 @@
+"""API router for seasons and their standings."""
+from datetime import datetime
+from typing import Annotated, Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .. import models, schemas
+from ..auth.dependencies import get_current_admin_user
+from ..auth.principals import Principal
+from ..core.dates import as_utc
+from ..db import get_db
+from ..services import standings
+
+router = APIRouter(prefix="/seasons", tags=["seasons"])
+
+StandingsSort = Literal["points", "goals", "assists", "wins", "matches_played", "minutes_played"]
+
+
+@router.post("/", response_model=schemas.SeasonRead, status_code=status.HTTP_201_CREATED)
+@router.post("", response_model=schemas.SeasonRead, status_code=status.HTTP_201_CREATED, include_in_schema=False)
+async def create_season(
+    season_in: schemas.SeasonCreate,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    current_user: Annotated[Principal, Depends(get_current_admin_user)],
+) -> schemas.SeasonRead:
+    season = models.Season(name=season_in.name, starts_at=season_in.starts_at, ends_at=season_in.ends_at)
+    db.add(season)
+    await db.flush()
+    # Matches already played in the range count straight away.
+    await standings.rebuild(db, season.id)
+    await db.commit()
+    await db.refresh(season)
+    return season
+
+
+@router.get("/", response_model=list[schemas.SeasonRead])
+@router.get("", response_model=list[schemas.SeasonRead], include_in_schema=False)
+async def list_seasons(db: AsyncSession = Depends(get_db)) -> list[schemas.SeasonRead]:
+    result = await db.execute(select(models.Season).order_by(models.Season.starts_at.desc()))
+    return result.scalars().all()
+
+
+@router.get("/{season_id}", response_model=schemas.SeasonRead)
+async def get_season(season_id: int, db: AsyncSession = Depends(get_db)) -> schemas.SeasonRead:
+    season = await db.get(models.Season, season_id)
+    if not season:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Season not found")
+    return season
+
+
+@router.put("/{season_id}", response_model=schemas.SeasonRead)
+async def update_season(
+    season_id: int,
+    season_in: schemas.SeasonUpdate,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    current_user: Annotated[Principal, Depends(get_current_admin_user)],
+) -> schemas.SeasonRead:
+    season = await db.get(models.Season, season_id)
+    if not season:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Season not found")
+
+    updates = season_in.model_dump(exclude_unset=True)
+    for field, value in updates.items():
+        setattr(season, field, value)
+    if as_utc(season.ends_at) < as_utc(season.starts_at):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Season end must be after its start")
+
+    if "starts_at" in updates or "ends_at" in updates:
+        await db.flush()
+        await standings.rebuild(db, season.id)
+    await db.commit()
+    await db.refresh(season)
+    return season
+
+
+@router.delete("/{season_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_season(
+    season_id: int,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    current_user: Annotated[Principal, Depends(get_current_admin_user)],
+) -> None:
+    season = await db.get(models.Season, season_id)
+    if not season:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Season not found")
+
+    await db.execute(delete(models.SeasonStanding).where(models.SeasonStanding.season_id == season_id))
+    await db.execute(delete(models.Season).where(models.Season.id == season_id))
+    await db.commit()
+
+
+@router.get("/{season_id}/standings", response_model=list[schemas.SeasonStandingRead])
+async def get_season_standings(
+    season_id: int,
+    response: Response,
+    sort: StandingsSort = Query(default="points", description="Column to rank by (descending)"),
+    limit: int = Query(default=50, ge=1, le=500),
+    offset: int = Query(default=0, ge=0),
+    db: AsyncSession = Depends(get_db),
+) -> list[schemas.SeasonStandingRead]:
+    """Standings served from the aggregates; ties fall back to points, goals, then player id."""
+    season = await db.get(models.Season, season_id)
+    if not season:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Season not found")
+
+    standing = models.SeasonStanding
+    order_by = [getattr(standing, sort).desc()]
+    order_by += [column.desc() for column in (standing.points, standing.goals) if column.key != sort]
+    stmt = (
+        select(standing, models.Player.name)
+        .join(models.Player, models.Player.id == standing.player_id)
+        .where(standing.season_id == season_id)
+        .order_by(*order_by, standing.player_id)
+        .offset(offset)
+        .limit(limit)
+    )
+    result = await db.execute(stmt)
+    rows = result.all()
+
+    total = await db.scalar(select(func.count()).select_from(standing).where(standing.season_id == season_id))
+    response.headers["X-Total-Count"] = str(total)
+
+    return [
+        schemas.SeasonStandingRead(
+            rank=offset + index + 1,
+            player_id=row.player_id,
+            player_name=name,
+            matches_played=row.matches_played,
+            wins=row.wins,
+            draws=row.draws,
+            losses=row.losses,
+            points=row.points,
+            goals=row.goals,
+            assists=row.assists,
+            minutes_played=row.minutes_played,
+        )
+        for index, (row, name) in enumerate(rows)
+    ]
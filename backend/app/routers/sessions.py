@@ -1,26 +1,41 @@
 from datetime import datetime
 from typing import Annotated, Optional, List
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from sqlalchemy import delete, select
+from sqlalchemy import delete, select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from .. import models, schemas
 from ..auth.dependencies import get_current_admin_user
+from ..auth.principals import Principal
+from ..core import http_cache, pagination
+from ..core.config import settings
+from ..core.dates import as_utc
 from ..db import get_db
-from ..services import team_balance
+from ..services import (
+    analytics,
+    availability,
+    form,
+    match_stats,
+    session_counts,
+    session_events,
+    session_versions,
+    standings,
+    team_balance,
+)
+from .matches import _compose_session_match_response
 
 router = APIRouter(prefix="/sessions", tags=["sessions"])
 
-
 @router.post("/", response_model=schemas.SessionRead, status_code=status.HTTP_201_CREATED)
 @router.post("", response_model=schemas.SessionRead, status_code=status.HTTP_201_CREATED, include_in_schema=False)
 async def create_session(
     session_in: schemas.SessionCreate,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[models.User, Depends(get_current_admin_user)],
+    current_user: Annotated[Principal, Depends(get_current_admin_user)],
 ) -> schemas.SessionRead:
     session = models.Session(
         date=session_in.date,
@@ -31,28 +46,51 @@ async def create_session(
     db.add(session)
     await db.commit()
     await db.refresh(session)
+    session_counts.invalidate_session_counts()
     return session
 
 
 @router.get("/", response_model=list[schemas.SessionRead])
 @router.get("", response_model=list[schemas.SessionRead], include_in_schema=False)
 async def list_sessions(
+    response: Response,
     status_filter: Optional[models.SessionStatus] = Query(default=None, alias="status"),
     date_from: Optional[datetime] = None,
     date_to: Optional[datetime] = None,
+    after: Optional[str] = Query(
+        default=None, description="Opaque keyset cursor taken from the X-Next-Cursor header"
+    ),
+    limit: int = Query(default=settings.sessions_page_size, ge=1, le=settings.sessions_page_size_max),
+    include_total: bool = Query(default=False, description="Return the filtered total in X-Total-Count"),
     db: AsyncSession = Depends(get_db),
 ) -> list[schemas.SessionRead]:
-    stmt = select(models.Session)
-
+    """List sessions ordered by (date, id), one keyset page at a time."""
+    filters = []
     if status_filter:
-        stmt = stmt.where(models.Session.status == status_filter)
+        filters.append(models.Session.status == status_filter)
     if date_from:
-        stmt = stmt.where(models.Session.date >= date_from)
+        filters.append(models.Session.date >= date_from)
     if date_to:
-        stmt = stmt.where(models.Session.date <= date_to)
+        filters.append(models.Session.date <= date_to)
+
+    stmt = select(models.Session).where(*filters)
+    if after:
+        cursor_date, cursor_id = pagination.parse_cursor(after)
+        stmt = stmt.where(tuple_(models.Session.date, models.Session.id) > tuple_(cursor_date, cursor_id))
+    stmt = stmt.order_by(models.Session.date, models.Session.id).limit(limit + 1)
 
     result = await db.execute(stmt)
-    return result.scalars().all()
+    sessions = result.scalars().all()
+    if len(sessions) > limit:
+        sessions = sessions[:limit]
+        last = sessions[-1]
+        response.headers["X-Next-Cursor"] = pagination.encode_cursor(last.date, last.id)
+
+    if include_total:
+        total = await session_counts.count(db, (status_filter, date_from, date_to), filters)
+        response.headers["X-Total-Count"] = str(total)
+
+    return sessions
 
 
 @router.get("/{session_id}", response_model=schemas.SessionRead)
@@ -68,18 +106,50 @@ async def update_session(
     session_id: int,
     session_in: schemas.SessionUpdate,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[models.User, Depends(get_current_admin_user)],
+    current_user: Annotated[Principal, Depends(get_current_admin_user)],
 ) -> schemas.SessionRead:
     session = await db.get(models.Session, session_id)
     if not session:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
 
+    previous_date, previous_status = session.date, session.status
     updates = session_in.dict(exclude_unset=True)
+    if updates.get("date") is not None and session.template_id is not None:
+        # A template has at most one session per day.
+        clash = await db.scalar(
+            select(models.Session.id).where(
+                models.Session.template_id == session.template_id,
+                models.Session.session_day == as_utc(updates["date"]).date(),
+                models.Session.id != session_id,
+            )
+        )
+        if clash is not None:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Template already has a session on this date",
+            )
     for field, value in updates.items():
         setattr(session, field, value)
 
+    promoted: list[models.SessionPlayer] = []
+    if "max_players" in updates:
+        await db.flush()
+        promoted = await availability.promote_waitlist(db, session_id)
+    date_changed = "date" in updates and session.date != previous_date
+    if date_changed:
+        await db.flush()
+        await match_stats.set_played_at(db, session_id, session.date)
+    if date_changed or ("status" in updates and session.status != previous_status):
+        # The match may have moved between seasons, or started or stopped counting.
+        await db.flush()
+        player_ids = await standings.match_player_ids(db, session_id)
+        await standings.refresh(db, [previous_date, session.date], player_ids)
+
     await db.commit()
     await db.refresh(session)
+    session_counts.invalidate_session_counts()
+    if promoted:
+        _publish_availability(session_id, session.version, promoted)
     return session
 
 
@@ -87,16 +157,21 @@ async def update_session(
 async def delete_session(
     session_id: int,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[models.User, Depends(get_current_admin_user)],
+    current_user: Annotated[Principal, Depends(get_current_admin_user)],
 ) -> None:
     session = await db.get(models.Session, session_id)
     if not session:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
     
+    player_ids = await standings.match_player_ids(db, session_id)
     # Use delete statement for async SQLAlchemy
     stmt = delete(models.Session).where(models.Session.id == session_id)
     await db.execute(stmt)
+    await standings.refresh(db, [session.date], player_ids)
     await db.commit()
+    session_counts.invalidate_session_counts()
+    if player_ids:
+        analytics.pair_analytics.invalidate()
 
 
 class AvailabilityUpdate(BaseModel):
@@ -110,55 +185,73 @@ class AvailabilityBatch(BaseModel):
 
 
 @router.get("/{session_id}/availability", response_model=list[schemas.SessionPlayerRead])
-async def list_availability(session_id: int, db: AsyncSession = Depends(get_db)) -> list[schemas.SessionPlayerRead]:
-    session = await db.get(models.Session, session_id)
-    if not session:
+async def list_availability(
+    session_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+) -> list[schemas.SessionPlayerRead]:
+    version = await session_versions.current(db, session_id)
+    if version is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
 
+    etag = http_cache.make_etag("availability", session_id, version)
+    if http_cache.etag_matches(request, etag):
+        return http_cache.not_modified(etag)
+    response.headers.update(http_cache.cache_headers(etag))
+
     result = await db.execute(
         select(models.SessionPlayer).where(models.SessionPlayer.session_id == session_id)
     )
     return result.scalars().all()
 
 
+@router.get("/{session_id}/events")
+async def stream_session_events(
+    session_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+) -> StreamingResponse:
+    """Server-sent events for availability, team and match changes of a session."""
+    version = await session_versions.current(db, session_id)
+    if version is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
+    # Release the pooled connection; the stream can stay open for hours.
+    await db.close()
+
+    subscription = session_events.broker.subscribe(session_id)
+    heartbeat = settings.session_events_heartbeat_seconds
+    coalesce_window = settings.session_events_coalesce_ms / 1000
+
+    async def event_stream():
+        try:
+            yield session_events.SessionEvent(type="hello", session_id=session_id, version=version).encode()
+            while not await request.is_disconnected():
+                batch = await subscription.next_batch(heartbeat, coalesce_window)
+                if not batch:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield "".join(event.encode() for event in batch)
+        finally:
+            subscription.close()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.post("/{session_id}/availability", response_model=schemas.SessionPlayerRead)
 async def set_availability(
     session_id: int,
     payload: AvailabilityUpdate,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[models.User, Depends(get_current_admin_user)],
+    current_user: Annotated[Principal, Depends(get_current_admin_user)],
 ) -> schemas.SessionPlayerRead:
-    session = await db.get(models.Session, session_id)
-    if not session:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
-
-    player = await db.get(models.Player, payload.player_id)
-    if not player:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Player not found")
-
-    result = await db.execute(
-        select(models.SessionPlayer).where(
-            models.SessionPlayer.session_id == session_id,
-            models.SessionPlayer.player_id == payload.player_id,
-        )
-    )
-    session_player = result.scalars().first()
-
-    if session_player:
-        session_player.availability = payload.availability
-        session_player.is_goalkeeper = payload.is_goalkeeper
-    else:
-        session_player = models.SessionPlayer(
-            session_id=session_id,
-            player_id=payload.player_id,
-            availability=payload.availability,
-            is_goalkeeper=payload.is_goalkeeper,
-        )
-        db.add(session_player)
-
-    await db.commit()
-    await db.refresh(session_player)
-    return session_player
+    """Set a player's availability; a YES beyond max_players joins the waitlist."""
+    result = await _apply_availability(db, session_id, [payload])
+    return result.records[0]
 
 
 @router.post("/{session_id}/availability/batch", response_model=list[schemas.SessionPlayerRead])
@@ -166,44 +259,49 @@ async def set_availability_batch(
     session_id: int,
     payload: AvailabilityBatch,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[models.User, Depends(get_current_admin_user)],
+    current_user: Annotated[Principal, Depends(get_current_admin_user)],
 ) -> list[schemas.SessionPlayerRead]:
-    session = await db.get(models.Session, session_id)
-    if not session:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
+    result = await _apply_availability(db, session_id, payload.entries)
+    return result.records
 
-    existing_result = await db.execute(
-        select(models.SessionPlayer).where(models.SessionPlayer.session_id == session_id)
-    )
-    existing = {sp.player_id: sp for sp in existing_result.scalars().all()}
 
-    updated_records: list[models.SessionPlayer] = []
+async def _apply_availability(
+    db: AsyncSession,
+    session_id: int,
+    entries: list[AvailabilityUpdate],
+) -> availability.AvailabilityResult:
+    changes = [
+        availability.AvailabilityChange(
+            player_id=entry.player_id,
+            availability=entry.availability,
+            is_goalkeeper=entry.is_goalkeeper,
+        )
+        for entry in entries
+    ]
+    try:
+        result = await availability.apply_availability(db, session_id, changes)
+    except availability.UnknownPlayerError as exc:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(exc))
+    if result is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
+    await db.commit()
+    _publish_availability(session_id, result.version, [*result.records, *result.promoted])
+    return result
 
-    for entry in payload.entries:
-        player = await db.get(models.Player, entry.player_id)
-        if not player:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Player {entry.player_id} not found")
 
-        session_player = existing.get(entry.player_id)
-        if session_player:
-            session_player.availability = entry.availability
-            session_player.is_goalkeeper = entry.is_goalkeeper
-        else:
-            session_player = models.SessionPlayer(
+def _publish_availability(session_id: int, version: int | None, records) -> None:
+    session_events.broker.publish(
+        *(
+            session_events.SessionEvent(
+                type="availability",
                 session_id=session_id,
-                player_id=entry.player_id,
-                availability=entry.availability,
-                is_goalkeeper=entry.is_goalkeeper,
+                version=version,
+                data=schemas.SessionPlayerRead.model_validate(record).model_dump(mode="json"),
+                key=record.player_id,
             )
-            db.add(session_player)
-            existing[entry.player_id] = session_player
-
-        updated_records.append(session_player)
-
-    await db.commit()
-    for record in updated_records:
-        await db.refresh(record)
-    return updated_records
+            for record in records
+        )
+    )
 
 
 class BalancedPlayer(BaseModel):
@@ -230,7 +328,7 @@ async def update_player_team(
     session_id: int,
     payload: UpdatePlayerTeamRequest,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[models.User, Depends(get_current_admin_user)],
+    current_user: Annotated[Principal, Depends(get_current_admin_user)],
 ) -> None:
     """Update a player's team assignment. Only admin users can perform this action."""
     session = await db.get(models.Session, session_id)
@@ -251,14 +349,25 @@ async def update_player_team(
         )
 
     session_player.team = payload.team
+    version = await session_versions.bump(db, session_id)
     await db.commit()
+    session_events.broker.publish(
+        session_events.SessionEvent(
+            type="team",
+            session_id=session_id,
+            version=version,
+            data={"player_id": payload.player_id, "team": payload.team.value if payload.team else None},
+            key=payload.player_id,
+        )
+    )
 
 
 @router.post("/{session_id}/balanced-teams", response_model=BalancedTeamsResponse)
 async def generate_balanced_session_teams(
     session_id: int,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[models.User, Depends(get_current_admin_user)],
+    current_user: Annotated[Principal, Depends(get_current_admin_user)],
+    use_form: bool = Query(False, description="Adjust ratings by the rating change over recent matches"),
 ) -> BalancedTeamsResponse:
     session = await db.get(
         models.Session,
@@ -275,12 +384,19 @@ async def generate_balanced_session_teams(
         .where(
             models.SessionPlayer.session_id == session_id,
             models.SessionPlayer.availability == models.Availability.YES,
+            models.SessionPlayer.waitlist_position.is_(None),
         )
     )
     session_players = result.scalars().all()
 
     players = [sp.player for sp in session_players]
     ratings = {sp.player_id: (sp.player.rating.overall_rating if sp.player.rating else 1000.0) for sp in session_players}
+    if use_form:
+        forms = await form.player_form(
+            db, ratings, matches=settings.form_window_matches, days=settings.form_window_days
+        )
+        for pid, player_form in forms.items():
+            ratings[pid] += settings.form_rating_weight * player_form.last_matches.rating_delta
     goalkeeper_flags = {sp.player_id: sp.is_goalkeeper for sp in session_players}
 
     team_a_ids, team_b_ids, bench_ids = team_balance.generate_balanced_teams(
@@ -295,7 +411,16 @@ async def generate_balanced_session_teams(
     for pid in bench_ids:
         id_to_sp[pid].team = models.SessionTeam.BENCH
 
+    version = await session_versions.bump(db, session_id)
     await db.commit()
+    session_events.broker.publish(
+        session_events.SessionEvent(
+            type="teams",
+            session_id=session_id,
+            version=version,
+            data={"team_a": team_a_ids, "team_b": team_b_ids, "bench": bench_ids},
+        )
+    )
 
     def to_payload(ids: list[int]) -> list[BalancedPlayer]:
         return [
@@ -317,3 +442,101 @@ async def generate_balanced_session_teams(
         bench=to_payload(bench_ids),
         balance_score=abs(sum_a - sum_b),
     )
+
+
+DASHBOARD_SECTIONS = ("session", "availability", "players", "match", "teams")
+
+
+class SessionDashboard(BaseModel):
+    session: Optional[schemas.SessionRead] = None
+    availability: Optional[list[schemas.SessionPlayerRead]] = None
+    players: Optional[list[schemas.PlayerRead]] = None
+    match: Optional[schemas.SessionMatchRead] = None
+    teams: Optional[BalancedTeamsResponse] = None
+
+
+@router.get("/{session_id}/dashboard", response_model=SessionDashboard, response_model_exclude_unset=True)
+async def get_session_dashboard(
+    session_id: int,
+    fields: Optional[str] = Query(
+        default=None, description=f"Comma-separated subset of: {', '.join(DASHBOARD_SECTIONS)}"
+    ),
+    db: AsyncSession = Depends(get_db),
+) -> SessionDashboard:
+    """Everything the session page needs, from a fixed number of queries.
+
+    Only the requested sections are present in the response; a requested
+    match section is null when the session has no match yet.
+    """
+    sections = set(DASHBOARD_SECTIONS)
+    if fields:
+        sections = {name.strip() for name in fields.split(",") if name.strip()}
+        unknown = sections.difference(DASHBOARD_SECTIONS)
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown dashboard sections: {', '.join(sorted(unknown))}",
+            )
+
+    options = []
+    if sections & {"availability", "match", "teams"}:
+        options.append(
+            selectinload(models.Session.session_players)
+            .selectinload(models.SessionPlayer.player)
+            .selectinload(models.Player.rating)
+        )
+    if "match" in sections:
+        options.append(selectinload(models.Session.match).selectinload(models.Match.stats))
+
+    result = await db.execute(select(models.Session).options(*options).where(models.Session.id == session_id))
+    session = result.scalars().first()
+    if not session:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
+
+    dashboard = SessionDashboard()
+    if "session" in sections:
+        dashboard.session = schemas.SessionRead.model_validate(session, from_attributes=True)
+    if "availability" in sections:
+        dashboard.availability = [schemas.SessionPlayerRead.model_validate(sp) for sp in session.session_players]
+    if "players" in sections:
+        players_result = await db.execute(
+            select(models.Player)
+            .options(selectinload(models.Player.rating))
+            .where(models.Player.deleted_at.is_(None))
+        )
+        dashboard.players = [schemas.PlayerRead.model_validate(p) for p in players_result.scalars().all()]
+    if "match" in sections:
+        dashboard.match = (
+            _compose_session_match_response(
+                session.match, session_players=session.session_players, stats=list(session.match.stats)
+            )
+            if session.match
+            else None
+        )
+    if "teams" in sections:
+        dashboard.teams = _current_teams(session.session_players)
+    return dashboard
+
+
+def _current_teams(session_players: list[models.SessionPlayer]) -> BalancedTeamsResponse:
+    """Describe the saved team assignments in the balanced-teams response shape."""
+    groups: dict[models.SessionTeam, list[BalancedPlayer]] = {team: [] for team in models.SessionTeam}
+    for sp in session_players:
+        if sp.team is None:
+            continue
+        groups[sp.team].append(
+            BalancedPlayer(
+                player_id=sp.player_id,
+                name=sp.player.name,
+                rating=sp.player.rating.overall_rating if sp.player.rating else 1000.0,
+                is_goalkeeper=sp.is_goalkeeper,
+            )
+        )
+    sum_a = sum(p.rating for p in groups[models.SessionTeam.A])
+    sum_b = sum(p.rating for p in groups[models.SessionTeam.B])
+    return BalancedTeamsResponse(
+        team_a=groups[models.SessionTeam.A],
+        team_b=groups[models.SessionTeam.B],
+        bench=groups[models.SessionTeam.BENCH],
+        balance_score=abs(sum_a - sum_b),
+    )
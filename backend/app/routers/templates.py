@@ -1,5 +1,5 @@
 """API router for session templates."""
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Annotated, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
@@ -8,19 +8,33 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from .. import models, schemas
 from ..auth.dependencies import get_current_admin_user
+from ..auth.principals import Principal
+from ..core.dates import as_utc
 from ..db import get_db
-from ..services import template_service
+from ..services import recurrence, series, template_service
+from ..services.session_counts import invalidate_session_counts
 
 router = APIRouter(prefix="/session-templates", tags=["templates"])
 
 
+def _check_rule(rule_text: Optional[str]) -> None:
+    """Refuse a recurrence rule the engine cannot parse."""
+    if rule_text is None:
+        return
+    try:
+        recurrence.parse(rule_text)
+    except recurrence.RecurrenceError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+
+
 @router.post("/", response_model=schemas.SessionTemplateRead, status_code=status.HTTP_201_CREATED)
 @router.post("", response_model=schemas.SessionTemplateRead, status_code=status.HTTP_201_CREATED, include_in_schema=False)
 async def create_template(
     template_in: schemas.SessionTemplateCreate,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[models.User, Depends(get_current_admin_user)],
+    current_user: Annotated[Principal, Depends(get_current_admin_user)],
 ) -> schemas.SessionTemplateRead:
+    _check_rule(template_in.recurrence_rule)
     template = models.SessionTemplate(
         name=template_in.name,
         description=template_in.description,
@@ -31,6 +45,7 @@ async def create_template(
         recurrence_type=template_in.recurrence_type,
         recurrence_start=template_in.recurrence_start,
         recurrence_end=template_in.recurrence_end,
+        recurrence_rule=template_in.recurrence_rule,
     )
     db.add(template)
     await db.commit()
@@ -38,39 +53,33 @@ async def create_template(
     return template
 
 
+def _templates_with_count():
+    """Template columns plus their session count, in one LEFT JOIN ... GROUP BY.
+
+    Grouping by the primary key lets every template column be selected, and
+    the (template_id, session_day) index on sessions serves the join.
+    """
+    template = models.SessionTemplate
+    return (
+        select(*template.__table__.c, func.count(models.Session.id).label("session_count"))
+        .outerjoin(models.Session, models.Session.template_id == template.id)
+        .group_by(template.id)
+    )
+
+
 @router.get("/", response_model=list[schemas.SessionTemplateWithCount])
 @router.get("", response_model=list[schemas.SessionTemplateWithCount], include_in_schema=False)
 async def list_templates(
     active: Optional[bool] = Query(default=None, description="Filter by active status"),
     db: AsyncSession = Depends(get_db),
 ) -> list[schemas.SessionTemplateWithCount]:
-    stmt = select(models.SessionTemplate)
+    stmt = _templates_with_count()
     if active is not None:
         stmt = stmt.where(models.SessionTemplate.active == active)
     stmt = stmt.order_by(models.SessionTemplate.created_at.desc())
-    
+
     result = await db.execute(stmt)
-    templates = result.scalars().all()
-    
-    # Get session counts for each template
-    templates_with_count = []
-    for template in templates:
-        count_result = await db.execute(
-            select(func.count(models.Session.id)).where(
-                models.Session.template_id == template.id
-            )
-        )
-        session_count = count_result.scalar() or 0
-        
-        # Convert to schema with count
-        template_data = schemas.SessionTemplateRead.model_validate(template)
-        template_with_count = schemas.SessionTemplateWithCount(
-            **template_data.model_dump(),
-            session_count=session_count
-        )
-        templates_with_count.append(template_with_count)
-    
-    return templates_with_count
+    return [schemas.SessionTemplateWithCount.model_validate(row) for row in result.all()]
 
 
 @router.get("/{template_id}", response_model=schemas.SessionTemplateWithCount)
@@ -78,23 +87,11 @@ async def get_template(
     template_id: int,
     db: AsyncSession = Depends(get_db),
 ) -> schemas.SessionTemplateWithCount:
-    template = await db.get(models.SessionTemplate, template_id)
-    if not template:
+    result = await db.execute(_templates_with_count().where(models.SessionTemplate.id == template_id))
+    row = result.first()
+    if row is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Template not found")
-    
-    # Get session count
-    count_result = await db.execute(
-        select(func.count(models.Session.id)).where(
-            models.Session.template_id == template_id
-        )
-    )
-    session_count = count_result.scalar() or 0
-    
-    template_data = schemas.SessionTemplateRead.model_validate(template)
-    return schemas.SessionTemplateWithCount(
-        **template_data.model_dump(),
-        session_count=session_count
-    )
+    return schemas.SessionTemplateWithCount.model_validate(row)
 
 
 @router.put("/{template_id}", response_model=schemas.SessionTemplateRead)
@@ -102,13 +99,14 @@ async def update_template(
     template_id: int,
     template_in: schemas.SessionTemplateUpdate,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[models.User, Depends(get_current_admin_user)],
+    current_user: Annotated[Principal, Depends(get_current_admin_user)],
 ) -> schemas.SessionTemplateRead:
     template = await db.get(models.SessionTemplate, template_id)
     if not template:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Template not found")
     
     updates = template_in.model_dump(exclude_unset=True)
+    _check_rule(updates.get("recurrence_rule"))
     for field, value in updates.items():
         setattr(template, field, value)
     
@@ -121,7 +119,7 @@ async def update_template(
 async def delete_template(
     template_id: int,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[models.User, Depends(get_current_admin_user)],
+    current_user: Annotated[Principal, Depends(get_current_admin_user)],
 ) -> None:
     template = await db.get(models.SessionTemplate, template_id)
     if not template:
@@ -138,7 +136,7 @@ async def create_session_from_template(
     template_id: int,
     payload: schemas.CreateSessionFromTemplate,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[models.User, Depends(get_current_admin_user)],
+    current_user: Annotated[Principal, Depends(get_current_admin_user)],
 ) -> schemas.SessionRead:
     template = await db.get(models.SessionTemplate, template_id)
     if not template:
@@ -153,6 +151,11 @@ async def create_session_from_template(
     session = await template_service.TemplateService.create_session_from_template(
         template, payload.date, db, payload.max_players
     )
+    if session is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Template already has a session on this date",
+        )
     return session
 
 
@@ -161,7 +164,7 @@ async def create_sessions_from_template(
     template_id: int,
     payload: schemas.CreateSessionsFromTemplate,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[models.User, Depends(get_current_admin_user)],
+    current_user: Annotated[Principal, Depends(get_current_admin_user)],
 ) -> list[schemas.SessionRead]:
     template = await db.get(models.SessionTemplate, template_id)
     if not template:
@@ -173,33 +176,32 @@ async def create_sessions_from_template(
             detail="Cannot create sessions from inactive template"
         )
     
-    sessions = []
-    for date in payload.dates:
-        session = await template_service.TemplateService.create_session_from_template(
-            template, date, db, payload.max_players
-        )
-        sessions.append(session)
-    
-    return sessions
+    # Dates that already have a session from this template are skipped.
+    return await template_service.TemplateService.create_sessions_from_template(
+        template, payload.dates, db, payload.max_players
+    )
 
 
 @router.post("/{template_id}/generate-recurring", response_model=list[schemas.SessionRead])
 async def generate_recurring_sessions(
     template_id: int,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[models.User, Depends(get_current_admin_user)],
+    current_user: Annotated[Principal, Depends(get_current_admin_user)],
 ) -> list[schemas.SessionRead]:
     template = await db.get(models.SessionTemplate, template_id)
     if not template:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Template not found")
     
-    if not template.recurrence_type or template.recurrence_type == models.RecurrenceType.NONE:
+    if not template.recurrence_rule and (
+        not template.recurrence_type or template.recurrence_type == models.RecurrenceType.NONE
+    ):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Template does not have recurrence enabled"
         )
     
-    if not template.recurrence_start or not template.recurrence_end:
+    schedule = recurrence.template_schedule(template)
+    if schedule is None or (not template.recurrence_end and not schedule[0].bounded):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Template recurrence dates are not set"
@@ -208,3 +210,145 @@ async def generate_recurring_sessions(
     sessions = await template_service.TemplateService.generate_recurring_sessions(template, db)
     return sessions
 
+
+@router.get("/{template_id}/preview", response_model=list[schemas.RecurrencePreviewItem])
+async def preview_recurring_sessions(
+    template_id: int,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    rule: Optional[str] = Query(
+        default=None, max_length=2000, description="RRULE/EXDATE lines to preview instead of the template's"
+    ),
+    limit: int = Query(default=50, ge=1, le=template_service.MAX_RECURRING_SESSIONS),
+) -> list[schemas.RecurrencePreviewItem]:
+    """Dates the template would generate, and which already have a session. Writes nothing."""
+    template = await db.get(models.SessionTemplate, template_id)
+    if not template:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Template not found")
+
+    try:
+        dates = template_service.TemplateService.recurring_dates(template, limit=limit, rule_text=rule)
+    except recurrence.RecurrenceError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    if not dates:
+        return []
+
+    # A day counts as taken whatever the time of its session, as in generation.
+    existing_result = await db.execute(
+        select(models.Session.session_day).where(
+            models.Session.template_id == template_id,
+            models.Session.session_day >= as_utc(dates[0]).date(),
+            models.Session.session_day <= as_utc(dates[-1]).date(),
+        )
+    )
+    existing = set(existing_result.scalars().all())
+    return [
+        schemas.RecurrencePreviewItem(date=date, exists=as_utc(date).date() in existing) for date in dates
+    ]
+
+
+@router.get("/{template_id}/sessions", response_model=list[schemas.SessionRead])
+async def list_series_sessions(
+    template_id: int,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> list[schemas.SessionRead]:
+    """The sessions series operations would touch: planned, without a match, from now by default."""
+    await _get_template(db, template_id)
+    return await series.series_sessions(db, template_id, _series_start(start), end)
+
+
+@router.post("/{template_id}/sessions/cancel", response_model=schemas.SeriesOperationRead)
+async def cancel_series(
+    template_id: int,
+    payload: schemas.SeriesRange,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    current_user: Annotated[Principal, Depends(get_current_admin_user)],
+) -> schemas.SeriesOperationRead:
+    await _get_template(db, template_id)
+    sessions = await series.series_sessions(db, template_id, _series_start(payload.start), payload.end)
+    changes = await series.cancel(db, sessions, apply=not payload.preview)
+    if not payload.preview:
+        await db.commit()
+        invalidate_session_counts()
+    return _series_result(payload, changes)
+
+
+@router.post("/{template_id}/sessions/move-time", response_model=schemas.SeriesOperationRead)
+async def move_series_time(
+    template_id: int,
+    payload: schemas.SeriesMoveTime,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    current_user: Annotated[Principal, Depends(get_current_admin_user)],
+) -> schemas.SeriesOperationRead:
+    template = await _get_template(db, template_id)
+    sessions = await series.series_sessions(db, template_id, _series_start(payload.start), payload.end)
+    try:
+        changes = await series.move_time(db, template_id, sessions, payload.time_of_day, apply=not payload.preview)
+    except series.SeriesError as exc:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc))
+    if not payload.preview:
+        if payload.update_template:
+            template.time_of_day = payload.time_of_day
+        await db.commit()
+        invalidate_session_counts()
+    return _series_result(payload, changes)
+
+
+@router.post("/{template_id}/sessions/change-location", response_model=schemas.SeriesOperationRead)
+async def change_series_location(
+    template_id: int,
+    payload: schemas.SeriesChangeLocation,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    current_user: Annotated[Principal, Depends(get_current_admin_user)],
+) -> schemas.SeriesOperationRead:
+    template = await _get_template(db, template_id)
+    sessions = await series.series_sessions(db, template_id, _series_start(payload.start), payload.end)
+    changes = await series.change_location(db, sessions, payload.location, apply=not payload.preview)
+    if not payload.preview:
+        if payload.update_template:
+            template.location = payload.location
+        await db.commit()
+    return _series_result(payload, changes)
+
+
+@router.post("/{template_id}/sessions/clone", response_model=schemas.SeriesOperationRead)
+async def clone_series(
+    template_id: int,
+    payload: schemas.SeriesClone,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    current_user: Annotated[Principal, Depends(get_current_admin_user)],
+) -> schemas.SeriesOperationRead:
+    """Copy the template under a new name, with a planned copy of each session in the range."""
+    template = await _get_template(db, template_id)
+    sessions = await series.series_sessions(db, template_id, _series_start(payload.start), payload.end)
+    copy, changes = await series.clone(db, template, sessions, payload.name, apply=not payload.preview)
+    if copy is not None:
+        await db.commit()
+        await db.refresh(copy)
+        invalidate_session_counts()
+    return _series_result(payload, changes, copy)
+
+
+async def _get_template(db: AsyncSession, template_id: int) -> models.SessionTemplate:
+    template = await db.get(models.SessionTemplate, template_id)
+    if not template:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Template not found")
+    return template
+
+
+def _series_start(start: Optional[datetime]) -> datetime:
+    return as_utc(start) if start is not None else datetime.now(timezone.utc)
+
+
+def _series_result(
+    payload: schemas.SeriesRange,
+    changes: list[series.SeriesChange],
+    template: Optional[models.SessionTemplate] = None,
+) -> schemas.SeriesOperationRead:
+    return schemas.SeriesOperationRead(
+        applied=not payload.preview,
+        count=len(changes),
+        changes=[schemas.SeriesChangeRead.model_validate(change) for change in changes],
+        template=template,
+    )
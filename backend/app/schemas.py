@@ -58,10 +58,30 @@ class PlayerMatchHistoryItem(BaseModel):
     rating_after_match: Optional[int] = None
 
 
+class FormWindowRead(OrmBase):
+    """Results over one rolling window."""
+    matches: int
+    wins: int
+    draws: int
+    losses: int
+    goals: int
+    assists: int
+    rating_delta: float
+
+
+class PlayerFormRead(BaseModel):
+    """Recent form over the last ``window_matches`` matches and ``window_days`` days."""
+    window_matches: int
+    window_days: int
+    last_matches: FormWindowRead
+    last_days: FormWindowRead
+
+
 class PlayerProfileResponse(BaseModel):
     """Complete player profile with statistics."""
     player: PlayerRead
     stats_summary: PlayerStatsSummary
+    form: Optional[PlayerFormRead] = None
     match_history: list[PlayerMatchHistoryItem]
 
 
@@ -91,6 +111,11 @@ class SessionRead(BaseModel):
     location: str
     max_players: int
     status: SessionStatus
+    yes_count: int = 0
+    maybe_count: int = 0
+    no_count: int = 0
+    goalkeeper_count: int = 0
+    waitlist_count: int = 0
     created_at: datetime
     updated_at: datetime
 
@@ -102,6 +127,7 @@ class SessionPlayerRead(OrmBase):
     availability: Availability
     team: Optional[SessionTeam] = None
     is_goalkeeper: bool
+    waitlist_position: Optional[int] = None
 
 
 class SessionUpdate(BaseModel):
@@ -180,6 +206,75 @@ class SessionMatchRead(MatchWithStatsRead):
     bench_players: list[SessionPlayerRead]
 
 
+class MatchSummaryRead(BaseModel):
+    id: int
+    session_id: int
+    date: datetime
+    location: str
+    score_team_a: int
+    score_team_b: int
+    team_a_rating: Optional[float] = None
+    team_b_rating: Optional[float] = None
+    top_scorer_id: Optional[int] = None
+    top_scorer_name: Optional[str] = None
+    top_scorer_goals: int = 0
+
+
+class LiveStatRead(OrmBase):
+    player_id: int
+    team: MatchTeam
+    goals: int
+    assists: int
+
+
+class LiveMatchRead(BaseModel):
+    match_id: int
+    score_team_a: int
+    score_team_b: int
+    # Last event number in the match timeline.
+    seq: int
+    # True while taps are in the timeline but not yet in the score and stat lines.
+    pending: bool
+    stats: list[LiveStatRead]
+
+
+class PairRecordRead(OrmBase):
+    games: int
+    wins: int
+    draws: int
+    losses: int
+    goal_difference: int
+
+
+class PartnerRead(PairRecordRead):
+    player_id: int
+    name: str
+
+
+class HeadToHeadRead(BaseModel):
+    player_id: int
+    other_player_id: int
+    # Both records are from ``player_id``'s side.
+    together: PairRecordRead
+    against: PairRecordRead
+
+
+class MatchEventRead(OrmBase):
+    seq: int
+    kind: str
+    player_id: Optional[int] = None
+    team: Optional[MatchTeam] = None
+    minute: Optional[int] = None
+
+
+class MatchImportSummary(OrmBase):
+    matches_imported: int
+    stats_imported: int
+    players_created: int
+    skipped_existing: int
+    ratings_replayed: int
+
+
 class SessionTemplateCreate(BaseModel):
     name: str = Field(..., min_length=1, max_length=255, description="Template name")
     description: Optional[str] = Field(None, max_length=1000, description="Template description")
@@ -190,6 +285,9 @@ class SessionTemplateCreate(BaseModel):
     recurrence_type: Optional[RecurrenceType] = Field(None, description="Recurrence pattern")
     recurrence_start: Optional[datetime] = Field(None, description="Recurrence start date")
     recurrence_end: Optional[datetime] = Field(None, description="Recurrence end date")
+    recurrence_rule: Optional[str] = Field(
+        None, max_length=2000, description="RFC 5545 RRULE and EXDATE lines; overrides recurrence_type"
+    )
 
     @field_validator("location")
     @classmethod
@@ -198,6 +296,12 @@ class SessionTemplateCreate(BaseModel):
             raise ValueError("Location cannot be empty")
         return v.strip()
 
+    @field_validator("recurrence_rule")
+    @classmethod
+    def validate_recurrence_rule(cls, v: Optional[str]) -> Optional[str]:
+        # The rule itself is parsed by the templates router.
+        return v.strip() if v is not None and v.strip() else None
+
     @field_validator("recurrence_end")
     @classmethod
     def validate_recurrence_dates(cls, v: Optional[datetime], info) -> Optional[datetime]:
@@ -218,6 +322,7 @@ class SessionTemplateUpdate(BaseModel):
     recurrence_type: Optional[RecurrenceType] = None
     recurrence_start: Optional[datetime] = None
     recurrence_end: Optional[datetime] = None
+    recurrence_rule: Optional[str] = Field(None, max_length=2000)
 
     @field_validator("location")
     @classmethod
@@ -226,6 +331,12 @@ class SessionTemplateUpdate(BaseModel):
             raise ValueError("Location cannot be empty")
         return v.strip() if v else None
 
+    @field_validator("recurrence_rule")
+    @classmethod
+    def validate_recurrence_rule(cls, v: Optional[str]) -> Optional[str]:
+        # The rule itself is parsed by the templates router.
+        return v.strip() if v is not None and v.strip() else None
+
 
 class SessionTemplateRead(OrmBase):
     id: int
@@ -239,6 +350,7 @@ class SessionTemplateRead(OrmBase):
     recurrence_type: Optional[RecurrenceType]
     recurrence_start: Optional[datetime]
     recurrence_end: Optional[datetime]
+    recurrence_rule: Optional[str] = None
     last_generated: Optional[datetime]
     created_at: datetime
     updated_at: datetime
@@ -248,6 +360,30 @@ class SessionTemplateWithCount(SessionTemplateRead):
     session_count: int = 0
 
 
+class RecurrencePreviewItem(BaseModel):
+    date: datetime
+    # The template already has a session at this date.
+    exists: bool
+
+
+class SeriesChangeRead(OrmBase):
+    session_id: int
+    date: datetime
+    location: str
+    status: SessionStatus
+    new_date: Optional[datetime] = None
+    new_location: Optional[str] = None
+    new_status: Optional[SessionStatus] = None
+    conflict: bool = False
+
+
+class SeriesOperationRead(BaseModel):
+    applied: bool
+    count: int
+    changes: list[SeriesChangeRead]
+    template: Optional[SessionTemplateRead] = None
+
+
 class CreateSessionFromTemplate(BaseModel):
     date: datetime = Field(..., description="Session date and time")
     max_players: Optional[int] = Field(None, ge=2, le=30, description="Override template max_players")
@@ -258,5 +394,74 @@ class CreateSessionsFromTemplate(BaseModel):
     max_players: Optional[int] = Field(None, ge=2, le=30, description="Override template max_players")
 
 
+class SeriesRange(BaseModel):
+    start: Optional[datetime] = Field(None, description="First session date to include (default: now)")
+    end: Optional[datetime] = Field(None, description="Last session date to include (default: open-ended)")
+    preview: bool = Field(False, description="Return the planned changes without applying them")
+
+
+class SeriesMoveTime(SeriesRange):
+    time_of_day: time = Field(..., description="New time of day (UTC)")
+    update_template: bool = Field(True, description="Also move the template's own time of day")
+
+
+class SeriesChangeLocation(SeriesRange):
+    location: str = Field(..., min_length=1, max_length=255, description="New location")
+    update_template: bool = Field(True, description="Also change the template's own location")
+
+    @field_validator("location")
+    @classmethod
+    def validate_location(cls, v: str) -> str:
+        if not v.strip():
+            raise ValueError("Location cannot be empty")
+        return v.strip()
+
+
+class SeriesClone(SeriesRange):
+    name: str = Field(..., min_length=1, max_length=255, description="Name of the new template")
+
+
+class SeasonCreate(BaseModel):
+    name: str = Field(..., min_length=1, max_length=255, description="Season name")
+    starts_at: datetime = Field(..., description="First session date that counts (inclusive)")
+    ends_at: datetime = Field(..., description="Last session date that counts (inclusive)")
+
+    @field_validator("ends_at")
+    @classmethod
+    def validate_range(cls, v: datetime, info) -> datetime:
+        if "starts_at" in info.data and v < info.data["starts_at"]:
+            raise ValueError("Season end must be after its start")
+        return v
+
+
+class SeasonUpdate(BaseModel):
+    name: Optional[str] = Field(None, min_length=1, max_length=255)
+    starts_at: Optional[datetime] = None
+    ends_at: Optional[datetime] = None
+
+
+class SeasonRead(OrmBase):
+    id: int
+    name: str
+    starts_at: datetime
+    ends_at: datetime
+    created_at: datetime
+    updated_at: datetime
+
+
+class SeasonStandingRead(BaseModel):
+    rank: int
+    player_id: int
+    player_name: str
+    matches_played: int
+    wins: int
+    draws: int
+    losses: int
+    points: int
+    goals: int
+    assists: int
+    minutes_played: int
+
+
 # Forward refs
 PlayerRead.model_rebuild()
@@ -0,0 +1,173 @@
+"""Head-to-head and co-play analytics from a sparse pair matrix.
+
+``PairMatrix`` holds, for every pair of players who have shared a match, their
+record playing together and against each other (games, wins, draws, losses,
+goal difference). Both directions of every pair are stored, so a player's
+partners are one dict lookup and a head-to-head is two.
+
+The matrix is built from all stat lines in a single streamed pass and cached
+in the worker for ``pair_analytics_ttl_seconds``. ``complete_match``,
+``create_match`` and ``update_match`` apply their change to the cached matrix
+(the old lines of the match are taken out and the new ones added); other
+writes that change results call ``invalidate``. The TTL bounds drift from
+writes that do neither, such as periodic live-scoring flushes.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Iterable
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .. import models
+from ..core.config import settings
+
+BUILD_CHUNK_SIZE = 5000
+
+
+@dataclass
+class PairRecord:
+    """Record of the row player, either alongside or against the column player."""
+
+    games: int = 0
+    wins: int = 0
+    draws: int = 0
+    losses: int = 0
+    goal_difference: int = 0
+
+
+@dataclass(frozen=True)
+class MatchResult:
+    lines: tuple[tuple[int, models.MatchTeam], ...]
+    score_team_a: int
+    score_team_b: int
+
+    @classmethod
+    def of(cls, lines: Iterable, score_team_a: int, score_team_b: int) -> MatchResult:
+        """Build from objects with ``player_id`` and ``team`` (stat rows or inputs)."""
+        return cls(tuple((line.player_id, line.team) for line in lines), score_team_a, score_team_b)
+
+
+@dataclass
+class PairMatrix:
+    together: dict[int, dict[int, PairRecord]] = field(default_factory=dict)
+    against: dict[int, dict[int, PairRecord]] = field(default_factory=dict)
+
+    def add(self, result: MatchResult, sign: int = 1) -> None:
+        """Count a match (or, with ``sign=-1``, take it back out)."""
+        margin = {
+            models.MatchTeam.A: result.score_team_a - result.score_team_b,
+            models.MatchTeam.B: result.score_team_b - result.score_team_a,
+        }
+        for player_id, team in result.lines:
+            for other_id, other_team in result.lines:
+                if other_id == player_id:
+                    continue
+                matrix = self.together if other_team == team else self.against
+                row = matrix.setdefault(player_id, {})
+                record = row.get(other_id)
+                if record is None:
+                    record = row[other_id] = PairRecord()
+                _count(record, margin[team], sign)
+                if sign < 0 and record.games == 0:
+                    del row[other_id]
+                    if not row:
+                        del matrix[player_id]
+
+    def partners(self, player_id: int) -> dict[int, PairRecord]:
+        return self.together.get(player_id, {})
+
+    def opponents(self, player_id: int) -> dict[int, PairRecord]:
+        return self.against.get(player_id, {})
+
+    def head_to_head(self, player_id: int, other_id: int) -> tuple[PairRecord, PairRecord]:
+        """(record together, record against) from ``player_id``'s side."""
+        return (
+            self.together.get(player_id, {}).get(other_id) or PairRecord(),
+            self.against.get(player_id, {}).get(other_id) or PairRecord(),
+        )
+
+
+def _count(record: PairRecord, margin: int, sign: int) -> None:
+    record.games += sign
+    record.goal_difference += sign * margin
+    if margin > 0:
+        record.wins += sign
+    elif margin < 0:
+        record.losses += sign
+    else:
+        record.draws += sign
+
+
+async def build(db: AsyncSession) -> PairMatrix:
+    """Build the matrix from every stored stat line in one pass, match by match."""
+    matrix = PairMatrix()
+    result = await db.stream(
+        select(
+            models.PlayerStats.match_id,
+            models.PlayerStats.player_id,
+            models.PlayerStats.team,
+            models.Match.score_team_a,
+            models.Match.score_team_b,
+        )
+        .join(models.Match, models.Match.id == models.PlayerStats.match_id)
+        .order_by(models.PlayerStats.match_id)
+        .execution_options(yield_per=BUILD_CHUNK_SIZE)
+    )
+    current_id = None
+    lines: list[tuple[int, models.MatchTeam]] = []
+    score = (0, 0)
+    async for match_id, player_id, team, score_team_a, score_team_b in result:
+        if match_id != current_id:
+            if lines:
+                matrix.add(MatchResult(tuple(lines), *score))
+            current_id, lines, score = match_id, [], (score_team_a, score_team_b)
+        lines.append((player_id, team))
+    if lines:
+        matrix.add(MatchResult(tuple(lines), *score))
+    return matrix
+
+
+class PairAnalytics:
+    """The cached matrix of this worker."""
+
+    def __init__(self, ttl: float) -> None:
+        self.ttl = ttl
+        self._matrix: PairMatrix | None = None
+        self._expires_at = 0.0
+        # Bumped by every change; a build that raced with one is returned but not cached.
+        self._generation = 0
+        self._building = asyncio.Lock()
+
+    async def matrix(self, db: AsyncSession) -> PairMatrix:
+        if self._matrix is not None and self._expires_at > time.monotonic():
+            return self._matrix
+        async with self._building:
+            if self._matrix is not None and self._expires_at > time.monotonic():
+                return self._matrix
+            generation = self._generation
+            matrix = await build(db)
+            if generation == self._generation:
+                self._matrix = matrix
+                self._expires_at = time.monotonic() + self.ttl
+            return matrix
+
+    def apply(self, before: MatchResult | None, after: MatchResult | None) -> None:
+        """Replace a match's contribution once its write has committed."""
+        self._generation += 1
+        if self._matrix is None:
+            return
+        if before is not None:
+            self._matrix.add(before, sign=-1)
+        if after is not None:
+            self._matrix.add(after)
+
+    def invalidate(self) -> None:
+        self._generation += 1
+        self._matrix = None
+
+
+pair_analytics = PairAnalytics(settings.pair_analytics_ttl_seconds)
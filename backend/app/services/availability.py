@@ -0,0 +1,277 @@
+"""Availability writes with capacity enforcement and an ordered waitlist.
+
+Every write starts by bumping the session's version with an UPDATE, which
+takes the session row lock (the database write lock on SQLite) for the rest
+of the transaction. Concurrent sign-ups for the same session therefore
+serialize on that row, while ``sessions.yes_count`` keeps admission an O(1)
+check instead of a COUNT over the roster. Rows are written with
+INSERT ... ON CONFLICT, so racing first-time sign-ups never hit
+``uq_session_player``.
+
+A YES beyond ``max_players`` is stored with a ``waitlist_position`` taken from
+``sessions.waitlist_seq``; when a confirmed player drops out, the lowest
+positions are promoted in the same transaction, before any new YES in the
+same batch is admitted. The per-session counters in
+``COUNTERS`` are adjusted in the same pass, so listings can show sign-up
+numbers without touching session_players. Callers commit.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .. import models
+from ..db import dialect_insert
+
+
+# Denormalized per-session counters kept in step with session_players.
+COUNTERS = ("yes_count", "maybe_count", "no_count", "goalkeeper_count", "waitlist_count", "waitlist_seq")
+_COUNTER_COLUMNS = tuple(getattr(models.Session, name) for name in COUNTERS)
+
+
+class UnknownPlayerError(LookupError):
+    def __init__(self, player_id: int) -> None:
+        super().__init__(f"Player {player_id} not found")
+        self.player_id = player_id
+
+
+@dataclass
+class AvailabilityChange:
+    player_id: int
+    availability: models.Availability
+    is_goalkeeper: bool = False
+
+
+@dataclass
+class AvailabilityResult:
+    version: int
+    # Written rows, in request order (one per player).
+    records: list[models.SessionPlayer] = field(default_factory=list)
+    # Waitlisted players that were moved into the confirmed list.
+    promoted: list[models.SessionPlayer] = field(default_factory=list)
+
+
+async def apply_availability(
+    db: AsyncSession,
+    session_id: int,
+    changes: list[AvailabilityChange],
+) -> AvailabilityResult | None:
+    """Apply availability changes to a session.
+
+    Returns None if the session does not exist. Raises UnknownPlayerError if a
+    change references a missing player. Later changes for the same player win.
+    """
+    locked = await db.execute(
+        update(models.Session)
+        .where(models.Session.id == session_id)
+        .values(version=models.Session.version + 1)
+        .returning(models.Session.version, models.Session.max_players, *_COUNTER_COLUMNS)
+    )
+    row = locked.first()
+    if row is None:
+        return None
+    version, max_players = row[0], row[1]
+    start_counts = dict(zip(COUNTERS, row[2:]))
+    counts = dict(start_counts)
+
+    by_player = {change.player_id: change for change in changes}
+    if not by_player:
+        return AvailabilityResult(version=version)
+
+    players_result = await db.execute(select(models.Player.id).where(models.Player.id.in_(by_player)))
+    found_ids = set(players_result.scalars().all())
+    for player_id in by_player:
+        if player_id not in found_ids:
+            raise UnknownPlayerError(player_id)
+
+    existing_result = await db.execute(
+        select(
+            models.SessionPlayer.player_id,
+            models.SessionPlayer.availability,
+            models.SessionPlayer.waitlist_position,
+            models.SessionPlayer.is_goalkeeper,
+        ).where(
+            models.SessionPlayer.session_id == session_id,
+            models.SessionPlayer.player_id.in_(by_player),
+        )
+    )
+    existing = {player_id: rest for player_id, *rest in existing_result.all()}
+
+    # Dropouts and unchanged places are written first and the freed places go to
+    # the existing waitlist; new YES rows are admitted after it, in request order.
+    rows = []
+    joining = []
+    freed = False
+    for change in by_player.values():
+        previous, old_position, was_goalkeeper = existing.get(change.player_id, (None, None, False))
+        if change.availability == models.Availability.YES and previous != models.Availability.YES:
+            joining.append(change)
+            continue
+        position = None
+        if change.availability == models.Availability.YES:
+            # Already confirmed or waitlisted: keep the place.
+            position = old_position
+        elif previous == models.Availability.YES and old_position is None:
+            freed = True
+        _count(counts, previous, old_position, was_goalkeeper, -1)
+        _count(counts, change.availability, position, change.is_goalkeeper, +1)
+        rows.append(_row(session_id, change, position))
+    records = await _upsert(db, rows)
+
+    promoted: list[models.SessionPlayer] = []
+    if freed and counts["yes_count"] < max_players:
+        promoted = await _promote(db, session_id, max_players - counts["yes_count"], counts)
+
+    rows = []
+    for change in joining:
+        previous, old_position, was_goalkeeper = existing.get(change.player_id, (None, None, False))
+        position = None
+        if counts["yes_count"] >= max_players:
+            counts["waitlist_seq"] += 1
+            position = counts["waitlist_seq"]
+        _count(counts, previous, old_position, was_goalkeeper, -1)
+        _count(counts, change.availability, position, change.is_goalkeeper, +1)
+        rows.append(_row(session_id, change, position))
+    records.update(await _upsert(db, rows))
+
+    if counts != start_counts:
+        await db.execute(update(models.Session).where(models.Session.id == session_id).values(**counts))
+
+    return AvailabilityResult(
+        version=version,
+        records=[records[player_id] for player_id in by_player],
+        promoted=promoted,
+    )
+
+
+async def promote_waitlist(db: AsyncSession, session_id: int) -> list[models.SessionPlayer]:
+    """Fill free places (e.g. after max_players was raised) from the waitlist."""
+    locked = await db.execute(
+        update(models.Session)
+        .where(models.Session.id == session_id)
+        .values(version=models.Session.version + 1)
+        .returning(models.Session.max_players, *_COUNTER_COLUMNS)
+    )
+    row = locked.first()
+    if row is None:
+        return []
+    max_players = row[0]
+    counts = dict(zip(COUNTERS, row[1:]))
+    if counts["yes_count"] >= max_players:
+        return []
+    promoted = await _promote(db, session_id, max_players - counts["yes_count"], counts)
+    if promoted:
+        await db.execute(update(models.Session).where(models.Session.id == session_id).values(**counts))
+    return promoted
+
+
+async def rebuild_counters(db: AsyncSession, session_ids: list[int] | None = None) -> int:
+    """Recompute the denormalized counters from session_players in one UPDATE.
+
+    Repairs drift after manual edits or imports. Returns the number of sessions updated.
+    """
+    sp = models.SessionPlayer
+
+    def count_where(*criteria):
+        return (
+            select(func.count(sp.id))
+            .where(sp.session_id == models.Session.id, *criteria)
+            .scalar_subquery()
+        )
+
+    confirmed = (sp.availability == models.Availability.YES, sp.waitlist_position.is_(None))
+    stmt = update(models.Session).values(
+        yes_count=count_where(*confirmed),
+        maybe_count=count_where(sp.availability == models.Availability.MAYBE),
+        no_count=count_where(sp.availability == models.Availability.NO),
+        goalkeeper_count=count_where(*confirmed, sp.is_goalkeeper.is_(True)),
+        waitlist_count=count_where(sp.waitlist_position.is_not(None)),
+        waitlist_seq=func.coalesce(
+            select(func.max(sp.waitlist_position)).where(sp.session_id == models.Session.id).scalar_subquery(),
+            models.Session.waitlist_seq,
+        ),
+    )
+    if session_ids is not None:
+        stmt = stmt.where(models.Session.id.in_(session_ids))
+    result = await db.execute(stmt, execution_options={"synchronize_session": False})
+    return result.rowcount
+
+
+def _row(session_id: int, change: AvailabilityChange, waitlist_position: int | None) -> dict:
+    return {
+        "session_id": session_id,
+        "player_id": change.player_id,
+        "availability": change.availability,
+        "is_goalkeeper": change.is_goalkeeper,
+        "waitlist_position": waitlist_position,
+    }
+
+
+async def _upsert(db: AsyncSession, rows: list[dict]) -> dict[int, models.SessionPlayer]:
+    """Insert or overwrite roster rows, returning them by player id."""
+    if not rows:
+        return {}
+    stmt = dialect_insert(db, models.SessionPlayer).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[models.SessionPlayer.session_id, models.SessionPlayer.player_id],
+        set_={
+            "availability": stmt.excluded.availability,
+            "is_goalkeeper": stmt.excluded.is_goalkeeper,
+            "waitlist_position": stmt.excluded.waitlist_position,
+        },
+    ).returning(models.SessionPlayer)
+    written = await db.scalars(stmt, execution_options={"populate_existing": True})
+    return {record.player_id: record for record in written.all()}
+
+
+def _count(
+    counts: dict[str, int],
+    availability: models.Availability | None,
+    waitlist_position: int | None,
+    is_goalkeeper: bool,
+    sign: int,
+) -> None:
+    """Add (sign=+1) or remove (sign=-1) one roster row's contribution to the counters."""
+    if availability is None:
+        return
+    if availability == models.Availability.YES:
+        if waitlist_position is not None:
+            counts["waitlist_count"] += sign
+            return
+        counts["yes_count"] += sign
+        if is_goalkeeper:
+            counts["goalkeeper_count"] += sign
+    elif availability == models.Availability.MAYBE:
+        counts["maybe_count"] += sign
+    else:
+        counts["no_count"] += sign
+
+
+async def _promote(
+    db: AsyncSession,
+    session_id: int,
+    places: int,
+    counts: dict[str, int],
+) -> list[models.SessionPlayer]:
+    result = await db.execute(
+        select(models.SessionPlayer)
+        .where(
+            models.SessionPlayer.session_id == session_id,
+            models.SessionPlayer.waitlist_position.is_not(None),
+        )
+        .order_by(models.SessionPlayer.waitlist_position)
+        .limit(places)
+    )
+    promoted = list(result.scalars().all())
+    if promoted:
+        for sp in promoted:
+            _count(counts, sp.availability, sp.waitlist_position, sp.is_goalkeeper, -1)
+            _count(counts, sp.availability, None, sp.is_goalkeeper, +1)
+        await db.execute(
+            update(models.SessionPlayer)
+            .where(models.SessionPlayer.id.in_([sp.id for sp in promoted]))
+            .values(waitlist_position=None)
+        )
+    return promoted
@@ -0,0 +1,108 @@
+"""Rolling form: a player's recent results over the last N matches and N days.
+
+Both windows come from one query that only reads the lines in them. Stat
+lines carry their session date (``played_at``), and ``(player_id,
+played_at)`` is indexed, so each player's last N matches are a short
+backwards range scan (``ORDER BY played_at DESC LIMIT N``, one per player,
+joined with UNION ALL) and the last N days are a range scan from the cut-off.
+Older history is never read. The windows are summed here; a line in both
+comes back twice and counts once per window.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Iterable
+
+from sqlalchemy import and_, case, func, literal, or_, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .. import models
+
+
+@dataclass
+class FormWindow:
+    matches: int = 0
+    wins: int = 0
+    draws: int = 0
+    losses: int = 0
+    goals: int = 0
+    assists: int = 0
+    rating_delta: float = 0.0
+
+
+@dataclass
+class PlayerForm:
+    last_matches: FormWindow = field(default_factory=FormWindow)
+    last_days: FormWindow = field(default_factory=FormWindow)
+
+
+async def player_form(
+    db: AsyncSession,
+    player_ids: Iterable[int],
+    matches: int,
+    days: int,
+    now: datetime | None = None,
+) -> dict[int, PlayerForm]:
+    """Form of each player over their last ``matches`` matches and the last ``days`` days."""
+    player_ids = set(player_ids)
+    if not player_ids:
+        return {}
+    since = (now or datetime.now(timezone.utc)) - timedelta(days=days)
+    stats, match = models.PlayerStats, models.Match
+
+    won = or_(
+        and_(stats.team == models.MatchTeam.A, match.score_team_a > match.score_team_b),
+        and_(stats.team == models.MatchTeam.B, match.score_team_b > match.score_team_a),
+    )
+
+    def lines(in_last_matches: int):
+        return select(
+            stats.id,
+            stats.player_id,
+            stats.goals,
+            stats.assists,
+            func.coalesce(stats.rating_delta, 0.0).label("rating_delta"),
+            case((won, 1), (match.score_team_a == match.score_team_b, 0), else_=-1).label("result"),
+            literal(in_last_matches).label("in_last_matches"),
+            case((stats.played_at >= since, 1), else_=0).label("in_last_days"),
+        ).join(match, match.id == stats.match_id)
+
+    last_matches = [
+        select(
+            lines(1)
+            .where(stats.player_id == player_id, stats.played_at.is_not(None))
+            .order_by(stats.played_at.desc(), stats.id.desc())
+            .limit(matches)
+            .subquery()
+        )
+        for player_id in sorted(player_ids)
+    ]
+    last_days = lines(0).where(stats.player_id.in_(player_ids), stats.played_at >= since)
+    result = await db.execute(union_all(*last_matches, last_days))
+
+    rows = {}
+    in_last_matches = set()
+    for row in result.all():
+        rows[row.id] = row
+        if row.in_last_matches:
+            in_last_matches.add(row.id)
+
+    forms = {player_id: PlayerForm() for player_id in player_ids}
+    for line_id in sorted(rows):
+        row = rows[line_id]
+        if line_id in in_last_matches:
+            _add(forms[row.player_id].last_matches, row)
+        if row.in_last_days:
+            _add(forms[row.player_id].last_days, row)
+    return forms
+
+
+def _add(window: FormWindow, row) -> None:
+    window.matches += 1
+    window.wins += row.result == 1
+    window.draws += row.result == 0
+    window.losses += row.result == -1
+    window.goals += row.goals
+    window.assists += row.assists
+    window.rating_delta += float(row.rating_delta)
@@ -0,0 +1,57 @@
+"""Database leases for background jobs that must run on one replica only.
+
+A lease row names its holder and an expiry. ``acquire`` takes a free or
+expired lease, or extends one the caller already holds, with a single
+conditional UPDATE (or an INSERT for a lease that does not exist yet), so
+two replicas can never both succeed. Holders renew well before the expiry;
+if a replica dies, another takes over once the lease runs out.
+"""
+from __future__ import annotations
+
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import or_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .. import models
+from ..db import dialect_insert
+
+
+def holder_id() -> str:
+    """Identify this process among the replicas."""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+async def acquire(db: AsyncSession, name: str, holder: str, ttl: timedelta) -> bool:
+    """Take or renew the lease ``name`` for ``ttl``; commits. Returns whether ``holder`` has it."""
+    now = datetime.now(timezone.utc)
+    lease = models.SchedulerLease
+    result = await db.execute(
+        update(lease)
+        .where(lease.name == name, or_(lease.holder == holder, lease.expires_at < now))
+        .values(holder=holder, expires_at=now + ttl)
+    )
+    acquired = result.rowcount > 0
+    if not acquired:
+        result = await db.execute(
+            dialect_insert(db, lease)
+            .values(name=name, holder=holder, expires_at=now + ttl)
+            .on_conflict_do_nothing(index_elements=[lease.name])
+        )
+        acquired = result.rowcount > 0
+    await db.commit()
+    return acquired
+
+
+async def release(db: AsyncSession, name: str, holder: str) -> None:
+    """Give the lease up early (on shutdown) so another replica can take over; commits."""
+    lease = models.SchedulerLease
+    await db.execute(
+        update(lease)
+        .where(lease.name == name, lease.holder == holder)
+        .values(expires_at=datetime.now(timezone.utc))
+    )
+    await db.commit()
@@ -0,0 +1,419 @@
+"""Write-behind live scoring.
+
+Goal and assist taps are applied to an in-memory ``LiveMatch`` and appended to
+the match's ``match_events`` timeline (a taken-back tap is a GOAL_UNDONE or
+ASSIST_UNDONE event); a tap is acknowledged once that insert commits. The
+score and stat lines are written later: a background flusher writes every
+match with pending changes every ``live_scoring_flush_seconds``, together with
+``matches.live_seq``, the last event those rows include. ``finish`` writes the
+final state and then applies ratings and standings, like ``complete_match``.
+``finish`` sets ``matches.live_finished_at`` in the same transaction, so a
+retried finish returns the finished state without rating the match twice, and
+later taps are rejected.
+
+The stored rows plus the events after ``live_seq`` are always the live state,
+so nothing is lost with the worker: loading a match replays those events, and
+on startup ``recover`` loads every match that has some. State lives in the
+worker process, so live scoring for a match must be served by a single worker
+(as with the session event stream).
+
+A match is live from its first tap until it is finished (``is_live``).
+Meanwhile the flusher owns its score and stat lines, so other writers
+(updating, completing or rebuilding the match, appending to its timeline)
+are refused, and after writing a match that is not live they call
+``discard`` to drop any state loaded before their write.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Callable, Iterable
+
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .. import models
+from ..core.config import settings
+from ..db import SessionLocal
+from . import match_events, match_stats, ratings, session_events, session_versions, standings
+
+logger = logging.getLogger("calcio.live_scoring")
+
+Kind = models.MatchEventKind
+
+TAP_KINDS = {
+    ("goal", 1): Kind.GOAL,
+    ("goal", -1): Kind.GOAL_UNDONE,
+    ("assist", 1): Kind.ASSIST,
+    ("assist", -1): Kind.ASSIST_UNDONE,
+}
+
+
+class LiveScoringError(ValueError):
+    pass
+
+
+def is_live(match: models.Match) -> bool:
+    """Whether live scoring owns the match's score and stat lines: tapped and not yet finished."""
+    return match.live_seq is not None and match.live_finished_at is None
+
+
+@dataclass
+class LiveEvent:
+    type: str
+    player_id: int
+    delta: int = 1
+
+
+@dataclass
+class LiveLine:
+    stat_id: int
+    player_id: int
+    team: models.MatchTeam
+    goals: int
+    assists: int
+
+
+@dataclass
+class LiveMatch:
+    match_id: int
+    session_id: int
+    session_date: datetime
+    score_team_a: int
+    score_team_b: int
+    lines: dict[int, LiveLine]
+    # Last event of the match timeline included in this state.
+    seq: int = 0
+    # matches.live_seq: the last event included in the stored rows; None until the first tap.
+    flushed_seq: int | None = None
+    finished: bool = False
+    # Players (and the score) changed since the last flush.
+    dirty: set[int] = field(default_factory=set)
+    score_dirty: bool = False
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock, repr=False)
+
+    @property
+    def pending(self) -> bool:
+        return bool(self.dirty) or self.score_dirty
+
+    def plan(self, events: Iterable[LiveEvent]) -> list[dict]:
+        """Check events all-or-nothing; returns the match_events rows to append, leaving the state alone."""
+        goals = {pid: line.goals for pid, line in self.lines.items()}
+        assists = {pid: line.assists for pid, line in self.lines.items()}
+        score = {models.MatchTeam.A: self.score_team_a, models.MatchTeam.B: self.score_team_b}
+        rows = []
+        for offset, event in enumerate(events, start=1):
+            line = self.lines.get(event.player_id)
+            if line is None:
+                raise LiveScoringError(f"Player {event.player_id} has no stat line in this match")
+            kind = TAP_KINDS.get((event.type, event.delta))
+            if kind is None:
+                raise LiveScoringError(f"Invalid {event.type} tap of {event.delta}")
+            if event.type == "goal":
+                goals[line.player_id] += event.delta
+                score[line.team] += event.delta
+            else:
+                assists[line.player_id] += event.delta
+            if goals[line.player_id] < 0 or assists[line.player_id] < 0 or score[line.team] < 0:
+                raise LiveScoringError(f"Player {event.player_id} has no {event.type} left to take back")
+            rows.append(
+                {
+                    "match_id": self.match_id,
+                    "seq": self.seq + offset,
+                    "kind": int(kind),
+                    "player_id": line.player_id,
+                    "team": match_events.TEAM_CODES[line.team],
+                    "minute": None,
+                }
+            )
+        return rows
+
+    def replay(self, seq: int, kind: int, player_id: int | None) -> None:
+        """Apply one stored timeline event; events other than taps only move ``seq``."""
+        line = self.lines.get(player_id) if player_id is not None else None
+        if line is not None and kind in (Kind.GOAL, Kind.GOAL_UNDONE, Kind.ASSIST, Kind.ASSIST_UNDONE):
+            step = 1 if kind in (Kind.GOAL, Kind.ASSIST) else -1
+            if kind in (Kind.GOAL, Kind.GOAL_UNDONE):
+                line.goals += step
+                if line.team == models.MatchTeam.A:
+                    self.score_team_a += step
+                else:
+                    self.score_team_b += step
+                self.score_dirty = True
+            else:
+                line.assists += step
+            self.dirty.add(line.player_id)
+        self.seq = max(self.seq, seq)
+
+
+class LiveScoring:
+    def __init__(
+        self,
+        flush_interval: float,
+        session_factory: Callable[[], AsyncSession] | None = None,
+    ) -> None:
+        self.flush_interval = flush_interval
+        self.session_factory = session_factory or SessionLocal
+        self._matches: dict[int, LiveMatch] = {}
+        self._loading = asyncio.Lock()
+        self._flusher: asyncio.Task | None = None
+
+    def get(self, match_id: int) -> LiveMatch | None:
+        return self._matches.get(match_id)
+
+    def discard(self, match_id: int) -> None:
+        """Forget a match that is not live, after it was written elsewhere; the next tap reloads it."""
+        self._matches.pop(match_id, None)
+
+    async def apply(self, db: AsyncSession, match_id: int, events: list[LiveEvent]) -> LiveMatch | None:
+        """Append events to the match timeline and apply them. Returns None if the match does not exist."""
+        live = await self._load(db, match_id)
+        if live is None:
+            return None
+        async with live.lock:
+            if live.finished:
+                raise LiveScoringError("Match is already finished")
+            rows = live.plan(events)
+            if live.flushed_seq is None:
+                # The first tap makes the match live; its stored rows include every earlier event.
+                await db.execute(
+                    update(models.Match).where(models.Match.id == match_id).values(live_seq=live.seq)
+                )
+            await db.execute(insert(models.MatchEvent), rows)
+            await db.commit()
+            if live.flushed_seq is None:
+                live.flushed_seq = live.seq
+            for row in rows:
+                live.replay(row["seq"], row["kind"], row["player_id"])
+        return live
+
+    async def flush(self, match_id: int | None = None) -> int:
+        """Write pending changes of one or all live matches, each in its own transaction."""
+        if match_id is None:
+            targets = list(self._matches.values())
+        else:
+            targets = [self._matches[match_id]] if match_id in self._matches else []
+        flushed = 0
+        for live in targets:
+            async with live.lock:
+                if not live.pending or live.finished:
+                    continue
+                async with self.session_factory() as db:
+                    version = await self._write(db, live, live.dirty, (live.score_team_a, live.score_team_b))
+                    await db.commit()
+                live.flushed_seq = live.seq
+                live.dirty.clear()
+                live.score_dirty = False
+            _publish(live, version)
+            flushed += 1
+        return flushed
+
+    async def finish(self, db: AsyncSession, match_id: int) -> LiveMatch | None:
+        """Write the final state and apply ratings and standings.
+
+        Finishing a finished match changes nothing and returns its state. A
+        match that was never tapped is not live, so finishing it raises
+        LiveScoringError: it is rated when completed instead.
+        """
+        live = await self._load(db, match_id)
+        if live is None:
+            return None
+        async with live.lock:
+            if live.finished:
+                return live
+            # Claim the finish first: a concurrent finish waits on the row and then matches nothing.
+            claimed = await db.execute(
+                update(models.Match)
+                .where(
+                    models.Match.id == match_id,
+                    models.Match.live_seq.is_not(None),
+                    models.Match.live_finished_at.is_(None),
+                )
+                .values(live_finished_at=datetime.now(timezone.utc))
+            )
+            if claimed.rowcount == 0:
+                await db.rollback()
+                self._matches.pop(match_id, None)
+                current = await self._load(db, match_id)
+                if current is not None and not current.finished:
+                    raise LiveScoringError("Match is not being scored live")
+                live.finished = True
+                return current
+            version = await self._write(db, live, set(live.lines), (live.score_team_a, live.score_team_b))
+            await db.execute(
+                update(models.Session)
+                .where(models.Session.id == live.session_id)
+                .values(status=models.SessionStatus.COMPLETED)
+            )
+            match = await db.get(models.Match, match_id, populate_existing=True)
+            stats_result = await db.execute(
+                select(models.PlayerStats)
+                .where(models.PlayerStats.match_id == match_id)
+                .execution_options(populate_existing=True)
+            )
+            stats = list(stats_result.scalars().all())
+            await ratings.update_ratings_after_match(db, match, stats)
+            await standings.refresh(db, [live.session_date], live.lines)
+            await db.commit()
+            self._matches.pop(match_id, None)
+            live.finished = True
+            live.flushed_seq = live.seq
+            live.dirty.clear()
+            live.score_dirty = False
+        _publish(live, version)
+        return live
+
+    async def recover(self) -> int:
+        """Load the matches with taps not yet in their stored rows; the flusher then writes them."""
+        async with self.session_factory() as db:
+            unflushed = (
+                select(models.MatchEvent.id)
+                .where(models.MatchEvent.match_id == models.Match.id, models.MatchEvent.seq > models.Match.live_seq)
+                .exists()
+            )
+            result = await db.execute(
+                select(models.Match.id).where(
+                    models.Match.live_seq.is_not(None), models.Match.live_finished_at.is_(None), unflushed
+                )
+            )
+            match_ids = result.scalars().all()
+            for match_id in match_ids:
+                await self._load(db, match_id)
+        return len(match_ids)
+
+    def start(self) -> None:
+        if self._flusher is None:
+            self._flusher = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        await self.flush()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception:
+                # Pending changes stay dirty (and in the timeline); retry next round.
+                logger.exception("Live scoring flush failed")
+
+    async def _load(self, db: AsyncSession, match_id: int) -> LiveMatch | None:
+        live = self._matches.get(match_id)
+        if live is not None:
+            return live
+        async with self._loading:
+            live = self._matches.get(match_id)
+            if live is not None:
+                return live
+            last_seq = (
+                select(func.coalesce(func.max(models.MatchEvent.seq), 0))
+                .where(models.MatchEvent.match_id == models.Match.id)
+                .scalar_subquery()
+            )
+            result = await db.execute(
+                select(
+                    models.Match.session_id,
+                    models.Session.date,
+                    models.Match.score_team_a,
+                    models.Match.score_team_b,
+                    models.Match.live_seq,
+                    models.Match.live_finished_at,
+                    last_seq.label("last_seq"),
+                )
+                .join(models.Session, models.Session.id == models.Match.session_id)
+                .where(models.Match.id == match_id)
+            )
+            row = result.first()
+            if row is None:
+                return None
+            lines_result = await db.execute(
+                select(
+                    models.PlayerStats.id,
+                    models.PlayerStats.player_id,
+                    models.PlayerStats.team,
+                    models.PlayerStats.goals,
+                    models.PlayerStats.assists,
+                ).where(models.PlayerStats.match_id == match_id)
+            )
+            lines = {line[1]: LiveLine(*line) for line in lines_result.all()}
+            live = LiveMatch(
+                match_id,
+                row.session_id,
+                row.date,
+                row.score_team_a,
+                row.score_team_b,
+                lines,
+                seq=row.last_seq,
+                flushed_seq=row.live_seq,
+            )
+            if row.live_finished_at is not None:
+                # Not cached: nothing may change a finished match through live scoring.
+                live.finished = True
+                return live
+            if row.live_seq is not None and row.last_seq > row.live_seq:
+                # Taps acknowledged before a restart but never flushed.
+                events = await db.execute(
+                    select(models.MatchEvent.seq, models.MatchEvent.kind, models.MatchEvent.player_id)
+                    .where(models.MatchEvent.match_id == match_id, models.MatchEvent.seq > row.live_seq)
+                    .order_by(models.MatchEvent.seq)
+                )
+                for seq, kind, player_id in events.all():
+                    live.replay(seq, kind, player_id)
+            self._matches[match_id] = live
+            return live
+
+    async def _write(
+        self,
+        db: AsyncSession,
+        live: LiveMatch,
+        player_ids: set[int],
+        score: tuple[int, int],
+    ) -> int | None:
+        if player_ids:
+            await db.execute(
+                update(models.PlayerStats),
+                [
+                    {"id": line.stat_id, "goals": line.goals, "assists": line.assists}
+                    for line in (live.lines[pid] for pid in player_ids)
+                ],
+            )
+        top_scorer_id, top_scorer_goals = match_stats.top_scorer(live.lines.values())
+        await db.execute(
+            update(models.Match)
+            .where(models.Match.id == live.match_id)
+            .values(
+                score_team_a=score[0],
+                score_team_b=score[1],
+                top_scorer_id=top_scorer_id,
+                top_scorer_goals=top_scorer_goals,
+                live_seq=live.seq,
+            )
+        )
+        return await session_versions.bump(db, live.session_id)
+
+
+def _publish(live: LiveMatch, version: int | None) -> None:
+    session_events.broker.publish(
+        session_events.SessionEvent(
+            type="match",
+            session_id=live.session_id,
+            version=version,
+            data={
+                "match_id": live.match_id,
+                "score_team_a": live.score_team_a,
+                "score_team_b": live.score_team_b,
+            },
+        )
+    )
+
+
+live_scoring = LiveScoring(settings.live_scoring_flush_seconds)
@@ -0,0 +1,262 @@
+"""Append-only match event log and the projector that derives stats from it.
+
+Events are numbered per match (``seq``) and never updated; corrections are
+made by appending, e.g. a GOAL_UNDONE for a mistaken GOAL (an undo with no
+goal or assist left to take back is refused). Live scoring
+appends its goal and assist taps here too. ``project`` folds a match's events, in order, into the
+score and per-player goals, assists and minutes in a single pass, and
+``rebuild_match`` writes that projection over the match's stat lines.
+
+Minutes come from SUB_ON/SUB_OFF pairs, so starters get a SUB_ON at minute 0.
+A player still on the pitch at the end plays until the FULL_TIME minute (or
+the last minute seen). Timelines without substitutions, such as live scoring
+taps, leave minutes alone: a rebuild keeps the stored minutes of players with
+no SUB_ON/SUB_OFF, and keeps the lines of players with no events at all.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Iterable
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .. import models, schemas
+from . import match_stats, session_versions, standings
+
+Kind = models.MatchEventKind
+
+TEAM_CODES = {models.MatchTeam.A: 1, models.MatchTeam.B: 2}
+TEAMS_BY_CODE = {code: team for team, code in TEAM_CODES.items()}
+MAX_MINUTES = 120
+TIMELINE_CHUNK_SIZE = 1000
+
+
+class MatchEventError(ValueError):
+    pass
+
+
+@dataclass
+class NewEvent:
+    kind: models.MatchEventKind
+    player_id: int | None = None
+    team: models.MatchTeam | None = None
+    minute: int | None = None
+
+
+@dataclass
+class ProjectedLine:
+    player_id: int
+    team: models.MatchTeam
+    goals: int = 0
+    assists: int = 0
+    minutes_played: int = 0
+    # Whether any SUB_ON/SUB_OFF event stands behind minutes_played.
+    timed: bool = False
+
+
+@dataclass
+class Projection:
+    score_team_a: int = 0
+    score_team_b: int = 0
+    lines: dict[int, ProjectedLine] = field(default_factory=dict)
+
+
+def project(events: Iterable[tuple[int, int | None, int | None, int | None]]) -> Projection:
+    """Fold (kind, player_id, team, minute) rows, in seq order, into a Projection."""
+    projection = Projection()
+    on_pitch_since: dict[int, int] = {}
+    last_minute = 0
+    full_time: int | None = None
+
+    for kind, player_id, team_code, minute in events:
+        if minute is not None:
+            last_minute = max(last_minute, minute)
+        if kind == Kind.FULL_TIME:
+            full_time = minute
+            continue
+        team = TEAMS_BY_CODE[team_code]
+        line = projection.lines.get(player_id)
+        if line is None:
+            line = projection.lines[player_id] = ProjectedLine(player_id=player_id, team=team)
+        line.team = team
+
+        if kind == Kind.GOAL or kind == Kind.GOAL_UNDONE:
+            step = 1 if kind == Kind.GOAL else -1
+            line.goals += step
+            if team == models.MatchTeam.A:
+                projection.score_team_a += step
+            else:
+                projection.score_team_b += step
+        elif kind == Kind.ASSIST:
+            line.assists += 1
+        elif kind == Kind.ASSIST_UNDONE:
+            line.assists -= 1
+        elif kind == Kind.SUB_ON:
+            line.timed = True
+            on_pitch_since.setdefault(player_id, minute or 0)
+        elif kind == Kind.SUB_OFF:
+            line.timed = True
+            since = on_pitch_since.pop(player_id, None)
+            if since is not None:
+                line.minutes_played += max((minute if minute is not None else last_minute) - since, 0)
+
+    end = full_time if full_time is not None else last_minute
+    for player_id, since in on_pitch_since.items():
+        projection.lines[player_id].minutes_played += max(end - since, 0)
+    return projection
+
+
+async def append(db: AsyncSession, match_id: int, events: list[NewEvent]) -> list[models.MatchEvent] | None:
+    """Append events after the match's last one. Returns None if the match does not exist.
+
+    Bumping the session version first serializes concurrent appends, so
+    sequence numbers are handed out without gaps or conflicts. Callers commit.
+    """
+    session_id = await db.scalar(select(models.Match.session_id).where(models.Match.id == match_id))
+    if session_id is None:
+        return None
+    await session_versions.bump(db, session_id)
+
+    missing = await match_stats.find_missing_players(
+        db, (event.player_id for event in events if event.player_id is not None)
+    )
+    if missing:
+        raise MatchEventError(f"Player {missing[0]} not found")
+    await _check_undos(db, match_id, events)
+
+    last_seq = await db.scalar(
+        select(func.coalesce(func.max(models.MatchEvent.seq), 0)).where(models.MatchEvent.match_id == match_id)
+    )
+    rows = [
+        {
+            "match_id": match_id,
+            "seq": last_seq + offset,
+            "kind": int(event.kind),
+            "player_id": event.player_id,
+            "team": TEAM_CODES[event.team] if event.team is not None else None,
+            "minute": event.minute,
+        }
+        for offset, event in enumerate(events, start=1)
+    ]
+    result = await db.scalars(
+        insert(models.MatchEvent).returning(models.MatchEvent, sort_by_parameter_order=True), rows
+    )
+    return list(result.all())
+
+
+UNDOES = {Kind.GOAL_UNDONE: Kind.GOAL, Kind.ASSIST_UNDONE: Kind.ASSIST}
+
+
+async def _check_undos(db: AsyncSession, match_id: int, events: list[NewEvent]) -> None:
+    """Reject a GOAL_UNDONE or ASSIST_UNDONE that has no goal or assist of the player left to take back."""
+    player_ids = {event.player_id for event in events if event.kind in UNDOES}
+    if not player_ids:
+        return
+    result = await db.execute(
+        select(models.MatchEvent.player_id, models.MatchEvent.kind, func.count())
+        .where(
+            models.MatchEvent.match_id == match_id,
+            models.MatchEvent.player_id.in_(player_ids),
+            models.MatchEvent.kind.in_([int(kind) for kind in (*UNDOES, *UNDOES.values())]),
+        )
+        .group_by(models.MatchEvent.player_id, models.MatchEvent.kind)
+    )
+    balance: dict[tuple[int, Kind], int] = {}
+    for player_id, kind, count in result.all():
+        kind = Kind(kind)
+        key = (player_id, UNDOES.get(kind, kind))
+        balance[key] = balance.get(key, 0) + (-count if kind in UNDOES else count)
+    for event in events:
+        if event.kind in UNDOES.values() and event.player_id in player_ids:
+            key = (event.player_id, event.kind)
+            balance[key] = balance.get(key, 0) + 1
+        elif event.kind in UNDOES:
+            key = (event.player_id, UNDOES[event.kind])
+            if balance.get(key, 0) <= 0:
+                raise MatchEventError(f"Player {event.player_id} has no {key[1].name.lower()} to undo")
+            balance[key] -= 1
+
+
+async def timeline(db: AsyncSession, match_id: int) -> AsyncIterator[dict]:
+    """Stream a match's events in order, fetched in chunks."""
+    result = await db.stream(
+        select(
+            models.MatchEvent.seq,
+            models.MatchEvent.kind,
+            models.MatchEvent.player_id,
+            models.MatchEvent.team,
+            models.MatchEvent.minute,
+        )
+        .where(models.MatchEvent.match_id == match_id)
+        .order_by(models.MatchEvent.seq)
+        .execution_options(yield_per=TIMELINE_CHUNK_SIZE)
+    )
+    async for seq, kind, player_id, team, minute in result:
+        yield decode(seq, kind, player_id, team, minute)
+
+
+def decode(seq: int, kind: int, player_id: int | None, team: int | None, minute: int | None) -> dict:
+    return {
+        "seq": seq,
+        "kind": Kind(kind).name.lower(),
+        "player_id": player_id,
+        "team": TEAMS_BY_CODE[team].value if team is not None else None,
+        "minute": minute,
+    }
+
+
+async def rebuild_match(
+    db: AsyncSession, match: models.Match, session: models.Session
+) -> tuple[list[models.PlayerStats], int | None]:
+    """Overwrite the match's score and stat lines with the projection of its events.
+
+    Goals and assists always come from the events. Stored lines of players
+    without events stay, with no goals or assists, and stored minutes stay
+    where no substitution says otherwise. Returns the stat lines and the new session version. Callers commit.
+    """
+    result = await db.execute(
+        select(models.MatchEvent.kind, models.MatchEvent.player_id, models.MatchEvent.team, models.MatchEvent.minute)
+        .where(models.MatchEvent.match_id == match.id)
+        .order_by(models.MatchEvent.seq)
+    )
+    rows = result.all()
+    if not rows:
+        raise MatchEventError("Match has no events to rebuild from")
+    projection = project(rows)
+
+    stored = await db.execute(
+        select(models.PlayerStats.player_id, models.PlayerStats.team, models.PlayerStats.minutes_played).where(
+            models.PlayerStats.match_id == match.id
+        )
+    )
+    lines = dict(projection.lines)
+    for player_id, team, minutes_played in stored.all():
+        line = lines.get(player_id)
+        if line is None:
+            lines[player_id] = ProjectedLine(player_id=player_id, team=team, minutes_played=minutes_played)
+        elif not line.timed:
+            line.minutes_played = minutes_played
+
+    previous_player_ids = set(await standings.match_player_ids(db, session.id))
+    stats = await match_stats.upsert_player_stats(
+        db,
+        match.id,
+        [
+            schemas.PlayerStatsCreate(
+                player_id=line.player_id,
+                team=line.team,
+                goals=line.goals,
+                assists=line.assists,
+                minutes_played=min(line.minutes_played, MAX_MINUTES),
+            )
+            for line in lines.values()
+        ],
+    )
+    match.score_team_a = projection.score_team_a
+    match.score_team_b = projection.score_team_b
+    match.top_scorer_id, match.top_scorer_goals = match_stats.top_scorer(stats)
+    await db.flush()
+    await standings.refresh(db, [session.date], previous_player_ids.union(lines))
+    version = await session_versions.bump(db, session.id)
+    return stats, version
@@ -0,0 +1,364 @@
+"""Bulk import of historical matches from CSV or NDJSON.
+
+Records are parsed lazily from a text stream and written in batches: each
+batch resolves its players with one query, skips matches that already exist,
+inserts sessions, rosters, matches and stat lines with one multi-row INSERT
+per table, and commits. Ratings are not touched per match; once everything is
+in, they are replayed over the whole history in date order
+(``ratings.replay_ratings``) and season standings are rebuilt.
+
+CSV has one row per player line, with columns ``date``, ``location``,
+``score_team_a``, ``score_team_b``, ``player_id`` or ``player_name``, ``team``
+and optionally ``goals``, ``assists``, ``minutes_played`` and ``notes``.
+Consecutive rows with the same date and location form one match. NDJSON has
+one match per line: the match fields plus a ``players`` list of stat objects.
+Unknown player names are created; unknown player ids are an error.
+"""
+from __future__ import annotations
+
+import csv
+import json
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Iterable, Iterator, TextIO
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .. import models
+from ..core.config import settings
+from ..core.dates import as_utc
+from . import match_stats, ratings, resource_versions, standings
+from .session_counts import invalidate_session_counts
+
+FORMATS = ("csv", "ndjson")
+MAX_MINUTES = 120
+
+
+class MatchImportError(ValueError):
+    def __init__(self, line: int, message: str) -> None:
+        super().__init__(f"Line {line}: {message}")
+        self.line = line
+
+
+@dataclass
+class ImportedStat:
+    player_id: int | None
+    player_name: str | None
+    team: models.MatchTeam
+    goals: int = 0
+    assists: int = 0
+    minutes_played: int = 0
+
+
+@dataclass
+class ImportedMatch:
+    # Line the record starts on, for error messages.
+    line: int
+    date: datetime
+    location: str
+    score_team_a: int
+    score_team_b: int
+    notes: str | None = None
+    stats: list[ImportedStat] = field(default_factory=list)
+
+
+@dataclass
+class ImportSummary:
+    matches_imported: int = 0
+    stats_imported: int = 0
+    players_created: int = 0
+    skipped_existing: int = 0
+    ratings_replayed: int = 0
+
+
+def parse(stream: TextIO, fmt: str) -> Iterator[ImportedMatch]:
+    if fmt == "csv":
+        return parse_csv(stream)
+    if fmt == "ndjson":
+        return parse_ndjson(stream)
+    raise ValueError(f"Unknown import format: {fmt}")
+
+
+def parse_csv(stream: Iterable[str]) -> Iterator[ImportedMatch]:
+    reader = csv.DictReader(stream)
+    columns = set(reader.fieldnames or ())
+    missing = {"date", "location", "score_team_a", "score_team_b", "team"} - columns
+    if missing:
+        raise MatchImportError(1, f"missing columns: {', '.join(sorted(missing))}")
+    if not columns & {"player_id", "player_name"}:
+        raise MatchImportError(1, "either a player_id or a player_name column is required")
+
+    current: ImportedMatch | None = None
+    key = None
+    for row in reader:
+        line = reader.line_num
+        row_key = (row["date"], row["location"])
+        if current is None or row_key != key:
+            if current is not None:
+                yield current
+            current = _parse_match(line, row)
+            key = row_key
+        current.stats.append(_parse_stat(line, row))
+    if current is not None:
+        yield current
+
+
+def parse_ndjson(stream: Iterable[str]) -> Iterator[ImportedMatch]:
+    for line, text in enumerate(stream, start=1):
+        if not text.strip():
+            continue
+        try:
+            record = json.loads(text)
+        except json.JSONDecodeError as exc:
+            raise MatchImportError(line, f"invalid JSON ({exc.msg})") from None
+        if not isinstance(record, dict):
+            raise MatchImportError(line, "expected a JSON object")
+        match = _parse_match(line, record)
+        players = record.get("players")
+        if not isinstance(players, list) or not players:
+            raise MatchImportError(line, "'players' must be a non-empty list")
+        match.stats = [_parse_stat(line, stat) for stat in players]
+        yield match
+
+
+class MatchImporter:
+    """Writes parsed matches in batched transactions, then replays ratings."""
+
+    def __init__(self, db: AsyncSession, batch_size: int | None = None) -> None:
+        self.db = db
+        self.batch_size = batch_size or settings.match_import_batch_size
+        self.summary = ImportSummary()
+        self._pending: list[ImportedMatch] = []
+        self._seen: set[tuple[datetime, str]] = set()
+        self._player_ids: set[int] | None = None
+        self._players_by_name: dict[str, int] = {}
+
+    async def run(self, records: Iterable[ImportedMatch]) -> ImportSummary:
+        """Import every record.
+
+        Stops at the first invalid record (or undecodable input). Batches
+        written before it stay committed, and ratings and standings are still
+        brought up to date.
+        """
+        try:
+            for record in records:
+                self._pending.append(record)
+                if len(self._pending) >= self.batch_size:
+                    await self._flush()
+            await self._flush()
+        except (MatchImportError, UnicodeDecodeError):
+            await self.db.rollback()
+            await self._finish()
+            raise
+        await self._finish()
+        return self.summary
+
+    async def _flush(self) -> None:
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        await self._resolve_players(batch)
+        batch = await self._drop_existing(batch)
+        if batch:
+            await self._insert(batch)
+        await self.db.commit()
+        if batch:
+            invalidate_session_counts()
+
+    async def _resolve_players(self, batch: list[ImportedMatch]) -> None:
+        if self._player_ids is None:
+            result = await self.db.execute(
+                select(models.Player.id, models.Player.name, models.Player.deleted_at).order_by(models.Player.id)
+            )
+            self._player_ids = set()
+            for player_id, name, deleted_at in result.all():
+                self._player_ids.add(player_id)
+                if deleted_at is None:
+                    self._players_by_name.setdefault(name, player_id)
+
+        new_names: list[str] = []
+        for match in batch:
+            for stat in match.stats:
+                if stat.player_id is None and stat.player_name not in self._players_by_name:
+                    self._players_by_name[stat.player_name] = 0
+                    new_names.append(stat.player_name)
+        if new_names:
+            result = await self.db.execute(
+                insert(models.Player).returning(models.Player.id, sort_by_parameter_order=True),
+                [{"name": name, "active": True} for name in new_names],
+            )
+            new_ids = list(result.scalars().all())
+            await self.db.execute(
+                insert(models.PlayerRating),
+                [{"player_id": player_id, "overall_rating": ratings.BASE_RATING} for player_id in new_ids],
+            )
+            await resource_versions.bump(self.db, resource_versions.PLAYERS)
+            self._players_by_name.update(zip(new_names, new_ids))
+            self._player_ids.update(new_ids)
+            self.summary.players_created += len(new_ids)
+
+        for match in batch:
+            seen_players: set[int] = set()
+            for stat in match.stats:
+                if stat.player_id is None:
+                    stat.player_id = self._players_by_name[stat.player_name]
+                elif stat.player_id not in self._player_ids:
+                    raise MatchImportError(match.line, f"player {stat.player_id} not found")
+                if stat.player_id in seen_players:
+                    raise MatchImportError(match.line, f"player {stat.player_id} is listed twice")
+                seen_players.add(stat.player_id)
+
+    async def _drop_existing(self, batch: list[ImportedMatch]) -> list[ImportedMatch]:
+        """Skip matches already stored (or repeated in the file), so imports can be re-run."""
+        result = await self.db.execute(
+            select(models.Session.date, models.Session.location)
+            .join(models.Match, models.Match.session_id == models.Session.id)
+            .where(models.Session.date.in_({match.date for match in batch}))
+        )
+        stored = {(as_utc(date), location) for date, location in result.all()}
+        fresh = []
+        for match in batch:
+            key = (match.date, match.location)
+            if key in stored or key in self._seen:
+                self.summary.skipped_existing += 1
+                continue
+            self._seen.add(key)
+            fresh.append(match)
+        return fresh
+
+    async def _insert(self, batch: list[ImportedMatch]) -> None:
+        sessions_result = await self.db.execute(
+            insert(models.Session).returning(models.Session.id, sort_by_parameter_order=True),
+            [
+                {
+                    "date": match.date,
+                    "session_day": match.date.date(),
+                    "location": match.location,
+                    "max_players": max(len(match.stats), 2),
+                    "status": models.SessionStatus.COMPLETED,
+                    "yes_count": len(match.stats),
+                }
+                for match in batch
+            ],
+        )
+        session_ids = list(sessions_result.scalars().all())
+        await self.db.execute(
+            insert(models.SessionPlayer),
+            [
+                {
+                    "session_id": session_id,
+                    "player_id": stat.player_id,
+                    "availability": models.Availability.YES,
+                    "team": models.SessionTeam(stat.team.value),
+                    "is_goalkeeper": False,
+                }
+                for session_id, match in zip(session_ids, batch)
+                for stat in match.stats
+            ],
+        )
+        match_rows = []
+        for session_id, match in zip(session_ids, batch):
+            # Team rating sums are filled in by the replay.
+            top_scorer_id, top_scorer_goals = match_stats.top_scorer(match.stats)
+            match_rows.append(
+                {
+                    "session_id": session_id,
+                    "score_team_a": match.score_team_a,
+                    "score_team_b": match.score_team_b,
+                    "notes": match.notes,
+                    "top_scorer_id": top_scorer_id,
+                    "top_scorer_goals": top_scorer_goals,
+                }
+            )
+        matches_result = await self.db.execute(
+            insert(models.Match).returning(models.Match.id, sort_by_parameter_order=True), match_rows
+        )
+        stat_rows = [
+            {
+                "match_id": match_id,
+                "player_id": stat.player_id,
+                "team": stat.team,
+                "goals": stat.goals,
+                "assists": stat.assists,
+                "minutes_played": stat.minutes_played,
+                "played_at": match.date,
+            }
+            for match_id, match in zip(matches_result.scalars().all(), batch)
+            for stat in match.stats
+        ]
+        await self.db.execute(insert(models.PlayerStats), stat_rows)
+        self.summary.matches_imported += len(batch)
+        self.summary.stats_imported += len(stat_rows)
+
+    async def _finish(self) -> None:
+        if not self.summary.matches_imported:
+            return
+        self.summary.ratings_replayed = await ratings.replay_ratings(self.db)
+        seasons_result = await self.db.execute(select(models.Season.id))
+        for season_id in seasons_result.scalars().all():
+            await standings.rebuild(self.db, season_id)
+        await self.db.commit()
+
+
+def _parse_match(line: int, record: dict[str, Any]) -> ImportedMatch:
+    location = str(record.get("location") or "").strip()
+    if not location:
+        raise MatchImportError(line, "location is required")
+    notes = record.get("notes") or None
+    return ImportedMatch(
+        line=line,
+        date=_parse_date(line, record.get("date")),
+        location=location,
+        score_team_a=_parse_int(line, record, "score_team_a", required=True),
+        score_team_b=_parse_int(line, record, "score_team_b", required=True),
+        notes=str(notes) if notes is not None else None,
+    )
+
+
+def _parse_stat(line: int, record: dict[str, Any]) -> ImportedStat:
+    if not isinstance(record, dict):
+        raise MatchImportError(line, "player entries must be objects")
+    player_id = _parse_int(line, record, "player_id") or None
+    player_name = str(record.get("player_name") or "").strip() or None
+    if player_id is None and player_name is None:
+        raise MatchImportError(line, "player_id or player_name is required")
+    try:
+        team = models.MatchTeam(str(record.get("team") or "").strip().upper())
+    except ValueError:
+        raise MatchImportError(line, f"invalid team {record.get('team')!r}") from None
+    minutes_played = _parse_int(line, record, "minutes_played")
+    if minutes_played > MAX_MINUTES:
+        raise MatchImportError(line, f"minutes_played cannot exceed {MAX_MINUTES}")
+    return ImportedStat(
+        player_id=player_id,
+        player_name=player_name,
+        team=team,
+        goals=_parse_int(line, record, "goals"),
+        assists=_parse_int(line, record, "assists"),
+        minutes_played=minutes_played,
+    )
+
+
+def _parse_int(line: int, record: dict[str, Any], name: str, required: bool = False) -> int:
+    value = record.get(name)
+    if value is None or value == "":
+        if required:
+            raise MatchImportError(line, f"{name} is required")
+        return 0
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise MatchImportError(line, f"{name} must be an integer") from None
+    if number < 0:
+        raise MatchImportError(line, f"{name} cannot be negative")
+    return number
+
+
+def _parse_date(line: int, value: Any) -> datetime:
+    try:
+        date = datetime.fromisoformat(str(value).strip().replace("Z", "+00:00"))
+    except ValueError:
+        raise MatchImportError(line, f"invalid date {value!r}") from None
+    # Store UTC so re-imports match stored rows regardless of the input offset.
+    return as_utc(date)
@@ -0,0 +1,103 @@
+"""Bulk writes of per-player match statistics."""
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Iterable
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .. import models, schemas
+from ..db import dialect_insert
+
+
+async def find_missing_players(db: AsyncSession, player_ids: Iterable[int]) -> list[int]:
+    """Return the ids (in input order) that do not exist, using one IN query."""
+    ids = list(dict.fromkeys(player_ids))
+    if not ids:
+        return []
+    result = await db.execute(select(models.Player.id).where(models.Player.id.in_(ids)))
+    found = set(result.scalars().all())
+    return [player_id for player_id in ids if player_id not in found]
+
+
+async def upsert_player_stats(
+    db: AsyncSession,
+    match_id: int,
+    player_stats: list[schemas.PlayerStatsCreate],
+    replace: bool = False,
+) -> list[models.PlayerStats]:
+    """Write stats with one INSERT ... ON CONFLICT (match_id, player_id) DO UPDATE.
+
+    With ``replace``, stats of players missing from ``player_stats`` are deleted
+    first. Returns the written rows in input order.
+    """
+    player_ids = [stat.player_id for stat in player_stats]
+    if replace:
+        await db.execute(
+            delete(models.PlayerStats).where(
+                models.PlayerStats.match_id == match_id,
+                models.PlayerStats.player_id.not_in(player_ids),
+            )
+        )
+    if not player_stats:
+        return []
+
+    played_at = await db.scalar(
+        select(models.Session.date)
+        .join(models.Match, models.Match.session_id == models.Session.id)
+        .where(models.Match.id == match_id)
+    )
+    stmt = dialect_insert(db, models.PlayerStats).values(
+        [
+            {
+                "match_id": match_id,
+                "player_id": stat.player_id,
+                "team": stat.team,
+                "goals": stat.goals,
+                "assists": stat.assists,
+                "minutes_played": stat.minutes_played,
+                "played_at": played_at,
+            }
+            for stat in player_stats
+        ]
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[models.PlayerStats.match_id, models.PlayerStats.player_id],
+        set_={
+            "team": stmt.excluded.team,
+            "goals": stmt.excluded.goals,
+            "assists": stmt.excluded.assists,
+            "minutes_played": stmt.excluded.minutes_played,
+            "played_at": stmt.excluded.played_at,
+        },
+    ).returning(models.PlayerStats)
+    result = await db.scalars(stmt, execution_options={"populate_existing": True})
+    by_player = {stat.player_id: stat for stat in result.all()}
+    return [by_player[player_id] for player_id in player_ids]
+
+
+async def set_played_at(db: AsyncSession, session_id: int, played_at: datetime) -> None:
+    """Keep the stat lines' copy of the session date in step after the session moves."""
+    await db.execute(
+        update(models.PlayerStats)
+        .where(
+            models.PlayerStats.match_id.in_(
+                select(models.Match.id).where(models.Match.session_id == session_id)
+            )
+        )
+        .values(played_at=played_at),
+        execution_options={"synchronize_session": False},
+    )
+
+
+def top_scorer(stats: Iterable) -> tuple[int | None, int]:
+    """(player_id, goals) of a match's top scorer from objects with ``player_id`` and ``goals``.
+
+    Ties go to the lowest player id; nobody is top scorer of a goalless match.
+    """
+    best_id, best_goals = None, 0
+    for stat in stats:
+        if stat.goals > best_goals or (stat.goals == best_goals > 0 and stat.player_id < best_id):
+            best_id, best_goals = stat.player_id, stat.goals
+    return best_id, best_goals
@@ -0,0 +1,143 @@
+"""Rolling-horizon materialization of recurring template sessions.
+
+A background task keeps every active recurring template's sessions created
+``session_horizon_weeks`` ahead, so nobody has to call generate-recurring
+and far-future sessions are not created before they are needed.
+
+Each template's ``last_generated`` is the watermark: the day through which
+its sessions exist. A run only expands occurrences after the watermark (or
+from today, for a template that was never materialized, so past dates are not
+backfilled). The new sessions go in with one INSERT per template, the unique
+(template_id, session_day) index skips days that already have one, and
+templates are committed in batches. Runs hold the ``session_materializer`` lease, so only
+one replica materializes at a time.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Callable
+
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .. import models
+from ..core.config import settings
+from ..db import SessionLocal
+from . import leases, recurrence
+from .session_counts import invalidate_session_counts
+from .template_service import TemplateService
+
+logger = logging.getLogger("calcio.materializer")
+
+LEASE_NAME = "session_materializer"
+
+
+class SessionMaterializer:
+    def __init__(
+        self,
+        horizon_weeks: int,
+        interval: float,
+        batch_size: int,
+        session_factory: Callable[[], AsyncSession] | None = None,
+    ) -> None:
+        self.horizon_weeks = horizon_weeks
+        self.interval = interval
+        self.batch_size = batch_size
+        self.session_factory = session_factory or SessionLocal
+        self.holder = leases.holder_id()
+        self._task: asyncio.Task | None = None
+
+    @property
+    def lease_ttl(self) -> timedelta:
+        # Long enough to survive a slow run, short enough for a quick takeover.
+        return timedelta(seconds=self.interval * 3)
+
+    async def run_once(self, today: date | None = None) -> int | None:
+        """Materialize if this replica holds the lease. Returns sessions created, or None without the lease."""
+        async with self.session_factory() as db:
+            if not await leases.acquire(db, LEASE_NAME, self.holder, self.lease_ttl):
+                return None
+            return await self.materialize(db, today or datetime.now(timezone.utc).date())
+
+    async def materialize(self, db: AsyncSession, today: date) -> int:
+        """Bring every active recurring template up to the horizon; commits per batch."""
+        horizon = today + timedelta(weeks=self.horizon_weeks)
+        watermark = datetime.combine(horizon, time(), tzinfo=timezone.utc)
+        result = await db.execute(
+            select(models.SessionTemplate)
+            .where(
+                models.SessionTemplate.active.is_(True),
+                models.SessionTemplate.recurrence_start.is_not(None),
+                or_(
+                    models.SessionTemplate.recurrence_rule.is_not(None),
+                    models.SessionTemplate.recurrence_type.in_(
+                        [models.RecurrenceType.WEEKLY, models.RecurrenceType.BIWEEKLY, models.RecurrenceType.MONTHLY]
+                    ),
+                ),
+                or_(
+                    models.SessionTemplate.last_generated.is_(None),
+                    models.SessionTemplate.last_generated < watermark,
+                ),
+            )
+            .order_by(models.SessionTemplate.id)
+        )
+        templates = list(result.scalars().all())
+
+        created = 0
+        for offset in range(0, len(templates), self.batch_size):
+            created_before = created
+            for template in templates[offset : offset + self.batch_size]:
+                after = today - timedelta(days=1)
+                if template.last_generated is not None:
+                    after = max(after, template.last_generated.date())
+                try:
+                    dates = TemplateService.recurring_dates(template, limit=None, after=after, until=horizon)
+                except recurrence.RecurrenceError:
+                    logger.exception("Skipping template %s with an invalid recurrence rule", template.id)
+                    continue
+                sessions = await TemplateService.insert_sessions(template, dates, db)
+                template.last_generated = watermark
+                created += len(sessions)
+            await db.commit()
+            if created > created_before:
+                invalidate_session_counts()
+        return created
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        try:
+            async with self.session_factory() as db:
+                await leases.release(db, LEASE_NAME, self.holder)
+        except Exception:
+            logger.exception("Could not release the materializer lease")
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                created = await self.run_once()
+                if created:
+                    logger.info("Materialized %d session(s)", created)
+            except Exception:
+                # The watermarks only move on commit; the next round retries.
+                logger.exception("Session materialization failed")
+            await asyncio.sleep(self.interval)
+
+
+session_materializer = SessionMaterializer(
+    settings.session_horizon_weeks,
+    settings.session_materializer_interval_seconds,
+    settings.session_materializer_batch_size,
+)
@@ -1,14 +1,19 @@
 from __future__ import annotations
 
-from sqlalchemy import select
+from typing import Iterable, Mapping
+
+from sqlalchemy import insert, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from .. import models
+from . import resource_versions
 
 
 K_FACTOR = 50
 GOAL_BONUS = 2.5
 BASE_RATING = 1000.0
+# Rows fetched per round trip when replaying the match history.
+REPLAY_CHUNK_SIZE = 5000
 
 
 async def get_or_create_player_rating(db: AsyncSession, player_id: int) -> models.PlayerRating:
@@ -21,49 +26,180 @@ async def get_or_create_player_rating(db: AsyncSession, player_id: int) -> model
     return rating
 
 
-async def update_ratings_after_match(db: AsyncSession, match: models.Match) -> None:
-    """Update player ratings after a match based on their performance."""
-    # Load stats explicitly to avoid lazy loading
+async def get_or_create_player_ratings(db: AsyncSession, player_ids: set[int]) -> dict[int, models.PlayerRating]:
+    """Load ratings for several players with one IN query, creating missing ones."""
+    if not player_ids:
+        return {}
     result = await db.execute(
-        select(models.PlayerStats).where(models.PlayerStats.match_id == match.id)
+        select(models.PlayerRating).where(models.PlayerRating.player_id.in_(player_ids))
     )
-    stats = result.scalars().all()
-    team_a_stats = [stat for stat in stats if stat.team == models.MatchTeam.A]
-    team_b_stats = [stat for stat in stats if stat.team == models.MatchTeam.B]
-
-    team_a_rating_sum = 0.0
-    for stat in team_a_stats:
-        rating = await get_or_create_player_rating(db, stat.player_id)
-        team_a_rating_sum += rating.overall_rating
+    ratings = {rating.player_id: rating for rating in result.scalars().all()}
+    missing = player_ids.difference(ratings)
+    if missing:
+        for player_id in missing:
+            ratings[player_id] = models.PlayerRating(player_id=player_id, overall_rating=BASE_RATING)
+            db.add(ratings[player_id])
+        await db.flush()
+    return ratings
+
+
+async def update_ratings_after_match(
+    db: AsyncSession,
+    match: models.Match,
+    stats: list[models.PlayerStats] | None = None,
+) -> None:
+    """Update player ratings after a match based on their performance.
+
+    Also records the pre-match team rating sums on the match, and each stat
+    line's rating change and resulting rating. Pass ``stats`` when the caller already holds the match's stat rows to skip
+    reloading them.
+    """
+    if stats is None:
+        # Load stats explicitly to avoid lazy loading
+        result = await db.execute(
+            select(models.PlayerStats).where(models.PlayerStats.match_id == match.id)
+        )
+        stats = result.scalars().all()
+    player_ratings = await get_or_create_player_ratings(db, {stat.player_id for stat in stats})
+    current = {player_id: rating.overall_rating for player_id, rating in player_ratings.items()}
+    lines = [(stat.player_id, stat.team, stat.goals) for stat in stats]
+    match.team_a_rating, match.team_b_rating = team_rating_sums(current, lines)
+    deltas = match_rating_deltas(current, lines, match.score_team_a, match.score_team_b)
+    for stat in stats:
+        delta = deltas.get(stat.player_id)
+        if delta is None:
+            continue
+        rating = player_ratings[stat.player_id]
+        rating.overall_rating += delta
+        stat.rating_delta = delta
+        stat.rating_after_match = round(rating.overall_rating)
 
-    team_b_rating_sum = 0.0
-    for stat in team_b_stats:
-        rating = await get_or_create_player_rating(db, stat.player_id)
-        team_b_rating_sum += rating.overall_rating
+    # Flush so callers can commit along with their own updates.
+    await db.flush()
+    await resource_versions.bump(db, resource_versions.PLAYERS)
+
+
+def team_rating_sums(
+    ratings: Mapping[int, float],
+    lines: Iterable[tuple[int, models.MatchTeam, int]],
+) -> tuple[float, float]:
+    """Sum of the current ratings on each side, from (player_id, team, goals) lines."""
+    sums = {models.MatchTeam.A: 0.0, models.MatchTeam.B: 0.0}
+    for player_id, team, _ in lines:
+        if team in sums:
+            sums[team] += ratings.get(player_id, BASE_RATING)
+    return sums[models.MatchTeam.A], sums[models.MatchTeam.B]
+
+
+def match_rating_deltas(
+    ratings: Mapping[int, float],
+    lines: Iterable[tuple[int, models.MatchTeam, int]],
+    score_team_a: int,
+    score_team_b: int,
+) -> dict[int, float]:
+    """Rating change per player for one match, from (player_id, team, goals) lines.
+
+    Players missing from ``ratings`` count as BASE_RATING.
+    """
+    lines = list(lines)
+    team_a_rating_sum, team_b_rating_sum = team_rating_sums(ratings, lines)
 
     expected_a = 1 / (1 + 10 ** ((team_b_rating_sum - team_a_rating_sum) / 400))
     expected_b = 1 - expected_a
 
-    if match.score_team_a > match.score_team_b:
+    if score_team_a > score_team_b:
         actual_a, actual_b = 1.0, 0.0
-    elif match.score_team_a < match.score_team_b:
+    elif score_team_a < score_team_b:
         actual_a, actual_b = 0.0, 1.0
     else:
         actual_a = actual_b = 0.5
 
-    for stat in stats:
-        player_rating = await get_or_create_player_rating(db, stat.player_id)
-
-        if stat.team == models.MatchTeam.A:
+    deltas: dict[int, float] = {}
+    for player_id, team, goals in lines:
+        if team == models.MatchTeam.A:
             delta = K_FACTOR * (actual_a - expected_a)
-        elif stat.team == models.MatchTeam.B:
+        elif team == models.MatchTeam.B:
             delta = K_FACTOR * (actual_b - expected_b)
         else:
             # Unassigned players should not affect ratings.
             continue
-
-        delta += GOAL_BONUS * stat.goals
-        player_rating.overall_rating += delta
-
-    # Flush so callers can commit along with their own updates.
-    await db.flush()
+        deltas[player_id] = delta + GOAL_BONUS * goals
+    return deltas
+
+
+async def replay_ratings(db: AsyncSession) -> int:
+    """Recompute every rating from BASE_RATING by replaying all matches in date order.
+
+    Stat lines are streamed once, in (session date, match id) order, and the
+    results are written back with bulk UPDATEs, along with each match's
+    pre-match team rating sums and each stat line's rating change. Returns the number of matches replayed.
+    """
+    players_result = await db.execute(select(models.Player.id))
+    ratings = {player_id: BASE_RATING for player_id in players_result.scalars().all()}
+
+    stmt = (
+        select(
+            models.Match.id,
+            models.Match.score_team_a,
+            models.Match.score_team_b,
+            models.PlayerStats.id,
+            models.PlayerStats.player_id,
+            models.PlayerStats.team,
+            models.PlayerStats.goals,
+        )
+        .join(models.Session, models.Session.id == models.Match.session_id)
+        .join(models.PlayerStats, models.PlayerStats.match_id == models.Match.id)
+        .order_by(models.Session.date, models.Match.id)
+        .execution_options(yield_per=REPLAY_CHUNK_SIZE)
+    )
+    summaries: list[dict] = []
+    stat_updates: list[dict] = []
+    current: tuple[int, int, int] | None = None
+    lines: list[tuple[int, models.MatchTeam, int]] = []
+    stat_ids: dict[int, int] = {}
+
+    def apply() -> None:
+        match_id, score_a, score_b = current
+        team_a_rating, team_b_rating = team_rating_sums(ratings, lines)
+        summaries.append({"id": match_id, "team_a_rating": team_a_rating, "team_b_rating": team_b_rating})
+        for player_id, delta in match_rating_deltas(ratings, lines, score_a, score_b).items():
+            ratings[player_id] = ratings.get(player_id, BASE_RATING) + delta
+            stat_updates.append(
+                {
+                    "id": stat_ids[player_id],
+                    "rating_delta": delta,
+                    "rating_after_match": round(ratings[player_id]),
+                }
+            )
+
+    result = await db.stream(stmt)
+    async for match_id, score_a, score_b, stat_id, player_id, team, goals in result:
+        if current is None or current[0] != match_id:
+            if current is not None:
+                apply()
+            current = (match_id, score_a, score_b)
+            lines = []
+            stat_ids = {}
+        lines.append((player_id, team, goals))
+        stat_ids[player_id] = stat_id
+    if current is not None:
+        apply()
+
+    if summaries:
+        await db.execute(update(models.Match), summaries)
+    if stat_updates:
+        await db.execute(update(models.PlayerStats), stat_updates)
+    existing_result = await db.execute(select(models.PlayerRating.player_id))
+    existing = set(existing_result.scalars().all())
+    if existing:
+        await db.execute(
+            update(models.PlayerRating),
+            [{"player_id": pid, "overall_rating": ratings[pid]} for pid in existing if pid in ratings],
+        )
+    missing = [
+        {"player_id": pid, "overall_rating": rating} for pid, rating in ratings.items() if pid not in existing
+    ]
+    if missing:
+        await db.execute(insert(models.PlayerRating), missing)
+    await resource_versions.bump(db, resource_versions.PLAYERS)
+    return len(summaries)
@@ -0,0 +1,357 @@
+"""Recurrence rules (a subset of RFC 5545) and their expansion into dates.
+
+A rule is written as iCalendar content lines: one ``RRULE:`` line (the
+``RRULE:`` prefix is optional) and any number of ``EXDATE:`` lines, e.g.::
+
+    RRULE:FREQ=MONTHLY;BYDAY=MO,TU,WE,TH,FR;BYSETPOS=-1
+    EXDATE:20251231
+
+Supported rule parts: FREQ (DAILY, WEEKLY, MONTHLY, YEARLY), INTERVAL,
+COUNT, UNTIL, BYDAY (with ordinals such as ``2TU`` or ``-1FR`` for MONTHLY
+and YEARLY), BYMONTHDAY, BYMONTH, BYSETPOS and WKST. Rules work on dates;
+the time of day comes from the template.
+
+Expansion is arithmetic: periods (days, weeks, months or years) are stepped
+by INTERVAL, and each period's candidate days come from precomputed weekday
+offsets or ``monthrange``, with no day-by-day search. Expansion can start
+from the period containing a given date, so incremental generation does
+not replay the history. As RFC 5545 requires, days that
+do not exist in a month are skipped rather than clamped, and COUNT counts
+occurrences before EXDATEs are removed.
+"""
+from __future__ import annotations
+
+import itertools
+from calendar import monthrange
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Iterator
+
+from .. import models
+
+FREQUENCIES = ("DAILY", "WEEKLY", "MONTHLY", "YEARLY")
+WEEKDAYS = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+# Give up after this many periods in a row without an occurrence (e.g. BYMONTHDAY=30;BYMONTH=2).
+MAX_EMPTY_PERIODS = 1000
+
+
+class RecurrenceError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class Rule:
+    freq: str
+    interval: int = 1
+    count: int | None = None
+    until: date | None = None
+    # (weekday, ordinal); weekday 0 = Monday, ordinal None = every such weekday.
+    by_day: tuple[tuple[int, int | None], ...] = ()
+    by_month_day: tuple[int, ...] = ()
+    by_month: tuple[int, ...] = ()
+    by_set_pos: tuple[int, ...] = ()
+    week_start: int = 0
+    exdates: frozenset[date] = frozenset()
+
+    @property
+    def bounded(self) -> bool:
+        return self.count is not None or self.until is not None
+
+
+def parse(text: str) -> Rule:
+    """Parse RRULE/EXDATE content lines into a Rule, raising RecurrenceError if invalid."""
+    rrule: str | None = None
+    exdates: set[date] = set()
+    for raw in text.splitlines():
+        line = raw.strip()
+        if not line:
+            continue
+        name, sep, value = line.partition(":")
+        if not sep:
+            name, value = "RRULE", line
+        # Drop parameters such as EXDATE;VALUE=DATE.
+        name = name.split(";", 1)[0].strip().upper()
+        if name == "RRULE":
+            if rrule is not None:
+                raise RecurrenceError("Only one RRULE is supported")
+            rrule = value
+        elif name == "EXDATE":
+            exdates.update(_parse_date(item) for item in value.split(",") if item.strip())
+        else:
+            raise RecurrenceError(f"Unsupported property {name}")
+    if rrule is None:
+        raise RecurrenceError("RRULE is required")
+
+    parts: dict[str, str] = {}
+    for part in rrule.split(";"):
+        if not part.strip():
+            continue
+        key, sep, value = part.partition("=")
+        key = key.strip().upper()
+        if not sep or not value.strip():
+            raise RecurrenceError(f"Invalid rule part {part!r}")
+        if key in parts:
+            raise RecurrenceError(f"{key} is given twice")
+        parts[key] = value.strip().upper()
+
+    freq = parts.pop("FREQ", None)
+    if freq not in FREQUENCIES:
+        raise RecurrenceError(f"FREQ must be one of {', '.join(FREQUENCIES)}")
+    interval = _parse_int(parts.pop("INTERVAL", "1"), "INTERVAL", 1, 1000)
+    count = _parse_int(parts.pop("COUNT"), "COUNT", 1, 100_000) if "COUNT" in parts else None
+    until = _parse_date(parts.pop("UNTIL")) if "UNTIL" in parts else None
+    if count is not None and until is not None:
+        raise RecurrenceError("COUNT and UNTIL cannot both be given")
+    by_day = tuple(_parse_weekday(item) for item in parts.pop("BYDAY", "").split(",") if item)
+    by_month_day = _parse_ints(parts.pop("BYMONTHDAY", ""), "BYMONTHDAY", 31)
+    by_month = _parse_ints(parts.pop("BYMONTH", ""), "BYMONTH", 12, signed=False)
+    by_set_pos = _parse_ints(parts.pop("BYSETPOS", ""), "BYSETPOS", 366)
+    week_start = parts.pop("WKST", "MO")
+    if week_start not in WEEKDAYS:
+        raise RecurrenceError(f"Invalid WKST value {week_start!r}")
+    week_start = WEEKDAYS.index(week_start)
+    if parts:
+        raise RecurrenceError(f"{', '.join(sorted(parts))} is not supported")
+
+    if freq in ("DAILY", "WEEKLY") and any(ordinal is not None for _, ordinal in by_day):
+        raise RecurrenceError(f"BYDAY ordinals are not allowed with FREQ={freq}")
+    if freq == "WEEKLY" and by_month_day:
+        raise RecurrenceError("BYMONTHDAY is not allowed with FREQ=WEEKLY")
+    if freq == "YEARLY" and by_day and not by_month:
+        raise RecurrenceError("BYDAY with FREQ=YEARLY needs BYMONTH")
+    return Rule(
+        freq=freq,
+        interval=interval,
+        count=count,
+        until=until,
+        by_day=by_day,
+        by_month_day=by_month_day,
+        by_month=by_month,
+        by_set_pos=by_set_pos,
+        week_start=week_start,
+        exdates=frozenset(exdates),
+    )
+
+
+def expand(
+    rule: Rule,
+    start: date,
+    end: date | None = None,
+    limit: int | None = None,
+    after: date | None = None,
+) -> list[date]:
+    """Occurrences of ``rule`` from ``start`` (its DTSTART), in order.
+
+    Stops at the rule's UNTIL or COUNT, at ``end`` (inclusive) and once
+    ``limit`` dates are collected. Occurrences on or before ``after`` are
+    left out; without COUNT the periods before it are skipped outright.
+    """
+    bounds = [day for day in (end, rule.until) if day is not None]
+    last = min(bounds) if bounds else None
+    if last is None and limit is None and rule.count is None:
+        raise RecurrenceError("Expanding an unbounded rule needs an end date or a limit")
+
+    first_index = 0
+    if after is not None and rule.count is None:
+        first_index = _period_index(rule, start, after)
+    dates: list[date] = []
+    seen = 0
+    empty = 0
+    for period_start, days in _periods(rule, start, first_index):
+        if last is not None and period_start > last:
+            break
+        if rule.by_set_pos:
+            days = _select_positions(days, rule.by_set_pos)
+        days = [day for day in days if day >= start]
+        if not days:
+            empty += 1
+            if empty > MAX_EMPTY_PERIODS:
+                break
+            continue
+        empty = 0
+        for day in days:
+            if last is not None and day > last:
+                return dates
+            seen += 1
+            if rule.count is not None and seen > rule.count:
+                return dates
+            if day in rule.exdates or (after is not None and day <= after):
+                continue
+            dates.append(day)
+            if limit is not None and len(dates) >= limit:
+                return dates
+    return dates
+
+
+def template_schedule(
+    template: models.SessionTemplate, rule_text: str | None = None
+) -> tuple[Rule, date] | None:
+    """The (rule, DTSTART) of a template, or None if it does not recur.
+
+    ``rule_text`` (e.g. a rule being previewed) wins, then
+    ``recurrence_rule``; otherwise the legacy ``recurrence_type`` and
+    ``day_of_week`` are translated. Legacy MONTHLY with a day of week means
+    the first such weekday on or after the start's day of the month.
+    """
+    if template.recurrence_start is None:
+        return None
+    start = template.recurrence_start.date()
+    rule_text = rule_text or template.recurrence_rule
+    if rule_text:
+        return parse(rule_text), start
+
+    recurrence_type = template.recurrence_type
+    weekday = template.day_of_week
+    if recurrence_type in (models.RecurrenceType.WEEKLY, models.RecurrenceType.BIWEEKLY):
+        if weekday is None:
+            weekday = start.weekday()
+        # Count the weeks from the first occurrence, as the old generator did.
+        start += timedelta(days=(weekday - start.weekday()) % 7)
+        interval = 2 if recurrence_type == models.RecurrenceType.BIWEEKLY else 1
+        return Rule("WEEKLY", interval=interval, by_day=((weekday, None),)), start
+    if recurrence_type == models.RecurrenceType.MONTHLY:
+        if weekday is None:
+            return Rule("MONTHLY"), start
+        window = tuple(day for day in range(start.day, start.day + 7) if day <= 31)
+        return Rule("MONTHLY", by_day=((weekday, None),), by_month_day=window), start
+    return None
+
+
+def _periods(rule: Rule, start: date, first_index: int) -> Iterator[tuple[date, list[date]]]:
+    """(first day, sorted candidate days) of each period from ``first_index`` on."""
+    if rule.freq == "DAILY":
+        step = timedelta(days=rule.interval)
+        weekdays = {weekday for weekday, _ in rule.by_day}
+        day = start + step * first_index
+        while True:
+            keep = (
+                (not rule.by_month or day.month in rule.by_month)
+                and (not weekdays or day.weekday() in weekdays)
+                and (not rule.by_month_day or _matches_month_day(day, rule.by_month_day))
+            )
+            yield day, [day] if keep else []
+            day += step
+
+    elif rule.freq == "WEEKLY":
+        step = timedelta(weeks=rule.interval)
+        weekdays = {weekday for weekday, _ in rule.by_day} or {start.weekday()}
+        offsets = sorted(timedelta(days=(weekday - rule.week_start) % 7) for weekday in weekdays)
+        week_start = _week_start(rule, start) + step * first_index
+        while True:
+            days = [week_start + offset for offset in offsets]
+            if rule.by_month:
+                days = [day for day in days if day.month in rule.by_month]
+            yield week_start, days
+            week_start += step
+
+    elif rule.freq == "MONTHLY":
+        for index in itertools.count(first_index):
+            year, month = divmod(start.year * 12 + start.month - 1 + index * rule.interval, 12)
+            month += 1
+            if year > date.max.year:
+                return
+            if rule.by_month and month not in rule.by_month:
+                yield date(year, month, 1), []
+            else:
+                yield date(year, month, 1), _month_days(rule, year, month, start.day)
+
+    else:
+        months = sorted(rule.by_month or (start.month,))
+        for index in itertools.count(first_index):
+            year = start.year + index * rule.interval
+            if year > date.max.year:
+                return
+            days = []
+            for month in months:
+                days.extend(_month_days(rule, year, month, start.day))
+            yield date(year, 1, 1), days
+
+
+def _month_days(rule: Rule, year: int, month: int, default_day: int) -> list[date]:
+    length = monthrange(year, month)[1]
+    days: set[int] | None = None
+    if rule.by_month_day:
+        days = {day if day > 0 else length + day + 1 for day in rule.by_month_day}
+        days = {day for day in days if 1 <= day <= length}
+    if rule.by_day:
+        first_weekday = date(year, month, 1).weekday()
+        weekday_days: set[int] = set()
+        for weekday, ordinal in rule.by_day:
+            first = 1 + (weekday - first_weekday) % 7
+            if ordinal is None:
+                weekday_days.update(range(first, length + 1, 7))
+                continue
+            occurrences = (length - first) // 7 + 1
+            nth = ordinal if ordinal > 0 else occurrences + ordinal + 1
+            if 1 <= nth <= occurrences:
+                weekday_days.add(first + 7 * (nth - 1))
+        days = weekday_days if days is None else days & weekday_days
+    if days is None:
+        days = {default_day} if default_day <= length else set()
+    return [date(year, month, day) for day in sorted(days)]
+
+
+def _period_index(rule: Rule, start: date, day: date) -> int:
+    """Index of the period containing ``day`` (0 if it is before the first)."""
+    if day <= start:
+        return 0
+    if rule.freq == "DAILY":
+        return (day - start).days // rule.interval
+    if rule.freq == "WEEKLY":
+        return (day - _week_start(rule, start)).days // 7 // rule.interval
+    if rule.freq == "MONTHLY":
+        return ((day.year - start.year) * 12 + day.month - start.month) // rule.interval
+    return (day.year - start.year) // rule.interval
+
+
+def _week_start(rule: Rule, day: date) -> date:
+    return day - timedelta(days=(day.weekday() - rule.week_start) % 7)
+
+
+def _matches_month_day(day: date, month_days: tuple[int, ...]) -> bool:
+    length = monthrange(day.year, day.month)[1]
+    return day.day in month_days or day.day - length - 1 in month_days
+
+
+def _select_positions(days: list[date], positions: tuple[int, ...]) -> list[date]:
+    selected = {days[pos - 1 if pos > 0 else pos] for pos in positions if -len(days) <= pos <= len(days)}
+    return sorted(selected)
+
+
+def _parse_date(value: str) -> date:
+    text = value.strip().replace("-", "")[:8]
+    try:
+        return date(int(text[:4]), int(text[4:6]), int(text[6:8]))
+    except ValueError:
+        raise RecurrenceError(f"Invalid date {value.strip()!r}") from None
+
+
+def _parse_int(value: str, name: str, low: int, high: int) -> int:
+    try:
+        number = int(value)
+    except ValueError:
+        raise RecurrenceError(f"{name} must be an integer") from None
+    if not low <= number <= high:
+        raise RecurrenceError(f"{name} must be between {low} and {high}")
+    return number
+
+
+def _parse_ints(value: str, name: str, high: int, signed: bool = True) -> tuple[int, ...]:
+    numbers = []
+    for item in value.split(","):
+        if not item:
+            continue
+        number = _parse_int(item, name, -high if signed else 1, high)
+        if number == 0:
+            raise RecurrenceError(f"{name} cannot be 0")
+        numbers.append(number)
+    return tuple(numbers)
+
+
+def _parse_weekday(item: str) -> tuple[int, int | None]:
+    code, ordinal = item[-2:], item[:-2]
+    if code not in WEEKDAYS:
+        raise RecurrenceError(f"Invalid BYDAY value {item!r}")
+    if not ordinal:
+        return WEEKDAYS.index(code), None
+    return WEEKDAYS.index(code), _parse_ints(ordinal, "BYDAY ordinal", 53)[0]
@@ -0,0 +1,30 @@
+"""Version counters of whole collections, used for list ETags.
+
+Every write that can change a served list bumps its counter in the same
+transaction, so the list's ETag is one primary-key read.
+"""
+from __future__ import annotations
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .. import models
+from ..db import dialect_insert
+
+# Players, including their ratings.
+PLAYERS = "players"
+
+
+async def bump(db: AsyncSession, name: str) -> int:
+    """Increment the counter within the current transaction and return the new version."""
+    version = models.ResourceVersion
+    stmt = dialect_insert(db, version).values(name=name, version=1)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[version.name], set_={"version": version.version + 1}
+    ).returning(version.version)
+    return (await db.execute(stmt)).scalar_one()
+
+
+async def current(db: AsyncSession, name: str) -> int:
+    result = await db.execute(select(models.ResourceVersion.version).where(models.ResourceVersion.name == name))
+    return result.scalar_one_or_none() or 0
@@ -0,0 +1,193 @@
+"""Series operations: change every upcoming session of a template at once.
+
+A series is a template's sessions in a date range that are still planned and
+have no match. Each operation first reads the series once and plans the
+change per session, which is also its preview; applying it is then one
+statement over exactly the planned sessions (still re-checked as editable):
+an UPDATE for cancel and change-location, an executemany UPDATE by primary
+key for move-time (the new datetimes are computed here, not in
+dialect-specific SQL) and an INSERT ... SELECT for clone. Callers commit.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, time, timezone
+from typing import Optional
+
+from sqlalchemy import exists, insert, literal, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .. import models
+from ..core.dates import as_utc
+
+
+class SeriesError(ValueError):
+    """The planned change cannot be applied as is."""
+
+
+@dataclass
+class SeriesChange:
+    session_id: int
+    date: datetime
+    location: str
+    status: models.SessionStatus
+    new_date: Optional[datetime] = None
+    new_location: Optional[str] = None
+    new_status: Optional[models.SessionStatus] = None
+    conflict: bool = False
+
+
+def _editable():
+    return (
+        models.Session.status == models.SessionStatus.PLANNED,
+        ~exists().where(models.Match.session_id == models.Session.id),
+    )
+
+
+async def series_sessions(
+    db: AsyncSession,
+    template_id: int,
+    start: datetime,
+    end: Optional[datetime] = None,
+) -> list[models.Session]:
+    """The template's planned, match-less sessions from ``start`` through ``end``, by date."""
+    filters = [models.Session.template_id == template_id, models.Session.date >= start, *_editable()]
+    if end is not None:
+        filters.append(models.Session.date <= end)
+    result = await db.execute(select(models.Session).where(*filters).order_by(models.Session.date))
+    return list(result.scalars().all())
+
+
+def _change(session: models.Session, **new) -> SeriesChange:
+    return SeriesChange(
+        session_id=session.id,
+        date=as_utc(session.date),
+        location=session.location,
+        status=session.status,
+        **new,
+    )
+
+
+async def cancel(db: AsyncSession, sessions: list[models.Session], apply: bool) -> list[SeriesChange]:
+    changes = [_change(session, new_status=models.SessionStatus.CANCELLED) for session in sessions]
+    if apply and changes:
+        await db.execute(
+            update(models.Session)
+            .where(models.Session.id.in_([change.session_id for change in changes]), *_editable())
+            .values(status=models.SessionStatus.CANCELLED, version=models.Session.version + 1)
+            .execution_options(synchronize_session=False)
+        )
+    return changes
+
+
+async def change_location(
+    db: AsyncSession,
+    sessions: list[models.Session],
+    location: str,
+    apply: bool,
+) -> list[SeriesChange]:
+    changes = [_change(session, new_location=location) for session in sessions]
+    if apply and changes:
+        await db.execute(
+            update(models.Session)
+            .where(models.Session.id.in_([change.session_id for change in changes]), *_editable())
+            .values(location=location, version=models.Session.version + 1)
+            .execution_options(synchronize_session=False)
+        )
+    return changes
+
+
+async def move_time(
+    db: AsyncSession,
+    template_id: int,
+    sessions: list[models.Session],
+    time_of_day: time,
+    apply: bool,
+) -> list[SeriesChange]:
+    """Move each session to ``time_of_day`` (UTC) on its own day.
+
+    A change conflicts when the template already has another session on the
+    new day, or two sessions of the series would land on the same one;
+    applying a plan with conflicts raises SeriesError.
+    """
+    changes = [
+        _change(session, new_date=datetime.combine(as_utc(session.date).date(), time_of_day, tzinfo=timezone.utc))
+        for session in sessions
+    ]
+    if not changes:
+        return changes
+
+    moving = {change.session_id for change in changes}
+    result = await db.execute(
+        select(models.Session.id, models.Session.session_day).where(
+            models.Session.template_id == template_id,
+            models.Session.session_day.in_({change.new_date.date() for change in changes}),
+        )
+    )
+    taken = {day for session_id, day in result.all() if session_id not in moving}
+    for change in changes:
+        change.conflict = change.new_date.date() in taken
+        taken.add(change.new_date.date())
+
+    if apply:
+        if any(change.conflict for change in changes):
+            raise SeriesError("Another session of this template is already on that day")
+        moved = [
+            {
+                "id": change.session_id,
+                "date": change.new_date,
+                "session_day": change.new_date.date(),
+                "version": session.version + 1,
+            }
+            for change, session in zip(changes, sessions)
+            if change.new_date != change.date
+        ]
+        if moved:
+            await db.execute(update(models.Session), moved)
+    return changes
+
+
+async def clone(
+    db: AsyncSession,
+    template: models.SessionTemplate,
+    sessions: list[models.Session],
+    name: str,
+    apply: bool,
+) -> tuple[Optional[models.SessionTemplate], list[SeriesChange]]:
+    """Copy the template under ``name``, with a planned copy of each session of the series."""
+    changes = [_change(session, new_status=models.SessionStatus.PLANNED) for session in sessions]
+    if not apply:
+        return None, changes
+
+    copy = models.SessionTemplate(
+        name=name,
+        description=template.description,
+        location=template.location,
+        time_of_day=template.time_of_day,
+        day_of_week=template.day_of_week,
+        max_players=template.max_players,
+        active=template.active,
+        recurrence_type=template.recurrence_type,
+        recurrence_start=template.recurrence_start,
+        recurrence_end=template.recurrence_end,
+        recurrence_rule=template.recurrence_rule,
+        last_generated=template.last_generated,
+    )
+    db.add(copy)
+    await db.flush()
+    if changes:
+        source = models.Session
+        await db.execute(
+            insert(models.Session).from_select(
+                ["template_id", "date", "session_day", "location", "max_players", "status"],
+                select(
+                    literal(copy.id),
+                    source.date,
+                    source.session_day,
+                    source.location,
+                    source.max_players,
+                    literal(models.SessionStatus.PLANNED, source.status.type),
+                ).where(source.id.in_([change.session_id for change in changes]), *_editable()),
+            )
+        )
+    return copy, changes
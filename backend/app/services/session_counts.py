@@ -0,0 +1,32 @@
+"""Cached totals for the ``X-Total-Count`` header of the session list.
+
+Counts are kept per filter for ``sessions_count_cache_ttl_seconds``. Anything
+that inserts or deletes sessions, or changes a session's date or status,
+calls ``invalidate_session_counts`` after it commits.
+"""
+from __future__ import annotations
+
+from typing import Hashable
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .. import models
+from ..core.cache import TTLCache
+from ..core.config import settings
+
+_counts = TTLCache(maxsize=256, ttl=settings.sessions_count_cache_ttl_seconds)
+
+
+async def count(db: AsyncSession, key: Hashable, filters: list) -> int:
+    """The number of sessions matching ``filters``, cached under ``key``."""
+    total = _counts.get(key)
+    if total is None:
+        result = await db.execute(select(func.count(models.Session.id)).where(*filters))
+        total = result.scalar_one()
+        _counts.set(key, total)
+    return total
+
+
+def invalidate_session_counts() -> None:
+    _counts.clear()
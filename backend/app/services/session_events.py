@@ -0,0 +1,111 @@
+"""In-process pub/sub for session change notifications.
+
+Write endpoints publish after they commit; the ``/sessions/{id}/events`` SSE
+stream delivers the events to connected clients. The broker lives in the
+worker process, so clients only see writes handled by the same worker.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Hashable
+
+from ..core.config import settings
+
+
+@dataclass(frozen=True)
+class SessionEvent:
+    type: str
+    session_id: int
+    version: int | None = None
+    data: dict[str, Any] = field(default_factory=dict)
+    # Events with the same key replace each other while pending (latest wins).
+    key: Hashable = None
+
+    def encode(self) -> str:
+        payload = {"session_id": self.session_id, "version": self.version, **self.data}
+        lines = [f"event: {self.type}", f"data: {json.dumps(payload, default=str)}"]
+        if self.version is not None:
+            lines.insert(0, f"id: {self.version}")
+        return "\n".join(lines) + "\n\n"
+
+
+class Subscription:
+    """One connection's queue of pending events.
+
+    Pending events are coalesced by key, and at most ``max_pending`` distinct
+    keys are kept. A client that falls further behind gets a single ``resync``
+    event instead, telling it to refetch.
+    """
+
+    def __init__(self, broker: SessionEventBroker, session_id: int, max_pending: int) -> None:
+        self._broker = broker
+        self.session_id = session_id
+        self.max_pending = max_pending
+        self._pending: dict[Hashable, SessionEvent] = {}
+        self._wakeup = asyncio.Event()
+
+    def push(self, event: SessionEvent) -> None:
+        key = (event.type, event.key)
+        if key in self._pending:
+            del self._pending[key]
+        elif len(self._pending) >= self.max_pending:
+            resync = SessionEvent(type="resync", session_id=self.session_id, version=event.version)
+            self._pending = {("resync", None): resync}
+            self._wakeup.set()
+            return
+        self._pending[key] = event
+        self._wakeup.set()
+
+    async def next_batch(self, timeout: float, coalesce_window: float = 0.0) -> list[SessionEvent]:
+        """Wait up to ``timeout`` seconds for events, then drain everything pending.
+
+        After the first event arrives, waits ``coalesce_window`` more seconds so a
+        burst of writes is delivered as one batch.
+        """
+        if not self._pending:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                return []
+            if coalesce_window > 0:
+                await asyncio.sleep(coalesce_window)
+        self._wakeup.clear()
+        batch = list(self._pending.values())
+        self._pending.clear()
+        return batch
+
+    def close(self) -> None:
+        self._broker.unsubscribe(self)
+
+
+class SessionEventBroker:
+    def __init__(self, max_pending: int) -> None:
+        self.max_pending = max_pending
+        self._subscriptions: dict[int, set[Subscription]] = defaultdict(set)
+
+    def subscribe(self, session_id: int) -> Subscription:
+        subscription = Subscription(self, session_id, self.max_pending)
+        self._subscriptions[session_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscriptions = self._subscriptions.get(subscription.session_id)
+        if subscriptions is None:
+            return
+        subscriptions.discard(subscription)
+        if not subscriptions:
+            del self._subscriptions[subscription.session_id]
+
+    def publish(self, *events: SessionEvent) -> None:
+        for event in events:
+            for subscription in self._subscriptions.get(event.session_id, ()):
+                subscription.push(event)
+
+    def subscriber_count(self, session_id: int) -> int:
+        return len(self._subscriptions.get(session_id, ()))
+
+
+broker = SessionEventBroker(max_pending=settings.session_events_max_pending)
@@ -0,0 +1,26 @@
+"""Per-session version counter used for ETags and change notifications."""
+from __future__ import annotations
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .. import models
+
+
+async def bump(db: AsyncSession, session_id: int) -> int | None:
+    """Increment the session's version within the current transaction.
+
+    Returns the new version, or None if the session does not exist.
+    """
+    result = await db.execute(
+        update(models.Session)
+        .where(models.Session.id == session_id)
+        .values(version=models.Session.version + 1)
+        .returning(models.Session.version)
+    )
+    return result.scalar_one_or_none()
+
+
+async def current(db: AsyncSession, session_id: int) -> int | None:
+    result = await db.execute(select(models.Session.version).where(models.Session.id == session_id))
+    return result.scalar_one_or_none()
@@ -0,0 +1,120 @@
+"""Season standings kept in step with match writes.
+
+``season_standings`` holds one row per (season, player) with the aggregates
+behind ``/seasons/{id}/standings``. Match writes call ``refresh`` with the
+session date and the players whose results may have changed; only those
+players' rows, in the seasons covering that date, are recomputed with one
+grouped INSERT ... SELECT. ``rebuild`` does the same for a whole season after
+its date range changes. Callers commit.
+
+Only matches of COMPLETED sessions count: a match row can exist before it is
+played (e.g. while it is scored live), and its 0-0 is not a draw. Writers that
+record a result complete the session, and changing a session's status
+refreshes its players.
+"""
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Iterable
+
+from sqlalchemy import and_, case, delete, func, insert, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .. import models
+
+STANDING_COLUMNS = (
+    "season_id",
+    "player_id",
+    "matches_played",
+    "wins",
+    "draws",
+    "losses",
+    "points",
+    "goals",
+    "assists",
+    "minutes_played",
+)
+POINTS_FOR_WIN = 3
+POINTS_FOR_DRAW = 1
+
+
+async def refresh(db: AsyncSession, dates: Iterable[datetime], player_ids: Iterable[int]) -> None:
+    """Recompute the standings of ``player_ids`` in every season covering one of ``dates``."""
+    player_ids = set(player_ids)
+    dates = list(dates)
+    if not player_ids or not dates:
+        return
+    seasons_result = await db.execute(
+        select(models.Season.id).where(
+            or_(*(and_(models.Season.starts_at <= day, models.Season.ends_at >= day) for day in dates))
+        )
+    )
+    season_ids = list(seasons_result.scalars().all())
+    if not season_ids:
+        return
+
+    await db.execute(
+        delete(models.SeasonStanding).where(
+            models.SeasonStanding.season_id.in_(season_ids),
+            models.SeasonStanding.player_id.in_(player_ids),
+        ),
+        execution_options={"synchronize_session": False},
+    )
+    await db.execute(
+        insert(models.SeasonStanding).from_select(STANDING_COLUMNS, _aggregate(season_ids, player_ids))
+    )
+
+
+async def rebuild(db: AsyncSession, season_id: int) -> None:
+    """Recompute every standing of a season from the stored matches."""
+    await db.execute(
+        delete(models.SeasonStanding).where(models.SeasonStanding.season_id == season_id),
+        execution_options={"synchronize_session": False},
+    )
+    await db.execute(insert(models.SeasonStanding).from_select(STANDING_COLUMNS, _aggregate([season_id])))
+
+
+async def match_player_ids(db: AsyncSession, session_id: int) -> list[int]:
+    """Players with a stat line in the session's match, if it has one."""
+    result = await db.execute(
+        select(models.PlayerStats.player_id)
+        .join(models.Match, models.Match.id == models.PlayerStats.match_id)
+        .where(models.Match.session_id == session_id)
+    )
+    return list(result.scalars().all())
+
+
+def _aggregate(season_ids: list[int], player_ids: set[int] | None = None):
+    """SELECT producing ``STANDING_COLUMNS`` rows, grouped by season and player."""
+    stats, match, session, season = models.PlayerStats, models.Match, models.Session, models.Season
+    won = or_(
+        and_(stats.team == models.MatchTeam.A, match.score_team_a > match.score_team_b),
+        and_(stats.team == models.MatchTeam.B, match.score_team_b > match.score_team_a),
+    )
+    wins = func.sum(case((won, 1), else_=0))
+    draws = func.sum(case((match.score_team_a == match.score_team_b, 1), else_=0))
+    matches_played = func.count(stats.id)
+
+    stmt = (
+        select(
+            season.id,
+            stats.player_id,
+            matches_played,
+            wins,
+            draws,
+            matches_played - wins - draws,
+            POINTS_FOR_WIN * wins + POINTS_FOR_DRAW * draws,
+            func.sum(stats.goals),
+            func.sum(stats.assists),
+            func.sum(stats.minutes_played),
+        )
+        .select_from(stats)
+        .join(match, match.id == stats.match_id)
+        .join(session, session.id == match.session_id)
+        .join(season, and_(session.date >= season.starts_at, session.date <= season.ends_at))
+        .where(season.id.in_(season_ids), session.status == models.SessionStatus.COMPLETED)
+        .group_by(season.id, stats.player_id)
+    )
+    if player_ids is not None:
+        stmt = stmt.where(stats.player_id.in_(player_ids))
+    return stmt
@@ -1,130 +1,129 @@
 """Service for session template operations."""
 from __future__ import annotations
 
-from datetime import datetime, time, timedelta, timezone
-from typing import Optional
+from datetime import date, datetime, timezone
+from typing import Iterable, Optional
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
 
 from .. import models
+from ..core.dates import as_utc
+from ..db import dialect_insert
+from . import recurrence
+from .session_counts import invalidate_session_counts
+
+# Upper bound on the occurrences expanded from one template.
+MAX_RECURRING_SESSIONS = 200
 
 
 class TemplateService:
+    @staticmethod
+    def session_datetime(template: models.SessionTemplate, date: datetime) -> datetime:
+        """Combine the day of ``date`` with the template's time of day (naive means UTC)."""
+        if date.tzinfo is None:
+            date = date.replace(tzinfo=timezone.utc)
+        return datetime.combine(date.date(), template.time_of_day, tzinfo=date.tzinfo)
+
+    @staticmethod
+    def recurring_dates(
+        template: models.SessionTemplate,
+        limit: Optional[int] = MAX_RECURRING_SESSIONS,
+        after: Optional[date] = None,
+        until: Optional[date] = None,
+        rule_text: Optional[str] = None,
+    ) -> list[datetime]:
+        """Expand the template's recurrence into session datetimes, in memory.
+
+        Occurrences run from ``recurrence_start`` to ``recurrence_end`` (or
+        ``until``, if earlier), skipping those on or before ``after``.
+        ``rule_text`` replaces the template's own rule. ``limit=None`` needs
+        an end to expand up to.
+        """
+        schedule = recurrence.template_schedule(template, rule_text)
+        if schedule is None:
+            return []
+        rule, start = schedule
+        end = template.recurrence_end.date() if template.recurrence_end else None
+        if until is not None and (end is None or until < end):
+            end = until
+        days = recurrence.expand(rule, start, end=end, limit=limit, after=after)
+        return [datetime.combine(day, template.time_of_day, tzinfo=timezone.utc) for day in days]
+
+    @staticmethod
+    async def insert_sessions(
+        template: models.SessionTemplate,
+        dates: Iterable[datetime],
+        db: AsyncSession,
+        max_players: Optional[int] = None,
+    ) -> list[models.Session]:
+        """Insert a session per date with one INSERT ... ON CONFLICT DO NOTHING RETURNING.
+
+        Days that already have a session from this template, at any time, are
+        skipped by the unique (template_id, session_day) index, so changing
+        the template's time and generating again adds nothing. Returns the new
+        sessions by date. Callers commit.
+        """
+        by_day: dict[date, datetime] = {}
+        for value in dates:
+            session_date = TemplateService.session_datetime(template, value)
+            by_day.setdefault(as_utc(session_date).date(), session_date)
+        if not by_day:
+            return []
+        stmt = dialect_insert(db, models.Session).values(
+            [
+                {
+                    "date": session_date,
+                    "session_day": session_day,
+                    "location": template.location,
+                    "max_players": max_players or template.max_players,
+                    "template_id": template.id,
+                    "status": models.SessionStatus.PLANNED,
+                }
+                for session_day, session_date in by_day.items()
+            ]
+        )
+        stmt = stmt.on_conflict_do_nothing(
+            index_elements=[models.Session.template_id, models.Session.session_day]
+        ).returning(models.Session)
+        result = await db.scalars(stmt)
+        return sorted(result.all(), key=lambda session: session.date)
+
     @staticmethod
     async def create_session_from_template(
         template: models.SessionTemplate,
         date: datetime,
         db: AsyncSession,
         max_players: Optional[int] = None,
-    ) -> models.Session:
-        """Create a single session from a template."""
-        # Combine the date with the template's time
-        # Ensure timezone awareness
-        if date.tzinfo is None:
-            date = date.replace(tzinfo=timezone.utc)
-        
-        # Combine date with template time
-        session_datetime = datetime.combine(
-            date.date(),
-            template.time_of_day,
-            tzinfo=date.tzinfo
-        )
-        
-        session = models.Session(
-            date=session_datetime,
-            location=template.location,
-            max_players=max_players or template.max_players,
-            template_id=template.id,
-            status=models.SessionStatus.PLANNED,
-        )
-        db.add(session)
+    ) -> models.Session | None:
+        """Create a single session from a template; None if the template already has one then."""
+        sessions = await TemplateService.insert_sessions(template, [date], db, max_players)
         await db.commit()
-        await db.refresh(session)
-        return session
-    
+        invalidate_session_counts()
+        return sessions[0] if sessions else None
+
+    @staticmethod
+    async def create_sessions_from_template(
+        template: models.SessionTemplate,
+        dates: Iterable[datetime],
+        db: AsyncSession,
+        max_players: Optional[int] = None,
+    ) -> list[models.Session]:
+        """Create sessions for several dates in one transaction, skipping existing ones."""
+        sessions = await TemplateService.insert_sessions(template, dates, db, max_players)
+        await db.commit()
+        invalidate_session_counts()
+        return sessions
+
     @staticmethod
     async def generate_recurring_sessions(
         template: models.SessionTemplate,
         db: AsyncSession,
     ) -> list[models.Session]:
-        """Generate all recurring sessions up to the end date."""
-        if not template.recurrence_type or template.recurrence_type == models.RecurrenceType.NONE:
-            return []
-        
-        if not template.recurrence_start or not template.recurrence_end:
+        """Generate all recurring sessions up to the end date in one transaction."""
+        if recurrence.template_schedule(template) is None:
             return []
-        
-        sessions = []
-        current_date = template.recurrence_start
-        
-        # Get existing session dates to avoid duplicates
-        existing_result = await db.execute(
-            select(models.Session.date).where(
-                models.Session.template_id == template.id
-            )
-        )
-        existing_dates = {d.date() for d in existing_result.scalars().all()}
-        
-        # Calculate date increment based on recurrence type
-        def get_next_date(d: datetime) -> datetime:
-            if template.recurrence_type == models.RecurrenceType.WEEKLY:
-                return d + timedelta(weeks=1)
-            elif template.recurrence_type == models.RecurrenceType.BIWEEKLY:
-                return d + timedelta(weeks=2)
-            elif template.recurrence_type == models.RecurrenceType.MONTHLY:
-                # Add one month
-                if d.month == 12:
-                    return d.replace(year=d.year + 1, month=1)
-                else:
-                    return d.replace(month=d.month + 1)
-            return d
-        
-        # Start from the first occurrence of the day of week
-        if template.day_of_week is not None:
-            # Find first occurrence of the day of week
-            days_ahead = template.day_of_week - current_date.weekday()
-            if days_ahead < 0:
-                days_ahead += 7
-            if days_ahead > 0:
-                current_date = current_date + timedelta(days=days_ahead)
-        
-        # Limit generation to prevent excessive sessions
-        max_sessions = 200
-        session_count = 0
-        
-        # Generate sessions
-        while current_date <= template.recurrence_end and session_count < max_sessions:
-            if current_date.date() not in existing_dates:
-                session = await TemplateService.create_session_from_template(
-                    template, current_date, db, None
-                )
-                sessions.append(session)
-                session_count += 1
-            
-            # Move to next occurrence
-            if template.recurrence_type == models.RecurrenceType.WEEKLY:
-                current_date = current_date + timedelta(weeks=1)
-            elif template.recurrence_type == models.RecurrenceType.BIWEEKLY:
-                current_date = current_date + timedelta(weeks=2)
-            elif template.recurrence_type == models.RecurrenceType.MONTHLY:
-                # Add one month
-                if current_date.month == 12:
-                    current_date = current_date.replace(year=current_date.year + 1, month=1)
-                else:
-                    current_date = current_date.replace(month=current_date.month + 1)
-            
-            # If day of week is specified, ensure we stay on that day
-            if template.day_of_week is not None:
-                days_ahead = template.day_of_week - current_date.weekday()
-                if days_ahead < 0:
-                    days_ahead += 7
-                if days_ahead > 0:
-                    current_date = current_date + timedelta(days=days_ahead)
-        
-        # Update template's last_generated timestamp
+        sessions = await TemplateService.insert_sessions(template, TemplateService.recurring_dates(template), db)
         template.last_generated = datetime.now(timezone.utc)
         await db.commit()
-        
+        invalidate_session_counts()
         return sessions
-
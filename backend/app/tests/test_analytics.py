@@ -0,0 +1,55 @@
+"""Tests for the with/against pair matrix."""
+from datetime import datetime, timezone
+
+from app import models
+from app.models import MatchTeam
+from app.services import analytics
+from app.services.analytics import MatchResult, PairRecord
+
+A, B = MatchTeam.A, MatchTeam.B
+
+
+def test_matrix_counts_both_directions_and_takes_matches_back():
+    """Test pair records from each side, and that removing a match undoes it."""
+    matrix = analytics.PairMatrix()
+    first = MatchResult(((1, A), (2, A), (3, B)), 3, 1)
+    matrix.add(first)
+    matrix.add(MatchResult(((1, A), (3, B)), 0, 0))
+
+    assert matrix.head_to_head(1, 2) == (PairRecord(1, 1, 0, 0, 2), PairRecord())
+    assert matrix.head_to_head(1, 3) == (PairRecord(), PairRecord(2, 1, 1, 0, 2))
+    assert matrix.head_to_head(3, 1) == (PairRecord(), PairRecord(2, 0, 1, 1, -2))
+
+    matrix.add(first, sign=-1)
+    assert matrix.partners(1) == {}
+    assert matrix.opponents(1) == {3: PairRecord(1, 0, 1, 0, 0)}
+
+
+async def test_build_matches_incremental_updates(db_session):
+    """Test a fresh build agrees with a cached matrix kept up to date incrementally."""
+    db_session.add_all(models.Player(id=i, name=f"Player {i}") for i in range(1, 5))
+    session = models.Session(date=datetime(2025, 1, 15, tzinfo=timezone.utc), location="Gym", max_players=10)
+    db_session.add(session)
+    await db_session.flush()
+    match = models.Match(session_id=session.id, score_team_a=2, score_team_b=1)
+    db_session.add(match)
+    await db_session.flush()
+    stats = [
+        models.PlayerStats(match_id=match.id, player_id=i, team=A if i <= 2 else B) for i in range(1, 5)
+    ]
+    db_session.add_all(stats)
+    await db_session.commit()
+
+    cache = analytics.PairAnalytics(ttl=60)
+    cached = await cache.matrix(db_session)
+    assert cached.head_to_head(1, 2)[0] == PairRecord(1, 1, 0, 0, 1)
+
+    before = MatchResult.of(stats, match.score_team_a, match.score_team_b)
+    match.score_team_a = 0
+    stats[1].team = B
+    await db_session.commit()
+    cache.apply(before, MatchResult.of(stats, match.score_team_a, match.score_team_b))
+
+    assert await cache.matrix(db_session) is cached
+    assert cached == await analytics.build(db_session)
+    assert cached.head_to_head(2, 1) == (PairRecord(), PairRecord(1, 1, 0, 0, 1))
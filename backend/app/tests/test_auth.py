@@ -0,0 +1,108 @@
+"""Tests for the authentication endpoints."""
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app import models
+from app.auth import principals
+from app.auth.security import create_access_token, create_refresh_token, decode_token
+from app.db import get_db
+from app.routers import auth
+
+
+@pytest.fixture
+async def client(db_session):
+    app = FastAPI()
+    app.include_router(auth.router)
+    maker = async_sessionmaker(db_session.bind, expire_on_commit=False)
+
+    async def override_get_db():
+        async with maker() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    principals.principal_cache.clear()
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+    principals.principal_cache.clear()
+
+
+@pytest.fixture
+async def user(db_session):
+    user = models.User(email="ana@example.com", username="ana", hashed_password="x")
+    db_session.add(user)
+    await db_session.commit()
+    return user
+
+
+def _claims(user):
+    return {"sub": str(user.id), "email": user.email}
+
+
+async def test_refresh_token_is_not_a_bearer_token(client, user):
+    """Test a refresh token is refused where an access token is expected."""
+    access = create_access_token(_claims(user))
+    response = await client.get("/auth/me", headers={"Authorization": f"Bearer {access}"})
+    assert response.status_code == 200
+    assert response.json()["id"] == user.id
+
+    refresh = create_refresh_token(_claims(user))
+    response = await client.get("/auth/me", headers={"Authorization": f"Bearer {refresh}"})
+    assert response.status_code == 401
+
+
+async def test_refresh_rotates_and_reuse_revokes_every_token(client, db_session, user):
+    """Test a refresh token works once, and presenting it again ends all of the user's sessions."""
+    first = create_refresh_token(_claims(user))
+    response = await client.post("/auth/refresh", json={"refresh_token": first})
+    assert response.status_code == 200
+    second = response.json()["refresh_token"]
+    assert second != first
+    assert await db_session.get(models.RevokedToken, decode_token(first)["jti"]) is not None
+
+    # The reuse rolls back its own writes, then records the revocation.
+    response = await client.post("/auth/refresh", json={"refresh_token": first})
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Refresh token revoked"
+    await db_session.refresh(user)
+    assert user.tokens_revoked_at is not None
+    assert await db_session.scalar(select(func.count()).select_from(models.RevokedToken)) == 1
+
+    # The token handed out by the rotation was issued no later than the revocation.
+    response = await client.post("/auth/refresh", json={"refresh_token": second})
+    assert response.status_code == 401
+    assert await db_session.get(models.RevokedToken, decode_token(second)["jti"]) is None
+
+
+async def test_refresh_rejects_tokens_issued_before_revocation(client, db_session, user):
+    """Test tokens_revoked_at cuts off tokens issued up to and including its second."""
+    user.tokens_revoked_at = datetime.now(timezone.utc) - timedelta(hours=1)
+    await db_session.commit()
+    token = create_refresh_token(_claims(user))
+    assert (await client.post("/auth/refresh", json={"refresh_token": token})).status_code == 200
+
+    token = create_refresh_token(_claims(user))
+    user.tokens_revoked_at = datetime.fromtimestamp(decode_token(token)["iat"], timezone.utc)
+    await db_session.commit()
+    response = await client.post("/auth/refresh", json={"refresh_token": token})
+    assert response.status_code == 401
+    assert await db_session.get(models.RevokedToken, decode_token(token)["jti"]) is None
+
+
+async def test_logout_revokes_the_refresh_token(client, db_session, user):
+    """Test a logged out token cannot refresh, and logging out twice is harmless."""
+    token = create_refresh_token(_claims(user))
+    assert (await client.post("/auth/logout", json={"refresh_token": token})).status_code == 204
+    assert (await client.post("/auth/logout", json={"refresh_token": token})).status_code == 204
+    assert await db_session.get(models.RevokedToken, decode_token(token)["jti"]) is not None
+
+    access = create_access_token(_claims(user))
+    response = await client.post("/auth/logout", json={"refresh_token": access})
+    assert response.status_code == 401
+
+    response = await client.post("/auth/refresh", json={"refresh_token": token})
+    assert response.status_code == 401
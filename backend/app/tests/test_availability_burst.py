@@ -0,0 +1,170 @@
+"""Load test for concurrent sign-ups against session capacity."""
+import asyncio
+import time
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app import models
+from app.models import Base
+from app.services import availability
+
+SIGN_UPS = 200
+CAPACITY = 10
+
+
+@pytest.fixture
+async def session_maker(tmp_path):
+    """File-backed SQLite so concurrent transactions use separate connections."""
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'burst.db'}",
+        connect_args={"timeout": 30},
+        pool_size=20,
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, expire_on_commit=False)
+    await engine.dispose()
+
+
+async def _seed(maker) -> int:
+    async with maker() as db:
+        session = models.Session(
+            date=datetime(2025, 1, 15, 18, 0, tzinfo=timezone.utc),
+            location="Community Gym",
+            max_players=CAPACITY,
+        )
+        db.add(session)
+        db.add_all(models.Player(id=i, name=f"Player {i}") for i in range(1, SIGN_UPS + 1))
+        await db.commit()
+        return session.id
+
+
+async def _set(maker, session_id: int, player_id: int, value: models.Availability) -> None:
+    async with maker() as db:
+        await availability.apply_availability(
+            db, session_id, [availability.AvailabilityChange(player_id=player_id, availability=value)]
+        )
+        await db.commit()
+
+
+async def _roster(maker, session_id: int):
+    async with maker() as db:
+        session = await db.get(models.Session, session_id)
+        result = await db.execute(
+            select(models.SessionPlayer).where(models.SessionPlayer.session_id == session_id)
+        )
+        return session, result.scalars().all()
+
+
+async def test_signup_burst_respects_capacity(session_maker):
+    """Test 200 concurrent sign-ups: exactly CAPACITY confirmed, the rest waitlisted in order."""
+    session_id = await _seed(session_maker)
+
+    started = time.perf_counter()
+    await asyncio.gather(
+        *(_set(session_maker, session_id, pid, models.Availability.YES) for pid in range(1, SIGN_UPS + 1))
+    )
+    elapsed = time.perf_counter() - started
+
+    session, roster = await _roster(session_maker, session_id)
+    confirmed = [sp for sp in roster if sp.waitlist_position is None]
+    waitlisted = sorted(sp.waitlist_position for sp in roster if sp.waitlist_position is not None)
+
+    assert len(roster) == SIGN_UPS
+    assert session.yes_count == len(confirmed) == CAPACITY
+    assert waitlisted == list(range(1, SIGN_UPS - CAPACITY + 1))
+    # Generous bound: on SQLite the per-commit fsync dominates, not lock waits.
+    assert elapsed < 20, f"{SIGN_UPS} sign-ups took {elapsed:.2f}s"
+
+
+async def test_dropouts_promote_waitlist_in_order(session_maker):
+    """Test that confirmed players leaving promote the head of the waitlist."""
+    session_id = await _seed(session_maker)
+    for pid in range(1, 15):
+        await _set(session_maker, session_id, pid, models.Availability.YES)
+
+    await asyncio.gather(*(_set(session_maker, session_id, pid, models.Availability.NO) for pid in (1, 2, 3)))
+
+    session, roster = await _roster(session_maker, session_id)
+    by_player = {sp.player_id: sp for sp in roster}
+    assert session.yes_count == CAPACITY
+    assert all(by_player[pid].waitlist_position is None for pid in (11, 12, 13))
+    assert by_player[14].waitlist_position is not None
+    assert all(by_player[pid].availability == models.Availability.NO for pid in (1, 2, 3))
+
+
+async def test_repeated_yes_is_not_double_counted(session_maker):
+    """Test that re-submitting YES keeps the count and position unchanged."""
+    session_id = await _seed(session_maker)
+    await asyncio.gather(*(_set(session_maker, session_id, 1, models.Availability.YES) for _ in range(20)))
+
+    session, roster = await _roster(session_maker, session_id)
+    assert session.yes_count == 1
+    assert len(roster) == 1
+    assert roster[0].waitlist_position is None
+
+
+async def test_counters_match_rebuild_after_mixed_changes(session_maker):
+    """Test that incrementally maintained counters agree with a full rebuild."""
+    session_id = await _seed(session_maker)
+    values = [models.Availability.YES, models.Availability.MAYBE, models.Availability.NO]
+    await asyncio.gather(
+        *(_set(session_maker, session_id, pid, values[pid % 3]) for pid in range(1, 61))
+    )
+    async with session_maker() as db:
+        await availability.apply_availability(
+            db,
+            session_id,
+            [
+                availability.AvailabilityChange(player_id=3, availability=models.Availability.YES, is_goalkeeper=True),
+                availability.AvailabilityChange(player_id=6, availability=models.Availability.MAYBE),
+                availability.AvailabilityChange(player_id=1, availability=models.Availability.NO),
+            ],
+        )
+        await db.commit()
+
+    maintained, _ = await _roster(session_maker, session_id)
+    async with session_maker() as db:
+        await availability.rebuild_counters(db, [session_id])
+        await db.commit()
+    rebuilt, roster = await _roster(session_maker, session_id)
+
+    counters = [name for name in availability.COUNTERS if name != "waitlist_seq"]
+    assert {n: getattr(maintained, n) for n in counters} == {n: getattr(rebuilt, n) for n in counters}
+    assert rebuilt.yes_count == CAPACITY
+    assert rebuilt.maybe_count == sum(1 for sp in roster if sp.availability == models.Availability.MAYBE)
+    assert rebuilt.goalkeeper_count == sum(
+        1 for sp in roster if sp.is_goalkeeper and sp.availability == models.Availability.YES and sp.waitlist_position is None
+    )
+
+
+async def test_batch_promotes_waitlist_before_new_sign_ups(session_maker):
+    """Test a place freed in a batch goes to the waitlist head, not to a YES later in the batch."""
+    session_id = await _seed(session_maker)
+    for pid in range(1, 13):
+        await _set(session_maker, session_id, pid, models.Availability.YES)
+
+    async with session_maker() as db:
+        result = await availability.apply_availability(
+            db,
+            session_id,
+            [
+                availability.AvailabilityChange(player_id=1, availability=models.Availability.NO),
+                availability.AvailabilityChange(player_id=20, availability=models.Availability.YES),
+                availability.AvailabilityChange(player_id=12, availability=models.Availability.YES),
+            ],
+        )
+        await db.commit()
+    assert [sp.player_id for sp in result.promoted] == [11]
+    assert [sp.player_id for sp in result.records] == [1, 20, 12]
+    assert result.records[1].waitlist_position is not None
+    assert result.records[2].waitlist_position == 2
+
+    session, roster = await _roster(session_maker, session_id)
+    by_player = {sp.player_id: sp for sp in roster}
+    assert session.yes_count == CAPACITY and session.waitlist_count == 2
+    assert by_player[11].waitlist_position is None
+    assert by_player[12].waitlist_position < by_player[20].waitlist_position
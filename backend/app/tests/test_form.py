@@ -0,0 +1,47 @@
+"""Tests for rolling form windows."""
+from datetime import datetime, timedelta, timezone
+
+from app import models
+from app.models import MatchTeam
+from app.services import form, ratings
+
+NOW = datetime(2025, 3, 1, 12, 0, tzinfo=timezone.utc)
+
+
+async def test_windows_cover_last_matches_and_last_days(db_session):
+    """Test the last-N-matches and last-N-days windows from rated matches."""
+    db_session.add_all(models.Player(id=i, name=f"Player {i}") for i in (1, 2))
+    # Oldest first: player 1 wins, loses, then draws; 40, 20 and 5 days ago.
+    results = [(40, 3, 0), (20, 0, 1), (5, 2, 2)]
+    for days_ago, score_a, score_b in results:
+        session = models.Session(date=NOW - timedelta(days=days_ago), location="Gym", max_players=10)
+        db_session.add(session)
+        await db_session.flush()
+        match = models.Match(session_id=session.id, score_team_a=score_a, score_team_b=score_b)
+        db_session.add(match)
+        await db_session.flush()
+        stats = [
+            models.PlayerStats(
+                match_id=match.id, player_id=1, team=MatchTeam.A, goals=score_a, played_at=session.date
+            ),
+            models.PlayerStats(
+                match_id=match.id, player_id=2, team=MatchTeam.B, goals=score_b, played_at=session.date
+            ),
+        ]
+        db_session.add_all(stats)
+        await db_session.flush()
+        await ratings.update_ratings_after_match(db_session, match, stats)
+    await db_session.commit()
+
+    forms = await form.player_form(db_session, [1, 2, 3], matches=2, days=30, now=NOW)
+
+    last_two = forms[1].last_matches
+    assert (last_two.matches, last_two.wins, last_two.draws, last_two.losses) == (2, 0, 1, 1)
+    assert last_two.goals == 2
+    assert forms[1].last_days == last_two
+    rating = await db_session.get(models.PlayerRating, 1)
+    first_delta = rating.overall_rating - ratings.BASE_RATING - last_two.rating_delta
+    assert first_delta > 0
+    # Player 2 won and drew the last two.
+    assert forms[2].last_matches.rating_delta > 0
+    assert forms[3] == form.PlayerForm()
@@ -0,0 +1,78 @@
+"""Tests for token signing keys and the verified-token cache."""
+import time
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from jose import JWTError
+
+from app.auth.keys import Keyring, VerifiedTokenCache
+from app.core.config import Settings
+
+
+def _write_key(directory, kid, private=True):
+    key = ec.generate_private_key(ec.SECP256R1())
+    if private:
+        pem = key.private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+        )
+    else:
+        pem = key.public_key().public_bytes(
+            serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+        )
+    (directory / f"{kid}.pem").write_bytes(pem)
+
+
+def _keyring(directory, kid, **overrides):
+    return Keyring.from_settings(Settings(jwt_keys_dir=str(directory), jwt_signing_kid=kid, **overrides))
+
+
+def test_rotated_keys_keep_verifying_old_tokens(tmp_path):
+    """Test tokens signed by the previous key verify after rotation, and other services get public keys only."""
+    _write_key(tmp_path, "2025-01")
+    old = _keyring(tmp_path, "2025-01")
+    token = old.sign({"sub": "1", "exp": time.time() + 60})
+
+    _write_key(tmp_path, "2025-02")
+    new = _keyring(tmp_path, "2025-02")
+    assert new.verify(token)["sub"] == "1"
+    assert new.verify(new.sign({"sub": "2", "exp": time.time() + 60}))["sub"] == "2"
+    assert {key["kid"] for key in new.jwks()["keys"]} == {"2025-01", "2025-02"}
+    assert all("d" not in key and key["alg"] == "ES256" for key in new.jwks()["keys"])
+
+    (tmp_path / "2025-01.pem").unlink()
+    with pytest.raises(JWTError):
+        _keyring(tmp_path, "2025-02").verify(token)
+
+
+def test_secret_tokens_are_rejected_once_switched_off(tmp_path):
+    """Test kid-less HS256 tokens verify during the switch-over, and not after."""
+    _write_key(tmp_path, "k1")
+    legacy = Keyring.from_settings(Settings(secret_key="s3cret"))
+    token = legacy.sign({"sub": "1", "exp": time.time() + 60})
+
+    assert _keyring(tmp_path, "k1", secret_key="s3cret").verify(token)["sub"] == "1"
+    with pytest.raises(JWTError):
+        _keyring(tmp_path, "k1", secret_key="s3cret", jwt_accept_secret_tokens=False).verify(token)
+
+
+def test_signing_key_must_be_private(tmp_path):
+    """Test a public key cannot be chosen to sign."""
+    _write_key(tmp_path, "public-only", private=False)
+    with pytest.raises(ValueError):
+        _keyring(tmp_path, "public-only")
+
+
+def test_verified_token_cache_honours_exp_and_size():
+    """Test entries expire with their token and the oldest are evicted first."""
+    cache = VerifiedTokenCache(maxsize=2)
+    digests = [cache.digest(f"token-{i}") for i in range(3)]
+    cache.set(digests[0], {"sub": "0", "exp": time.time() - 1})
+    cache.set(digests[1], {"sub": "1", "exp": time.time() + 60})
+    assert cache.get(digests[0]) is None
+    cache.set(digests[2], {"sub": "2", "exp": time.time() + 60})
+    cache.set(digests[0], {"sub": "0", "exp": time.time() + 60})
+    assert cache.get(digests[1]) is None
+    assert cache.get(digests[2])["sub"] == "2"
+    cache.set(cache.digest("no-exp"), {"sub": "3"})
+    assert cache.get(cache.digest("no-exp")) is None
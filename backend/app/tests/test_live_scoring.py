@@ -0,0 +1,248 @@
+"""Tests for write-behind live scoring."""
+from datetime import datetime, timezone
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app import models
+from app.auth.dependencies import get_current_admin_user
+from app.db import get_db
+from app.models import Base
+from app.routers import matches
+from app.services import live_scoring
+from app.services.live_scoring import LiveEvent, LiveScoring, LiveScoringError
+from app.services.match_events import project
+
+
+@pytest.fixture
+async def session_maker():
+    engine = create_async_engine(
+        "sqlite+aiosqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, expire_on_commit=False)
+    await engine.dispose()
+
+
+async def _seed(maker) -> int:
+    async with maker() as db:
+        session = models.Session(
+            date=datetime(2025, 1, 15, 18, 0, tzinfo=timezone.utc),
+            location="Community Gym",
+            max_players=10,
+        )
+        db.add(session)
+        db.add_all(models.Player(id=i, name=f"Player {i}") for i in range(1, 5))
+        await db.flush()
+        match = models.Match(session_id=session.id, score_team_a=0, score_team_b=0)
+        db.add(match)
+        await db.flush()
+        db.add_all(
+            models.PlayerStats(
+                match_id=match.id,
+                player_id=i,
+                team=models.MatchTeam.A if i <= 2 else models.MatchTeam.B,
+            )
+            for i in range(1, 5)
+        )
+        await db.commit()
+        return match.id
+
+
+async def _stored(maker, match_id: int):
+    async with maker() as db:
+        match = await db.get(models.Match, match_id)
+        result = await db.execute(select(models.PlayerStats).where(models.PlayerStats.match_id == match_id))
+        goals = {stat.player_id: stat.goals for stat in result.scalars().all()}
+        return (match.score_team_a, match.score_team_b), goals
+
+
+async def test_taps_are_recorded_and_flushed_in_one_batch(session_maker):
+    """Test taps only reach the stat lines on flush, and a restarted worker replays the rest."""
+    match_id = await _seed(session_maker)
+    live = LiveScoring(flush_interval=60, session_factory=session_maker)
+
+    async with session_maker() as db:
+        for player_id in (1, 1, 3, 2):
+            await live.apply(db, match_id, [LiveEvent("goal", player_id)])
+    assert await _stored(session_maker, match_id) == ((0, 0), {1: 0, 2: 0, 3: 0, 4: 0})
+
+    assert await live.flush() == 1
+    assert await _stored(session_maker, match_id) == ((3, 1), {1: 2, 2: 1, 3: 1, 4: 0})
+
+    # Unflushed taps survive a restart through the match timeline.
+    async with session_maker() as db:
+        await live.apply(db, match_id, [LiveEvent("goal", 4), LiveEvent("goal", 1, delta=-1)])
+    restarted = LiveScoring(flush_interval=60, session_factory=session_maker)
+    assert await restarted.recover() == 1
+    assert restarted.get(match_id).seq == 6
+    await restarted.flush()
+    assert await _stored(session_maker, match_id) == ((2, 2), {1: 1, 2: 1, 3: 1, 4: 1})
+    assert await LiveScoring(flush_interval=60, session_factory=session_maker).recover() == 0
+
+    # The timeline projects to the same goals.
+    async with session_maker() as db:
+        result = await db.execute(
+            select(models.MatchEvent.kind, models.MatchEvent.player_id, models.MatchEvent.team, models.MatchEvent.minute)
+            .where(models.MatchEvent.match_id == match_id)
+            .order_by(models.MatchEvent.seq)
+        )
+        projection = project(result.all())
+    assert (projection.score_team_a, projection.score_team_b) == (2, 2)
+    assert {pid: line.goals for pid, line in projection.lines.items()} == {1: 1, 2: 1, 3: 1, 4: 1}
+
+
+async def test_invalid_tap_changes_nothing(session_maker):
+    """Test a batch with an invalid event is rejected as a whole."""
+    match_id = await _seed(session_maker)
+    live = LiveScoring(flush_interval=60, session_factory=session_maker)
+
+    async with session_maker() as db:
+        with pytest.raises(LiveScoringError):
+            await live.apply(db, match_id, [LiveEvent("goal", 1), LiveEvent("assist", 2, delta=-1)])
+        state = await live.apply(db, match_id, [LiveEvent("goal", 3)])
+
+    assert (state.score_team_a, state.score_team_b, state.seq) == (0, 1, 1)
+    assert state.lines[1].goals == 0
+
+
+async def test_finish_writes_final_state_and_rates(session_maker):
+    """Test finishing a live match writes it, rates it and drops it from memory."""
+    match_id = await _seed(session_maker)
+    live = LiveScoring(flush_interval=60, session_factory=session_maker)
+
+    async with session_maker() as db:
+        await live.apply(db, match_id, [LiveEvent("goal", 1), LiveEvent("assist", 2)])
+        await live.finish(db, match_id)
+
+    assert await _stored(session_maker, match_id) == ((1, 0), {1: 1, 2: 0, 3: 0, 4: 0})
+    assert live.get(match_id) is None
+    async with session_maker() as db:
+        result = await db.execute(select(models.PlayerRating.player_id, models.PlayerRating.overall_rating))
+        ratings = dict(result.all())
+    assert ratings[1] > ratings[3]
+
+
+async def test_finish_twice_rates_once(session_maker):
+    """Test a retried finish returns the finished state without applying ratings again."""
+    match_id = await _seed(session_maker)
+    live = LiveScoring(flush_interval=60, session_factory=session_maker)
+
+    async def stored_ratings():
+        async with session_maker() as db:
+            result = await db.execute(select(models.PlayerRating.player_id, models.PlayerRating.overall_rating))
+            return dict(result.all())
+
+    async with session_maker() as db:
+        await live.apply(db, match_id, [LiveEvent("goal", 1)])
+        await live.finish(db, match_id)
+    after_first = await stored_ratings()
+
+    async with session_maker() as db:
+        again = await live.finish(db, match_id)
+        with pytest.raises(LiveScoringError):
+            await live.apply(db, match_id, [LiveEvent("goal", 3)])
+
+    assert again.finished and (again.score_team_a, again.score_team_b) == (1, 0)
+    assert await stored_ratings() == after_first
+
+
+@pytest.fixture
+async def client(session_maker):
+    app = FastAPI()
+    app.include_router(matches.router)
+
+    async def override_get_db():
+        async with session_maker() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_current_admin_user] = lambda: None
+    live_scoring.live_scoring._matches.clear()
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+    live_scoring.live_scoring._matches.clear()
+
+
+async def test_other_writes_wait_for_finish(client, session_maker):
+    """Test timeline and stat writes are refused while a match is live, and allowed once it is finished."""
+    match_id = await _seed(session_maker)
+    goal = {"events": [{"kind": "goal", "player_id": 3, "team": "B", "minute": 5}]}
+
+    response = await client.post(f"/matches/{match_id}/live/events", json={"events": [{"type": "goal", "player_id": 1}]})
+    assert response.status_code == 200
+    assert (await client.post(f"/matches/{match_id}/events", json=goal)).status_code == 409
+    assert (await client.post(f"/matches/{match_id}/events/rebuild")).status_code == 409
+
+    assert (await client.post(f"/matches/{match_id}/live/finish")).status_code == 200
+    assert (await client.post(f"/matches/{match_id}/events", json=goal)).status_code == 201
+    response = await client.post(f"/matches/{match_id}/events/rebuild")
+    assert response.status_code == 200
+    assert (response.json()["score_team_a"], response.json()["score_team_b"]) == (1, 1)
+
+
+async def test_writes_outside_live_scoring_drop_loaded_state(client, session_maker):
+    """Test state loaded before a match was rebuilt is not flushed over the rebuilt rows."""
+    match_id = await _seed(session_maker)
+    taken_back = {"events": [{"type": "goal", "player_id": 1, "delta": -1}]}
+    assert (await client.post(f"/matches/{match_id}/live/events", json=taken_back)).status_code == 400
+    assert live_scoring.live_scoring.get(match_id) is not None
+
+    goal = {"events": [{"kind": "goal", "player_id": 1, "team": "A", "minute": 5}]}
+    assert (await client.post(f"/matches/{match_id}/events", json=goal)).status_code == 201
+    assert (await client.post(f"/matches/{match_id}/events/rebuild")).status_code == 200
+    assert live_scoring.live_scoring.get(match_id) is None
+
+    response = await client.post(f"/matches/{match_id}/live/events", json={"events": [{"type": "goal", "player_id": 1}]})
+    assert (response.json()["score_team_a"], response.json()["seq"]) == (2, 2)
+
+
+async def test_rebuild_keeps_lines_of_a_live_scored_match(client, session_maker):
+    """Test rebuilding from live taps keeps every player's line and minutes."""
+    match_id = await _seed(session_maker)
+    async with session_maker() as db:
+        result = await db.execute(select(models.PlayerStats).where(models.PlayerStats.match_id == match_id))
+        for stat in result.scalars().all():
+            stat.minutes_played = 60
+        await db.commit()
+
+    taps = {"events": [{"type": "goal", "player_id": 1}, {"type": "assist", "player_id": 2}]}
+    assert (await client.post(f"/matches/{match_id}/live/events", json=taps)).status_code == 200
+    assert (await client.post(f"/matches/{match_id}/live/finish")).status_code == 200
+    response = await client.post(f"/matches/{match_id}/events/rebuild")
+    assert response.status_code == 200
+    assert (response.json()["score_team_a"], response.json()["score_team_b"]) == (1, 0)
+
+    async with session_maker() as db:
+        result = await db.execute(
+            select(
+                models.PlayerStats.player_id,
+                models.PlayerStats.goals,
+                models.PlayerStats.assists,
+                models.PlayerStats.minutes_played,
+            )
+            .where(models.PlayerStats.match_id == match_id)
+            .order_by(models.PlayerStats.player_id)
+        )
+        assert result.all() == [(1, 1, 0, 60), (2, 0, 1, 60), (3, 0, 0, 60), (4, 0, 0, 60)]
+
+
+async def test_finish_refuses_a_match_that_was_never_live(client, session_maker):
+    """Test finishing an untapped match neither rates it nor marks it finished."""
+    match_id = await _seed(session_maker)
+    response = await client.post(f"/matches/{match_id}/live/finish")
+    assert response.status_code == 409
+    assert (await client.post(f"/matches/{match_id + 1}/live/finish")).status_code == 404
+
+    async with session_maker() as db:
+        match = await db.get(models.Match, match_id)
+        assert match.live_finished_at is None
+        result = await db.execute(select(models.PlayerRating.player_id))
+        assert result.all() == []
@@ -0,0 +1,119 @@
+"""Tests for the match event log and its projector."""
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import select
+
+from app import models
+from app.models import MatchEventKind as Kind
+from app.models import MatchTeam
+from app.services import match_events
+from app.services.match_events import NewEvent
+
+
+def test_project_folds_events_in_one_pass():
+    """Test goals, assists, score and minutes from substitutions."""
+    projection = match_events.project(
+        [
+            (Kind.SUB_ON, 1, 1, 0),
+            (Kind.SUB_ON, 2, 2, 0),
+            (Kind.GOAL, 1, 1, 10),
+            (Kind.ASSIST, 3, 1, 10),
+            (Kind.SUB_OFF, 1, 1, 30),
+            (Kind.SUB_ON, 3, 1, 30),
+            (Kind.GOAL, 2, 2, 55),
+            (Kind.FULL_TIME, None, None, 60),
+        ]
+    )
+
+    assert (projection.score_team_a, projection.score_team_b) == (1, 1)
+    lines = {pid: (line.team, line.goals, line.assists, line.minutes_played) for pid, line in projection.lines.items()}
+    assert lines == {
+        1: (MatchTeam.A, 1, 0, 30),
+        2: (MatchTeam.B, 1, 0, 60),
+        3: (MatchTeam.A, 0, 1, 30),
+    }
+
+
+async def test_append_and_rebuild(db_session):
+    """Test events get consecutive seqs and rebuild rewrites the stat lines from them."""
+    session = models.Session(
+        date=datetime(2025, 1, 15, 18, 0, tzinfo=timezone.utc),
+        location="Community Gym",
+        max_players=10,
+    )
+    db_session.add(session)
+    db_session.add_all(models.Player(id=i, name=f"Player {i}") for i in range(1, 4))
+    await db_session.flush()
+    match = models.Match(session_id=session.id, score_team_a=5, score_team_b=5)
+    db_session.add(match)
+    await db_session.flush()
+    # A line for a player who has no events is kept, with its goals taken from the events.
+    db_session.add(models.PlayerStats(match_id=match.id, player_id=3, team=MatchTeam.A, goals=4, minutes_played=30))
+    await db_session.commit()
+
+    first = await match_events.append(
+        db_session,
+        match.id,
+        [NewEvent(Kind.SUB_ON, 1, MatchTeam.A, 0), NewEvent(Kind.SUB_ON, 2, MatchTeam.B, 0)],
+    )
+    second = await match_events.append(
+        db_session,
+        match.id,
+        [NewEvent(Kind.GOAL, 1, MatchTeam.A, 12), NewEvent(Kind.FULL_TIME, minute=40)],
+    )
+    assert [event.seq for event in first + second] == [1, 2, 3, 4]
+    with pytest.raises(match_events.MatchEventError):
+        await match_events.append(db_session, match.id, [NewEvent(Kind.GOAL, 99, MatchTeam.A, 1)])
+    assert await match_events.append(db_session, match.id + 1, [NewEvent(Kind.FULL_TIME, minute=1)]) is None
+
+    stats, _ = await match_events.rebuild_match(db_session, match, session)
+    await db_session.commit()
+
+    assert (match.score_team_a, match.score_team_b) == (1, 0)
+    assert (match.top_scorer_id, match.top_scorer_goals) == (1, 1)
+    result = await db_session.execute(
+        select(models.PlayerStats.player_id, models.PlayerStats.goals, models.PlayerStats.minutes_played)
+        .where(models.PlayerStats.match_id == match.id)
+        .order_by(models.PlayerStats.player_id)
+    )
+    assert result.all() == [(1, 1, 40), (2, 0, 40), (3, 0, 30)]
+    timeline = [event async for event in match_events.timeline(db_session, match.id)]
+    assert [event["kind"] for event in timeline] == ["sub_on", "sub_on", "goal", "full_time"]
+    assert timeline[2] == {"seq": 3, "kind": "goal", "player_id": 1, "team": "A", "minute": 12}
+
+
+async def test_undo_needs_something_to_undo(db_session):
+    """Test a GOAL_UNDONE or ASSIST_UNDONE is refused unless it takes back an earlier goal or assist."""
+    session = models.Session(
+        date=datetime(2025, 1, 15, 18, 0, tzinfo=timezone.utc),
+        location="Community Gym",
+        max_players=10,
+    )
+    db_session.add(session)
+    db_session.add_all(models.Player(id=i, name=f"Player {i}") for i in range(1, 3))
+    await db_session.flush()
+    match = models.Match(session_id=session.id, score_team_a=0, score_team_b=0)
+    db_session.add(match)
+    await db_session.commit()
+
+    with pytest.raises(match_events.MatchEventError):
+        await match_events.append(db_session, match.id, [NewEvent(Kind.GOAL_UNDONE, 1, MatchTeam.A, 3)])
+    with pytest.raises(match_events.MatchEventError):
+        await match_events.append(db_session, match.id, [NewEvent(Kind.ASSIST_UNDONE, 2, MatchTeam.B, 3)])
+    assert [event async for event in match_events.timeline(db_session, match.id)] == []
+
+    await match_events.append(db_session, match.id, [NewEvent(Kind.GOAL, 1, MatchTeam.A, 5)])
+    # The goal can be taken back once, in the same batch as a new one or later.
+    await match_events.append(
+        db_session,
+        match.id,
+        [NewEvent(Kind.GOAL_UNDONE, 1, MatchTeam.A, 6), NewEvent(Kind.GOAL, 1, MatchTeam.A, 7)],
+    )
+    await match_events.append(db_session, match.id, [NewEvent(Kind.GOAL_UNDONE, 1, MatchTeam.A, 8)])
+    with pytest.raises(match_events.MatchEventError):
+        await match_events.append(db_session, match.id, [NewEvent(Kind.GOAL_UNDONE, 1, MatchTeam.A, 9)])
+
+    stats, _ = await match_events.rebuild_match(db_session, match, session)
+    assert (match.score_team_a, match.score_team_b) == (0, 0)
+    assert [(line.player_id, line.goals) for line in stats] == [(1, 0)]
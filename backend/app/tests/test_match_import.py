@@ -0,0 +1,92 @@
+"""Tests for the historical match import."""
+import io
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import func, select
+
+from app import models
+from app.services import match_import, ratings
+
+CSV = """date,location,score_team_a,score_team_b,player_name,team,goals
+2024-03-01T18:00:00Z,Gym,2,1,Ann,A,2
+2024-03-01T18:00:00Z,Gym,2,1,Bob,B,1
+2024-03-08T18:00:00Z,Gym,0,0,Ann,B,0
+2024-03-08T18:00:00Z,Gym,0,0,Bob,A,0
+2024-02-01T18:00:00Z,Gym,0,3,Ann,A,0
+2024-02-01T18:00:00Z,Gym,0,3,Bob,B,3
+"""
+
+
+def test_parse_csv_groups_consecutive_rows():
+    """Test consecutive rows with the same date and location form one match."""
+    matches = list(match_import.parse_csv(io.StringIO(CSV)))
+
+    assert [len(match.stats) for match in matches] == [2, 2, 2]
+    assert matches[0].date == datetime(2024, 3, 1, 18, tzinfo=timezone.utc)
+    assert (matches[0].score_team_a, matches[0].score_team_b) == (2, 1)
+    assert matches[0].stats[0].player_name == "Ann"
+    assert matches[0].stats[0].team == models.MatchTeam.A
+
+
+def test_parse_ndjson_reports_line_numbers():
+    """Test an invalid NDJSON record is reported with its line number."""
+    stream = io.StringIO(
+        '{"date": "2024-03-01T18:00:00Z", "location": "Gym", "score_team_a": 1, "score_team_b": 0,'
+        ' "players": [{"player_id": 1, "team": "A"}]}\n'
+        '{"date": "2024-03-08T18:00:00Z", "location": "Gym", "score_team_a": 1, "score_team_b": 0,'
+        ' "players": [{"player_id": 1, "team": "C"}]}\n'
+    )
+    with pytest.raises(match_import.MatchImportError, match="Line 2: invalid team"):
+        list(match_import.parse_ndjson(stream))
+
+
+async def test_import_replays_ratings_in_date_order(db_session):
+    """Test imported matches replay ratings by date, and a re-run skips them."""
+    importer = match_import.MatchImporter(db_session, batch_size=2)
+    summary = await importer.run(match_import.parse_csv(io.StringIO(CSV)))
+
+    assert (summary.matches_imported, summary.stats_imported, summary.players_created) == (3, 6, 2)
+    assert summary.ratings_replayed == 3
+
+    # Replaying the same matches one by one, oldest first, gives the same ratings.
+    expected = {"Ann": ratings.BASE_RATING, "Bob": ratings.BASE_RATING}
+    history = [
+        (0, 3, [("Ann", models.MatchTeam.A, 0), ("Bob", models.MatchTeam.B, 3)]),
+        (2, 1, [("Ann", models.MatchTeam.A, 2), ("Bob", models.MatchTeam.B, 1)]),
+        (0, 0, [("Ann", models.MatchTeam.B, 0), ("Bob", models.MatchTeam.A, 0)]),
+    ]
+    for score_a, score_b, lines in history:
+        for name, delta in ratings.match_rating_deltas(expected, lines, score_a, score_b).items():
+            expected[name] += delta
+
+    result = await db_session.execute(
+        select(models.Player.name, models.PlayerRating.overall_rating)
+        .join(models.PlayerRating, models.PlayerRating.player_id == models.Player.id)
+        .execution_options(populate_existing=True)
+    )
+    assert dict(result.all()) == pytest.approx(expected)
+
+    rerun = await match_import.MatchImporter(db_session).run(match_import.parse_csv(io.StringIO(CSV)))
+    assert (rerun.matches_imported, rerun.skipped_existing) == (0, 3)
+    assert await db_session.scalar(select(func.count(models.Match.id))) == 3
+
+
+async def test_import_fills_match_summaries(db_session):
+    """Test imported matches get a top scorer and the pre-match team rating sums."""
+    await match_import.MatchImporter(db_session).run(match_import.parse_csv(io.StringIO(CSV)))
+
+    result = await db_session.execute(
+        select(models.Session.date, models.Match)
+        .join(models.Match, models.Match.session_id == models.Session.id)
+        .order_by(models.Session.date)
+        .execution_options(populate_existing=True)
+    )
+    first, second, third = [match for _, match in result.all()]
+    bob = await db_session.scalar(select(models.Player.id).where(models.Player.name == "Bob"))
+
+    assert (first.top_scorer_id, first.top_scorer_goals) == (bob, 3)
+    assert (first.team_a_rating, first.team_b_rating) == (ratings.BASE_RATING, ratings.BASE_RATING)
+    # Bob won the first match, so his side starts the second one stronger.
+    assert second.team_b_rating > second.team_a_rating
+    assert (third.top_scorer_id, third.top_scorer_goals) == (None, 0)
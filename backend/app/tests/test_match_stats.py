@@ -0,0 +1,137 @@
+"""Tests for bulk match stat writes."""
+from datetime import datetime, timezone
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app import models, schemas
+from app.auth.dependencies import get_current_admin_user
+from app.db import get_db
+from app.models import MatchTeam
+from app.routers import matches
+from app.services import match_stats
+
+
+async def _match(db_session) -> models.Match:
+    session = models.Session(
+        date=datetime(2025, 1, 15, 18, 0, tzinfo=timezone.utc),
+        location="Community Gym",
+        max_players=10,
+    )
+    db_session.add(session)
+    db_session.add_all(models.Player(id=i, name=f"Player {i}") for i in range(1, 5))
+    await db_session.flush()
+    db_session.add_all(
+        models.SessionPlayer(session_id=session.id, player_id=i, availability=models.Availability.YES)
+        for i in range(1, 5)
+    )
+    match = models.Match(session_id=session.id, score_team_a=0, score_team_b=0)
+    db_session.add(match)
+    await db_session.commit()
+    return match
+
+
+def _line(player_id: int, goals: int = 0) -> schemas.PlayerStatsCreate:
+    return schemas.PlayerStatsCreate(
+        player_id=player_id, team=MatchTeam.A if player_id <= 2 else MatchTeam.B, goals=goals, minutes_played=40
+    )
+
+
+async def _stored(db_session, match_id: int):
+    result = await db_session.execute(
+        select(models.PlayerStats.player_id, models.PlayerStats.goals)
+        .where(models.PlayerStats.match_id == match_id)
+        .order_by(models.PlayerStats.player_id)
+    )
+    return result.all()
+
+
+async def test_upsert_inserts_updates_and_replaces(db_session):
+    """Test new lines are inserted, existing ones updated in place, and replace drops the rest."""
+    match = await _match(db_session)
+    inserted = await match_stats.upsert_player_stats(db_session, match.id, [_line(3), _line(1, goals=2)])
+    await db_session.commit()
+    assert [stat.player_id for stat in inserted] == [3, 1]
+    assert all(stat.played_at is not None for stat in inserted)
+
+    updated = await match_stats.upsert_player_stats(db_session, match.id, [_line(1, goals=3), _line(2)])
+    await db_session.commit()
+    assert updated[0].id == inserted[1].id and updated[0].goals == 3
+    assert await _stored(db_session, match.id) == [(1, 3), (2, 0), (3, 0)]
+
+    await match_stats.upsert_player_stats(db_session, match.id, [_line(2, goals=1)], replace=True)
+    await db_session.commit()
+    assert await _stored(db_session, match.id) == [(2, 1)]
+
+
+async def test_find_missing_players(db_session):
+    """Test unknown ids are reported once each, in input order."""
+    await _match(db_session)
+    assert await match_stats.find_missing_players(db_session, [9, 1, 7, 9]) == [9, 7]
+    assert await match_stats.find_missing_players(db_session, []) == []
+
+
+@pytest.fixture
+async def client(db_session):
+    app = FastAPI()
+    app.include_router(matches.router)
+    maker = async_sessionmaker(db_session.bind, expire_on_commit=False)
+
+    async def override_get_db():
+        async with maker() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_current_admin_user] = lambda: None
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+
+async def test_complete_rejects_duplicate_and_unknown_players(client, db_session):
+    """Test a stat payload naming a player twice or an unknown player is a 400 and writes nothing."""
+    match = await _match(db_session)
+    line = {"player_id": 1, "team": "A", "goals": 1}
+
+    response = await client.post(
+        f"/matches/{match.id}/complete",
+        json={"score_team_a": 1, "score_team_b": 0, "player_stats": [line, {**line, "goals": 2}]},
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Player 1 is listed twice"
+
+    response = await client.post(
+        f"/matches/{match.id}/complete",
+        json={"score_team_a": 1, "score_team_b": 0, "player_stats": [line, {"player_id": 99, "team": "B"}]},
+    )
+    assert response.status_code == 400
+    assert await _stored(db_session, match.id) == []
+
+    response = await client.post(
+        f"/matches/{match.id}/complete",
+        json={"score_team_a": 1, "score_team_b": 0, "player_stats": [line, {"player_id": 3, "team": "B"}]},
+    )
+    assert response.status_code == 200
+    assert await _stored(db_session, match.id) == [(1, 1), (3, 0)]
+
+
+async def test_update_replaces_the_stat_lines(client, db_session):
+    """Test PUT keeps and updates listed players and deletes the lines it no longer lists."""
+    match = await _match(db_session)
+    await match_stats.upsert_player_stats(db_session, match.id, [_line(1), _line(2), _line(3)])
+    await db_session.commit()
+    payload = {
+        "session_id": match.session_id,
+        "score_team_a": 0,
+        "score_team_b": 2,
+        "player_stats": [{"player_id": 3, "team": "B", "goals": 2}, {"player_id": 4, "team": "B"}],
+    }
+
+    response = await client.put(f"/matches/{match.id}", json=payload)
+    assert response.status_code == 200
+    assert await _stored(db_session, match.id) == [(3, 2), (4, 0)]
+
+    duplicated = {**payload, "player_stats": payload["player_stats"] + [{"player_id": 4, "team": "B"}]}
+    assert (await client.put(f"/matches/{match.id}", json=duplicated)).status_code == 422
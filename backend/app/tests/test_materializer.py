@@ -0,0 +1,107 @@
+"""Tests for the rolling-horizon session materializer."""
+from datetime import date, datetime, time, timedelta, timezone
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app import models
+from app.services import leases
+from app.services.materializer import LEASE_NAME, SessionMaterializer
+
+
+def _materializer(db_session, **kwargs):
+    factory = async_sessionmaker(db_session.bind, expire_on_commit=False)
+    return SessionMaterializer(horizon_weeks=4, interval=60, batch_size=1, session_factory=factory, **kwargs)
+
+
+async def _session_dates(db_session, template_id):
+    result = await db_session.execute(
+        select(models.Session.date).where(models.Session.template_id == template_id).order_by(models.Session.date)
+    )
+    return [session_date.date() for session_date in result.scalars()]
+
+
+async def test_materializer_keeps_sessions_up_to_the_horizon(db_session):
+    """Test sessions are created from today to the horizon, then only the newly uncovered week."""
+    weekly = models.SessionTemplate(
+        name="Tuesday futsal",
+        location="Community Gym",
+        time_of_day=time(19, 30),
+        max_players=10,
+        recurrence_rule="FREQ=WEEKLY;BYDAY=TU",
+        recurrence_start=datetime(2025, 1, 1, tzinfo=timezone.utc),
+    )
+    inactive = models.SessionTemplate(
+        name="Old league",
+        location="Park",
+        time_of_day=time(10),
+        max_players=10,
+        recurrence_type=models.RecurrenceType.WEEKLY,
+        day_of_week=5,
+        recurrence_start=datetime(2025, 1, 1, tzinfo=timezone.utc),
+        active=False,
+    )
+    db_session.add_all([weekly, inactive])
+    await db_session.commit()
+    materializer = _materializer(db_session)
+
+    # Wednesday 2025-03-05: past Tuesdays are not backfilled.
+    assert await materializer.run_once(today=date(2025, 3, 5)) == 4
+    assert await _session_dates(db_session, weekly.id) == [
+        date(2025, 3, 11), date(2025, 3, 18), date(2025, 3, 25), date(2025, 4, 1)
+    ]
+    await db_session.refresh(weekly)
+    assert weekly.last_generated.date() == date(2025, 4, 2)
+
+    # Same day again: nothing left to do. A week later: one more Tuesday.
+    assert await materializer.run_once(today=date(2025, 3, 5)) == 0
+    assert await materializer.run_once(today=date(2025, 3, 12)) == 1
+    assert (await _session_dates(db_session, weekly.id))[-1] == date(2025, 4, 8)
+    assert await _session_dates(db_session, inactive.id) == []
+
+
+async def test_materializer_runs_on_one_replica_at_a_time(db_session):
+    """Test only the lease holder materializes until the lease expires or is released."""
+    first = _materializer(db_session)
+    second = _materializer(db_session)
+
+    assert await first.run_once(today=date(2025, 3, 5)) == 0
+    assert await second.run_once(today=date(2025, 3, 5)) is None
+    assert await first.run_once(today=date(2025, 3, 5)) == 0
+
+    async with first.session_factory() as db:
+        await leases.release(db, LEASE_NAME, first.holder)
+    assert await second.run_once(today=date(2025, 3, 5)) == 0
+    assert await first.run_once(today=date(2025, 3, 5)) is None
+
+    lease = await db_session.get(models.SchedulerLease, LEASE_NAME)
+    await db_session.refresh(lease)
+    assert lease.holder == second.holder
+
+    # A lease that ran out is taken over without a release.
+    lease.expires_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+    await db_session.commit()
+    assert await first.run_once(today=date(2025, 3, 5)) == 0
+    assert await db_session.scalar(select(func.count()).select_from(models.SchedulerLease)) == 1
+
+
+async def test_materializer_skips_days_already_taken_at_another_time(db_session):
+    """Test a template whose time changed is not given a second session on an already materialized day."""
+    template = models.SessionTemplate(
+        name="Tuesday futsal",
+        location="Community Gym",
+        time_of_day=time(19, 30),
+        max_players=10,
+        recurrence_rule="FREQ=WEEKLY;BYDAY=TU",
+        recurrence_start=datetime(2025, 1, 1, tzinfo=timezone.utc),
+    )
+    db_session.add(template)
+    await db_session.commit()
+    materializer = _materializer(db_session)
+    assert await materializer.run_once(today=date(2025, 3, 5)) == 4
+
+    template.time_of_day = time(21)
+    template.last_generated = None
+    await db_session.commit()
+    assert await materializer.run_once(today=date(2025, 3, 5)) == 0
+    assert len(await _session_dates(db_session, template.id)) == 4
@@ -0,0 +1,70 @@
+"""Tests for session list keyset cursors and cached totals."""
+from datetime import datetime, time, timedelta, timezone
+
+import httpx
+import pytest
+from fastapi import FastAPI, HTTPException
+
+from app import models
+from app.core.pagination import encode_cursor, parse_cursor
+from app.db import get_db
+from app.routers import sessions
+from app.services.template_service import TemplateService
+
+
+@pytest.fixture
+async def client(db_session):
+    app = FastAPI()
+    app.include_router(sessions.router)
+
+    async def override_get_db():
+        yield db_session
+
+    app.dependency_overrides[get_db] = override_get_db
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+
+def test_cursor_is_url_safe():
+    """Test cursors of aware datetimes survive a query string without percent-encoding."""
+    date = datetime(2024, 3, 1, 19, 30, tzinfo=timezone(timedelta(hours=1)))
+    cursor = encode_cursor(date, 42)
+    assert all(char.isalnum() or char in "-_" for char in cursor)
+    assert parse_cursor(cursor) == (date, 42)
+    with pytest.raises(HTTPException):
+        parse_cursor("2024-03-01T19:30:00 01:00,42")
+
+
+async def test_pages_follow_the_next_cursor(client, db_session):
+    """Test walking the list with the raw X-Next-Cursor value in the query string."""
+    start = datetime(2024, 3, 1, 19, 30, tzinfo=timezone.utc)
+    db_session.add_all(
+        models.Session(date=start + timedelta(days=day), location="Pitch", max_players=10) for day in range(3)
+    )
+    await db_session.commit()
+
+    seen = []
+    url = "/sessions?limit=2"
+    while url:
+        response = await client.get(url)
+        assert response.status_code == 200
+        seen += [session["id"] for session in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        url = f"/sessions?limit=2&after={cursor}" if cursor else None
+    assert len(seen) == 3 and seen == sorted(seen)
+
+
+async def test_total_count_sees_template_sessions(client, db_session):
+    """Test sessions inserted outside the sessions router invalidate the cached total."""
+    template = models.SessionTemplate(name="Tuesday", location="Pitch", time_of_day=time(19, 30), max_players=10)
+    db_session.add(template)
+    await db_session.commit()
+
+    response = await client.get("/sessions?include_total=true")
+    assert response.headers["X-Total-Count"] == "0"
+
+    await TemplateService.create_sessions_from_template(
+        template, [datetime(2024, 3, 5, tzinfo=timezone.utc), datetime(2024, 3, 12, tzinfo=timezone.utc)], db_session
+    )
+    response = await client.get("/sessions?include_total=true")
+    assert response.headers["X-Total-Count"] == "2"
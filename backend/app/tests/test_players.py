@@ -0,0 +1,91 @@
+"""Tests for the player list ETag."""
+from datetime import datetime, timezone
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app import models
+from app.auth.dependencies import get_current_admin_user
+from app.db import get_db
+from app.routers import players
+from app.services import ratings
+
+
+@pytest.fixture
+async def client(db_session):
+    app = FastAPI()
+    app.include_router(players.router)
+    maker = async_sessionmaker(db_session.bind, expire_on_commit=False)
+
+    async def override_get_db():
+        async with maker() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_current_admin_user] = lambda: None
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+
+async def _etag(client, **params):
+    response = await client.get("/players", params=params)
+    assert response.status_code == 200
+    return response.headers["ETag"]
+
+
+async def test_unchanged_list_is_one_lookup(client, db_session):
+    """Test a matching If-None-Match gets a 304 after a single primary-key read."""
+    for name in ("Ana", "Bea"):
+        assert (await client.post("/players", json={"name": name})).status_code == 201
+    etag = await _etag(client)
+    assert etag != await _etag(client, active=True)
+
+    statements = []
+    sync_engine = db_session.bind.sync_engine
+
+    def listener(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(sync_engine, "before_cursor_execute", listener)
+    try:
+        response = await client.get("/players", headers={"If-None-Match": etag})
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", listener)
+    assert response.status_code == 304
+    assert len(statements) == 1 and "resource_versions" in statements[0]
+
+
+async def test_player_and_rating_writes_move_the_etag(client, db_session):
+    """Test edits, deletes and a zero-sum Elo exchange each change the ETag."""
+    ana = (await client.post("/players", json={"name": "Ana"})).json()
+    bea = (await client.post("/players", json={"name": "Bea"})).json()
+    etag = await _etag(client)
+
+    response = await client.put(f"/players/{ana['id']}", json={"name": "Ana Maria"})
+    assert response.status_code == 200
+    renamed = await _etag(client)
+    assert renamed != etag
+
+    session = models.Session(date=datetime(2025, 1, 15, 18, tzinfo=timezone.utc), location="Gym", max_players=10)
+    db_session.add(session)
+    await db_session.flush()
+    match = models.Match(session_id=session.id, score_team_a=1, score_team_b=0)
+    db_session.add(match)
+    await db_session.flush()
+    db_session.add_all(
+        [
+            models.PlayerStats(match_id=match.id, player_id=ana["id"], team=models.MatchTeam.A),
+            models.PlayerStats(match_id=match.id, player_id=bea["id"], team=models.MatchTeam.B),
+        ]
+    )
+    await db_session.flush()
+    await ratings.update_ratings_after_match(db_session, match)
+    await db_session.commit()
+    rated = await _etag(client)
+    assert rated != renamed
+
+    assert (await client.delete(f"/players/{bea['id']}")).status_code == 200
+    assert await _etag(client) != rated
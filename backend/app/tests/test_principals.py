@@ -0,0 +1,72 @@
+"""Tests for the authenticated principal cache."""
+import dataclasses
+
+import pytest
+from sqlalchemy import event
+
+from app import models
+from app.auth import principals
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    principals.principal_cache.clear()
+    yield
+    principals.principal_cache.clear()
+
+
+async def _user(db_session, **fields):
+    user = models.User(email="ana@example.com", username="ana", hashed_password="x", **fields)
+    db_session.add(user)
+    await db_session.flush()
+    db_session.add(models.Player(name="Ana", user_id=user.id))
+    await db_session.commit()
+    return user
+
+
+async def test_principal_is_loaded_once_per_token(db_session):
+    """Test the snapshot is fetched with one query, then served from the cache for the same iat."""
+    user = await _user(db_session)
+    queries = []
+    sync_engine = db_session.bind.sync_engine
+
+    def listener(conn, cursor, statement, *args):
+        queries.append(statement)
+
+    event.listen(sync_engine, "before_cursor_execute", listener)
+    try:
+        first = await principals.load(db_session, user.id, 1000)
+        again = await principals.load(db_session, user.id, 1000)
+        await principals.load(db_session, user.id, 2000)
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", listener)
+
+    assert len(queries) == 2
+    assert again is first
+    assert first.player_id is not None and not first.is_admin
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        first.is_admin = True
+    assert not hasattr(first, "__dict__")
+
+
+async def test_invalidate_drops_every_token_of_the_user(db_session):
+    """Test a role change is visible on the next request for all of the user's tokens."""
+    user = await _user(db_session)
+    await principals.load(db_session, user.id, 1000)
+    await principals.load(db_session, user.id, 2000)
+
+    user.is_admin = True
+    await db_session.commit()
+    assert not (await principals.load(db_session, user.id, 1000)).is_admin
+
+    await principals.invalidate(db_session, user.id)
+    assert (await principals.load(db_session, user.id, 1000)).is_admin
+    assert (await principals.load(db_session, user.id, 2000)).is_admin
+
+
+async def test_deleted_user_has_no_principal(db_session):
+    """Test soft-deleted users do not resolve."""
+    from datetime import datetime, timezone
+
+    user = await _user(db_session, deleted_at=datetime.now(timezone.utc))
+    assert await principals.load(db_session, user.id, 1000) is None
@@ -0,0 +1,109 @@
+"""Tests for the rate limiting middleware and its backends."""
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.auth.security import create_access_token
+from app.core.rate_limit import DatabaseBackend, Limit, MemoryBackend, RateLimitMiddleware, Rules
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_rules_prefer_exact_routes_then_longest_prefix():
+    """Test route matching and rejection of malformed limits."""
+    rules = Rules(
+        {
+            "POST /auth/login": "ip=20/minute, email=5/minute",
+            "POST|PUT /*": "ip=600/minute",
+            "POST /sessions/*": "account=10/second",
+        }
+    )
+    assert rules.match("POST", "/auth/login/").limits == {"ip": Limit(20, 60.0), "email": Limit(5, 60.0)}
+    assert rules.match("POST", "/sessions/4/availability").limits == {"account": Limit(10, 1.0)}
+    assert rules.match("PUT", "/players/1").limits == {"ip": Limit(600, 60.0)}
+    assert rules.match("GET", "/players/1") is None
+    with pytest.raises(ValueError):
+        Rules({"POST /x": "user=5/minute"})
+    with pytest.raises(ValueError):
+        Limit.parse("5/fortnight")
+
+
+@pytest.mark.parametrize("shared", [False, True])
+async def test_bucket_allows_a_burst_then_refills_steadily(db_session, shared):
+    """Test both backends let ``count`` through at once, then one per interval."""
+    clock = Clock()
+    if shared:
+        factory = async_sessionmaker(db_session.bind, expire_on_commit=False)
+        backend, other_replica = DatabaseBackend(factory, clock), DatabaseBackend(factory, clock)
+    else:
+        backend = other_replica = MemoryBackend(max_keys=100, clock=clock)
+    limit = Limit(3, 60.0)
+
+    assert [await backend.take("ip:a", limit) for _ in range(2)] == [0.0, 0.0]
+    assert await other_replica.take("ip:a", limit) == 0.0
+    assert await backend.take("ip:a", limit) == pytest.approx(20.0)
+    assert await backend.take("ip:b", limit) == 0.0
+
+    clock.now += 20
+    assert await other_replica.take("ip:a", limit) == 0.0
+    assert await backend.take("ip:a", limit) == pytest.approx(20.0)
+    clock.now += 60
+    assert [await backend.take("ip:a", limit) for _ in range(3)] == [0.0, 0.0, 0.0]
+
+
+async def test_memory_backend_drops_expired_keys_lazily():
+    """Test keys whose bucket is full again are swept, and live keys stay bounded."""
+    clock = Clock()
+    backend = MemoryBackend(max_keys=8, clock=clock)
+    limit = Limit(1, 1.0)
+    for i in range(8):
+        await backend.take(f"k{i}", limit)
+    clock.now += 2
+    await backend.take("fresh", limit)
+    assert len(backend) == 1
+
+    for i in range(100):
+        await backend.take(f"flood{i}", limit)
+    assert len(backend) <= 8
+
+
+def _client(backend):
+    app = FastAPI()
+
+    @app.post("/auth/login")
+    async def login(body: dict):
+        return body
+
+    @app.post("/sessions/{session_id}")
+    async def write(session_id: int):
+        return {"session_id": session_id}
+
+    rules = Rules({"POST /auth/login": "ip=10/minute, email=2/minute", "POST /sessions/*": "account=1/minute"})
+    app.add_middleware(RateLimitMiddleware, rules=rules, backend=backend)
+    return TestClient(app)
+
+
+def test_middleware_limits_by_email_and_by_token_subject():
+    """Test login attempts are counted per email (body still reaches the app) and writes per user."""
+    client = _client(MemoryBackend(max_keys=100))
+
+    for _ in range(2):
+        response = client.post("/auth/login", json={"email": "Ana@example.com", "password": "x"})
+        assert response.status_code == 200 and response.json()["email"] == "Ana@example.com"
+    response = client.post("/auth/login", json={"email": "ana@example.com ", "password": "x"})
+    assert response.status_code == 429
+    assert int(response.headers["retry-after"]) == 30
+    assert client.post("/auth/login", json={"email": "bo@example.com", "password": "x"}).status_code == 200
+
+    first = {"Authorization": "Bearer " + create_access_token({"sub": "1"})}
+    second = {"Authorization": "Bearer " + create_access_token({"sub": "2"})}
+    assert client.post("/sessions/1", headers=first).status_code == 200
+    assert client.post("/sessions/2", headers=first).status_code == 429
+    assert client.post("/sessions/2", headers=second).status_code == 200
@@ -0,0 +1,62 @@
+"""Tests for the recurrence rule engine."""
+from datetime import date, datetime, time, timezone
+
+import pytest
+
+from app import models
+from app.services import recurrence
+from app.services.recurrence import RecurrenceError, expand, parse
+
+
+def test_monthly_skips_missing_days_instead_of_failing():
+    """Test a monthly rule on the 31st only lands in months that have one."""
+    dates = expand(parse("FREQ=MONTHLY;COUNT=4"), date(2025, 1, 31))
+
+    assert dates == [date(2025, 1, 31), date(2025, 3, 31), date(2025, 5, 31), date(2025, 7, 31)]
+
+
+def test_byday_ordinals_bysetpos_and_exdate():
+    """Test nth weekdays, last working day of the month and excluded dates."""
+    assert expand(parse("FREQ=MONTHLY;BYDAY=2TU,-1FR;UNTIL=20250228"), date(2025, 1, 1)) == [
+        date(2025, 1, 14),
+        date(2025, 1, 31),
+        date(2025, 2, 11),
+        date(2025, 2, 28),
+    ]
+    rule = parse("RRULE:FREQ=MONTHLY;BYDAY=MO,TU,WE,TH,FR;BYSETPOS=-1\nEXDATE:20250228")
+    assert expand(rule, date(2025, 1, 1), end=date(2025, 4, 30)) == [
+        date(2025, 1, 31),
+        date(2025, 3, 31),
+        date(2025, 4, 30),
+    ]
+
+
+def test_weekly_interval_and_incremental_expansion():
+    """Test every other Monday and Thursday, and resuming after a date."""
+    rule = parse("FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,TH")
+    dates = expand(rule, date(2025, 1, 1), limit=5)
+
+    assert dates == [date(2025, 1, 2), date(2025, 1, 13), date(2025, 1, 16), date(2025, 1, 27), date(2025, 1, 30)]
+    assert expand(rule, date(2025, 1, 1), limit=2, after=date(2025, 1, 16)) == dates[3:]
+
+
+@pytest.mark.parametrize(
+    "text",
+    ["FREQ=HOURLY", "FREQ=WEEKLY;BYDAY=2MO", "FREQ=DAILY;COUNT=2;UNTIL=20250101", "FREQ=DAILY;BYHOUR=9", "EXDATE:20250101"],
+)
+def test_invalid_rules_are_rejected(text):
+    with pytest.raises(RecurrenceError):
+        parse(text)
+
+
+def test_legacy_biweekly_template_counts_from_first_occurrence():
+    """Test templates without a rule keep their old recurrence."""
+    template = models.SessionTemplate(
+        time_of_day=time(19, 0),
+        day_of_week=0,
+        recurrence_type=models.RecurrenceType.BIWEEKLY,
+        recurrence_start=datetime(2025, 1, 1, tzinfo=timezone.utc),
+    )
+    rule, start = recurrence.template_schedule(template)
+
+    assert expand(rule, start, limit=3) == [date(2025, 1, 6), date(2025, 1, 20), date(2025, 2, 3)]
@@ -0,0 +1,22 @@
+"""Tests for refresh token revocation."""
+from datetime import datetime, timedelta, timezone
+
+from app import models
+from app.auth.revocation import RevocationList
+
+
+async def test_revoke_wins_once_and_purges_expired_rows(db_session):
+    """Test only the first revocation of a jti reports success, and expired revocations are cleared."""
+    user = models.User(email="ana@example.com", username="ana", hashed_password="x")
+    db_session.add(user)
+    await db_session.commit()
+    db_session.add(models.RevokedToken(jti="old", user_id=user.id, expires_at=datetime(2020, 1, 1)))
+    await db_session.commit()
+    expires_at = datetime.now(timezone.utc) + timedelta(days=7)
+    revocations = RevocationList(purge_seconds=300)
+
+    assert await revocations.revoke(db_session, "used", user.id, expires_at)
+    assert not await revocations.revoke(db_session, "used", user.id, expires_at)
+    await db_session.commit()
+    assert await db_session.get(models.RevokedToken, "used") is not None
+    assert await db_session.get(models.RevokedToken, "old") is None
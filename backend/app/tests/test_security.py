@@ -0,0 +1,52 @@
+"""Tests for password hashing off the event loop."""
+import asyncio
+import threading
+
+import pytest
+
+from app.auth import security
+from app.auth.security import PasswordHasher, PasswordHasherBusy, get_password_hash, needs_rehash
+from app.core.config import settings
+
+
+async def test_hasher_runs_bcrypt_in_its_own_threads():
+    """Test hashing and verification run off the event loop thread and round-trip."""
+    hasher = PasswordHasher(workers=2, max_pending=4)
+    threads = []
+    original = security.verify_password
+
+    def recording_verify(plain, hashed):
+        threads.append(threading.current_thread().name)
+        return original(plain, hashed)
+
+    security.verify_password = recording_verify
+    try:
+        hashed = await hasher.hash("correct horse")
+        assert await hasher.verify("correct horse", hashed)
+        assert not await hasher.verify("wrong horse", hashed)
+    finally:
+        security.verify_password = original
+        hasher.shutdown()
+    assert threads and all(name.startswith("bcrypt") for name in threads)
+
+
+async def test_hasher_rejects_calls_beyond_max_pending():
+    """Test a full queue fails fast instead of waiting, and frees up once hashes finish."""
+    hasher = PasswordHasher(workers=1, max_pending=2)
+    try:
+        pending = [asyncio.create_task(hasher.hash("secret")) for _ in range(2)]
+        await asyncio.sleep(0)
+        with pytest.raises(PasswordHasherBusy):
+            await hasher.hash("secret")
+        await asyncio.gather(*pending)
+        assert hasher.pending == 0
+        assert await hasher.verify("secret", pending[0].result())
+    finally:
+        hasher.shutdown()
+
+
+def test_needs_rehash_compares_the_work_factor():
+    """Test only hashes made at another cost are flagged for upgrade."""
+    assert not needs_rehash(get_password_hash("secret"))
+    assert needs_rehash(get_password_hash("secret", rounds=settings.bcrypt_rounds - 1))
+    assert not needs_rehash("not-a-bcrypt-hash")
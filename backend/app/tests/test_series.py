@@ -0,0 +1,112 @@
+"""Tests for template series operations."""
+from datetime import datetime, time, timezone
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+
+from app import models
+from app.services import series
+from app.services.template_service import TemplateService
+
+
+@pytest.fixture
+async def weekly_series(db_session):
+    template = models.SessionTemplate(
+        name="Tuesday futsal",
+        location="Community Gym",
+        time_of_day=time(19, 30),
+        max_players=10,
+        recurrence_rule="FREQ=WEEKLY;BYDAY=TU;COUNT=8",
+        recurrence_start=datetime(2030, 1, 1, tzinfo=timezone.utc),
+    )
+    db_session.add(template)
+    await db_session.commit()
+    sessions = await TemplateService.generate_recurring_sessions(template, db_session)
+    # A played session and a cancelled one are not part of the series.
+    db_session.add(models.Match(session_id=sessions[1].id, score_team_a=1, score_team_b=0))
+    sessions[2].status = models.SessionStatus.CANCELLED
+    await db_session.commit()
+    return template, sessions
+
+
+async def _series(db_session, template):
+    return await series.series_sessions(db_session, template.id, datetime(2030, 1, 1, tzinfo=timezone.utc))
+
+
+async def test_preview_matches_applied_cancel(db_session, weekly_series):
+    """Test the preview lists exactly the sessions one UPDATE then cancels."""
+    template, sessions = weekly_series
+    editable = await _series(db_session, template)
+    assert [session.id for session in editable] == [sessions[0].id] + [session.id for session in sessions[3:]]
+
+    preview = await series.cancel(db_session, editable, apply=False)
+    assert all(change.new_status == models.SessionStatus.CANCELLED for change in preview)
+    assert await db_session.scalar(
+        select(func.count()).where(models.Session.status == models.SessionStatus.CANCELLED)
+    ) == 1
+
+    applied = await series.cancel(db_session, editable, apply=True)
+    await db_session.commit()
+    assert applied == preview
+    cancelled = await db_session.scalar(
+        select(func.count()).where(models.Session.status == models.SessionStatus.CANCELLED)
+    )
+    assert cancelled == 1 + len(preview)
+    assert await _series(db_session, template) == []
+
+
+async def test_move_time_flags_conflicts_and_keeps_the_day(db_session, weekly_series):
+    """Test sessions move to the new time on their own day, refusing to put two on one day."""
+    template, sessions = weekly_series
+    template_id = template.id
+    # The template cannot have a second session on a day, whatever its time.
+    db_session.add(
+        models.Session(
+            date=datetime(2030, 1, 29, 21, 0, tzinfo=timezone.utc),
+            location="Community Gym",
+            max_players=10,
+            template_id=template_id,
+            status=models.SessionStatus.CANCELLED,
+        )
+    )
+    with pytest.raises(IntegrityError):
+        await db_session.commit()
+    await db_session.rollback()
+    await db_session.refresh(template)
+
+    editable = await _series(db_session, template)
+    changes = await series.move_time(db_session, template_id, editable + editable[2:3], time(21), apply=False)
+    assert [change.conflict for change in changes] == [False] * len(editable) + [True]
+    with pytest.raises(series.SeriesError):
+        await series.move_time(db_session, template_id, editable + editable[2:3], time(21), apply=True)
+
+    changes = await series.move_time(db_session, template.id, await _series(db_session, template), time(20), apply=True)
+    await db_session.commit()
+    dates = (
+        await db_session.scalars(
+            select(models.Session.date).where(models.Session.id.in_([change.session_id for change in changes]))
+        )
+    ).all()
+    assert sorted(date.replace(tzinfo=None) for date in dates) == [
+        change.new_date.replace(tzinfo=None) for change in changes
+    ]
+    assert all(date.hour == 20 and date.weekday() == 1 for date in dates)
+
+
+async def test_clone_copies_the_series_into_a_new_template(db_session, weekly_series):
+    """Test cloning creates the template and copies only the series' sessions, as planned."""
+    template, sessions = weekly_series
+    copy, changes = await series.clone(db_session, template, await _series(db_session, template), "Split group", True)
+    await db_session.commit()
+
+    assert copy.name == "Split group" and copy.recurrence_rule == template.recurrence_rule
+    copies = (
+        await db_session.scalars(
+            select(models.Session).where(models.Session.template_id == copy.id).order_by(models.Session.date)
+        )
+    ).all()
+    assert [session.date for session in copies] == [
+        session.date for session in sessions if session.id in {change.session_id for change in changes}
+    ]
+    assert all(session.status == models.SessionStatus.PLANNED and session.yes_count == 0 for session in copies)
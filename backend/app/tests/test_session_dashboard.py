@@ -0,0 +1,108 @@
+"""Tests for the session dashboard endpoint."""
+from datetime import datetime, timezone
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app import models
+from app.db import get_db
+from app.routers import matches, players, sessions
+
+
+@pytest.fixture
+async def client(db_session):
+    app = FastAPI()
+    app.include_router(players.router)
+    app.include_router(sessions.router)
+    app.include_router(matches.router)
+    maker = async_sessionmaker(db_session.bind, expire_on_commit=False)
+
+    async def override_get_db():
+        async with maker() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+
+async def _session(db_session, with_match: bool = True) -> int:
+    session = models.Session(
+        date=datetime(2025, 1, 15, 18, 0, tzinfo=timezone.utc),
+        location="Community Gym",
+        max_players=10,
+    )
+    db_session.add(session)
+    db_session.add_all(models.Player(id=i, name=f"Player {i}") for i in range(1, 5))
+    await db_session.flush()
+    db_session.add_all(models.PlayerRating(player_id=i, overall_rating=1000.0 + i) for i in range(1, 5))
+    db_session.add_all(
+        models.SessionPlayer(
+            session_id=session.id,
+            player_id=i,
+            availability=models.Availability.YES,
+            team=models.SessionTeam.A if i <= 2 else models.SessionTeam.B,
+        )
+        for i in range(1, 5)
+    )
+    if with_match:
+        match = models.Match(session_id=session.id, score_team_a=2, score_team_b=1)
+        db_session.add(match)
+        await db_session.flush()
+        db_session.add_all(
+            models.PlayerStats(
+                match_id=match.id,
+                player_id=i,
+                team=models.MatchTeam.A if i <= 2 else models.MatchTeam.B,
+                goals=1 if i in (1, 3) else 0,
+            )
+            for i in range(1, 5)
+        )
+    await db_session.commit()
+    return session.id
+
+
+def _by_id(items, key="id"):
+    return sorted(items, key=lambda item: item[key])
+
+
+async def test_dashboard_matches_the_separate_endpoints(client, db_session):
+    """Test each dashboard section has the payload of the endpoint it replaces."""
+    session_id = await _session(db_session)
+    response = await client.get(f"/sessions/{session_id}/dashboard")
+    assert response.status_code == 200
+    dashboard = response.json()
+    assert set(dashboard) == set(sessions.DASHBOARD_SECTIONS)
+
+    assert dashboard["session"] == (await client.get(f"/sessions/{session_id}")).json()
+    availability = (await client.get(f"/sessions/{session_id}/availability")).json()
+    assert _by_id(dashboard["availability"]) == _by_id(availability)
+    assert _by_id(dashboard["players"]) == _by_id((await client.get("/players")).json())
+    assert dashboard["match"] == (await client.get(f"/sessions/{session_id}/match")).json()
+    assert set(dashboard["teams"]) == set(sessions.BalancedTeamsResponse.model_fields)
+    assert sorted(player["player_id"] for player in dashboard["teams"]["team_a"]) == [1, 2]
+    assert sorted(player["player_id"] for player in dashboard["teams"]["team_b"]) == [3, 4]
+
+
+async def test_dashboard_returns_only_the_requested_fields(client, db_session):
+    """Test fields= limits the sections, a missing match is null and unknown sections are refused."""
+    session_id = await _session(db_session, with_match=False)
+
+    response = await client.get(f"/sessions/{session_id}/dashboard", params={"fields": "session, match"})
+    assert response.status_code == 200
+    assert response.json() == {
+        "session": (await client.get(f"/sessions/{session_id}")).json(),
+        "match": None,
+    }
+
+    response = await client.get(f"/sessions/{session_id}/dashboard", params={"fields": "teams,weather"})
+    assert response.status_code == 400
+    assert "weather" in response.json()["detail"]
+
+
+async def test_dashboard_of_a_missing_session_is_404(client, db_session):
+    """Test an unknown session id is a 404, whatever the fields."""
+    assert (await client.get("/sessions/999/dashboard")).status_code == 404
+    assert (await client.get("/sessions/999/dashboard", params={"fields": "players"})).status_code == 404
@@ -0,0 +1,67 @@
+"""Tests for the session event broker."""
+from app.services.session_events import SessionEvent, SessionEventBroker
+
+
+def _availability(session_id: int, player_id: int, availability: str, version: int) -> SessionEvent:
+    return SessionEvent(
+        type="availability",
+        session_id=session_id,
+        version=version,
+        data={"player_id": player_id, "availability": availability},
+        key=player_id,
+    )
+
+
+async def test_publish_only_reaches_subscribers_of_the_session():
+    """Test that events are routed by session id."""
+    broker = SessionEventBroker(max_pending=10)
+    sub_1 = broker.subscribe(1)
+    sub_2 = broker.subscribe(2)
+
+    broker.publish(_availability(1, 7, "YES", 1))
+
+    assert [e.session_id for e in await sub_1.next_batch(timeout=0.1)] == [1]
+    assert await sub_2.next_batch(timeout=0.01) == []
+
+
+async def test_rapid_changes_are_coalesced_by_key():
+    """Test that repeated changes for the same player collapse to the latest."""
+    broker = SessionEventBroker(max_pending=10)
+    sub = broker.subscribe(1)
+
+    broker.publish(_availability(1, 7, "YES", 1), _availability(1, 8, "YES", 2))
+    broker.publish(_availability(1, 7, "NO", 3))
+
+    batch = await sub.next_batch(timeout=0.1)
+    assert [(e.data["player_id"], e.data["availability"]) for e in batch] == [(8, "YES"), (7, "NO")]
+
+
+async def test_slow_subscriber_gets_a_single_resync():
+    """Test the per-connection backpressure limit."""
+    broker = SessionEventBroker(max_pending=3)
+    sub = broker.subscribe(1)
+
+    for player_id in range(10):
+        broker.publish(_availability(1, player_id, "YES", player_id))
+
+    batch = await sub.next_batch(timeout=0.1)
+    assert [e.type for e in batch] == ["resync"]
+
+
+async def test_close_unsubscribes():
+    """Test that closed subscriptions are dropped from the broker."""
+    broker = SessionEventBroker(max_pending=3)
+    sub = broker.subscribe(1)
+    sub.close()
+
+    assert broker.subscriber_count(1) == 0
+    broker.publish(_availability(1, 1, "YES", 1))
+
+
+def test_event_encoding():
+    """Test the SSE wire format."""
+    event = _availability(1, 7, "YES", 4)
+    assert event.encode() == (
+        'id: 4\nevent: availability\n'
+        'data: {"session_id": 1, "version": 4, "player_id": 7, "availability": "YES"}\n\n'
+    )
@@ -0,0 +1,117 @@
+"""Tests for season standings aggregation."""
+from datetime import datetime, timezone
+
+from sqlalchemy import select
+
+from app import models
+from app.services import standings
+
+
+def _utc(*args) -> datetime:
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+async def _play(
+    db,
+    day: datetime,
+    score_a: int,
+    score_b: int,
+    goals: dict[int, int],
+    status: models.SessionStatus = models.SessionStatus.COMPLETED,
+) -> models.Match:
+    session = models.Session(date=day, location="Community Gym", max_players=10, status=status)
+    db.add(session)
+    await db.flush()
+    match = models.Match(session_id=session.id, score_team_a=score_a, score_team_b=score_b)
+    db.add(match)
+    await db.flush()
+    db.add_all(
+        models.PlayerStats(
+            match_id=match.id,
+            player_id=player_id,
+            team=models.MatchTeam.A if player_id <= 2 else models.MatchTeam.B,
+            goals=goals.get(player_id, 0),
+            minutes_played=60,
+        )
+        for player_id in range(1, 5)
+    )
+    await db.flush()
+    return match
+
+
+async def _standings(db, season_id: int) -> dict[int, models.SeasonStanding]:
+    result = await db.execute(
+        select(models.SeasonStanding)
+        .where(models.SeasonStanding.season_id == season_id)
+        .execution_options(populate_existing=True)
+    )
+    return {row.player_id: row for row in result.scalars().all()}
+
+
+async def test_refresh_aggregates_results_within_season(db_session):
+    """Test wins, draws, losses, points and goals are aggregated per season."""
+    db_session.add_all(models.Player(id=i, name=f"Player {i}") for i in range(1, 5))
+    season = models.Season(name="2025", starts_at=_utc(2025, 1, 1), ends_at=_utc(2025, 12, 31))
+    db_session.add(season)
+    await db_session.flush()
+
+    await _play(db_session, _utc(2025, 1, 10, 18), 3, 1, {1: 2, 3: 1})
+    await _play(db_session, _utc(2025, 2, 10, 18), 2, 2, {2: 2})
+    # Outside the season.
+    await _play(db_session, _utc(2024, 12, 10, 18), 0, 4, {4: 4})
+    for day in (_utc(2025, 1, 10, 18), _utc(2025, 2, 10, 18), _utc(2024, 12, 10, 18)):
+        await standings.refresh(db_session, [day], range(1, 5))
+
+    rows = await _standings(db_session, season.id)
+    assert (rows[1].matches_played, rows[1].wins, rows[1].draws, rows[1].losses) == (2, 1, 1, 0)
+    assert (rows[1].points, rows[1].goals, rows[1].minutes_played) == (4, 2, 120)
+    assert (rows[4].wins, rows[4].draws, rows[4].losses, rows[4].points, rows[4].goals) == (0, 1, 1, 1, 0)
+
+
+async def test_refresh_after_score_change_matches_rebuild(db_session):
+    """Test an incremental refresh after an edit gives the same rows as a full rebuild."""
+    db_session.add_all(models.Player(id=i, name=f"Player {i}") for i in range(1, 5))
+    season = models.Season(name="2025", starts_at=_utc(2025, 1, 1), ends_at=_utc(2025, 12, 31))
+    db_session.add(season)
+    await db_session.flush()
+    match = await _play(db_session, _utc(2025, 3, 1, 18), 1, 0, {1: 1})
+    await standings.refresh(db_session, [_utc(2025, 3, 1, 18)], range(1, 5))
+
+    match.score_team_b = 2
+    await db_session.flush()
+    await standings.refresh(db_session, [_utc(2025, 3, 1, 18)], range(1, 5))
+    incremental = {pid: (r.wins, r.losses, r.points) for pid, r in (await _standings(db_session, season.id)).items()}
+
+    await standings.rebuild(db_session, season.id)
+    rebuilt = {pid: (r.wins, r.losses, r.points) for pid, r in (await _standings(db_session, season.id)).items()}
+
+    assert incremental == rebuilt
+    assert incremental[1] == (0, 1, 0)
+    assert incremental[3] == (1, 0, 3)
+
+
+async def test_unplayed_matches_do_not_count(db_session):
+    """Test a 0-0 match of a session that is not completed is no draw, on refresh or rebuild."""
+    db_session.add_all(models.Player(id=i, name=f"Player {i}") for i in range(1, 5))
+    season = models.Season(name="2025", starts_at=_utc(2025, 1, 1), ends_at=_utc(2025, 12, 31))
+    db_session.add(season)
+    await db_session.flush()
+    await _play(db_session, _utc(2025, 3, 1, 18), 2, 0, {1: 2})
+    upcoming = await _play(db_session, _utc(2025, 3, 8, 18), 0, 0, {}, status=models.SessionStatus.PLANNED)
+    for day in (_utc(2025, 3, 1, 18), _utc(2025, 3, 8, 18)):
+        await standings.refresh(db_session, [day], range(1, 5))
+
+    refreshed = {pid: (r.matches_played, r.draws, r.points) for pid, r in (await _standings(db_session, season.id)).items()}
+    assert refreshed[1] == (1, 0, 3)
+    assert refreshed[3] == (1, 0, 0)
+
+    await standings.rebuild(db_session, season.id)
+    rebuilt = {pid: (r.matches_played, r.draws, r.points) for pid, r in (await _standings(db_session, season.id)).items()}
+    assert rebuilt == refreshed
+
+    session = await db_session.get(models.Session, upcoming.session_id)
+    session.status = models.SessionStatus.COMPLETED
+    await db_session.flush()
+    await standings.refresh(db_session, [session.date], range(1, 5))
+    rows = await _standings(db_session, season.id)
+    assert (rows[1].matches_played, rows[1].draws, rows[1].points) == (2, 1, 4)
@@ -0,0 +1,71 @@
+"""Tests for session generation from templates."""
+from datetime import datetime, time, timezone
+
+from sqlalchemy import event, func, select
+
+from app import models
+from app.services.template_service import TemplateService
+
+
+async def test_generate_recurring_inserts_once_and_skips_existing(db_session):
+    """Test a year of weekly sessions is one INSERT, and a re-run adds nothing."""
+    template = models.SessionTemplate(
+        name="Tuesday futsal",
+        location="Community Gym",
+        time_of_day=time(19, 30),
+        day_of_week=1,
+        max_players=10,
+        recurrence_type=models.RecurrenceType.WEEKLY,
+        recurrence_start=datetime(2025, 1, 1, tzinfo=timezone.utc),
+        recurrence_end=datetime(2025, 12, 31, tzinfo=timezone.utc),
+    )
+    db_session.add(template)
+    await db_session.commit()
+    # A session created by hand for the first Tuesday is kept, not duplicated.
+    await TemplateService.create_session_from_template(template, datetime(2025, 1, 7), db_session)
+
+    inserts = []
+    sync_engine = db_session.bind.sync_engine
+
+    def listener(conn, cursor, statement, *args):
+        inserts.append(statement)
+
+    event.listen(sync_engine, "before_cursor_execute", listener)
+    try:
+        sessions = await TemplateService.generate_recurring_sessions(template, db_session)
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", listener)
+
+    assert len([statement for statement in inserts if statement.startswith("INSERT")]) == 1
+    assert len(sessions) == 51
+    assert sessions[0].date.replace(tzinfo=None) == datetime(2025, 1, 14, 19, 30)
+    assert all(session.date.weekday() == 1 for session in sessions)
+
+    assert await TemplateService.generate_recurring_sessions(template, db_session) == []
+    assert await TemplateService.create_session_from_template(template, datetime(2025, 1, 7), db_session) is None
+    total = await db_session.scalar(select(func.count(models.Session.id)))
+    assert total == 52
+
+
+async def test_generate_again_after_a_time_change_adds_nothing(db_session):
+    """Test a day that has a session from the template is skipped whatever the new time of day."""
+    template = models.SessionTemplate(
+        name="Thursday futsal",
+        location="Community Gym",
+        time_of_day=time(19, 30),
+        max_players=10,
+        recurrence_rule="FREQ=WEEKLY;BYDAY=TH;COUNT=12",
+        recurrence_start=datetime(2025, 1, 1, tzinfo=timezone.utc),
+    )
+    db_session.add(template)
+    await db_session.commit()
+    assert len(await TemplateService.generate_recurring_sessions(template, db_session)) == 12
+
+    template.time_of_day = time(20, 15)
+    await db_session.commit()
+    assert await TemplateService.generate_recurring_sessions(template, db_session) == []
+    assert await TemplateService.create_session_from_template(template, datetime(2025, 1, 2), db_session) is None
+    total = await db_session.scalar(
+        select(func.count(models.Session.id)).where(models.Session.template_id == template.id)
+    )
+    assert total == 12
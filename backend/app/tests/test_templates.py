@@ -0,0 +1,51 @@
+"""Tests for recurrence rule checks on the template endpoints."""
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app import models
+from app.auth.dependencies import get_current_admin_user
+from app.db import get_db
+from app.routers import templates
+
+
+@pytest.fixture
+async def client(db_session):
+    app = FastAPI()
+    app.include_router(templates.router)
+    maker = async_sessionmaker(db_session.bind, expire_on_commit=False)
+
+    async def override_get_db():
+        async with maker() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_current_admin_user] = lambda: None
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+
+TEMPLATE = {"name": "Tuesday futsal", "location": "Community Gym", "time_of_day": "19:30"}
+
+
+async def test_invalid_rules_are_refused(client, db_session):
+    """Test create and update reject a rule the engine cannot parse, and store a valid one stripped."""
+    response = await client.post("/session-templates", json={**TEMPLATE, "recurrence_rule": "FREQ=HOURLY"})
+    assert response.status_code == 400
+    assert "FREQ" in response.json()["detail"]
+    assert await db_session.scalar(select(func.count(models.SessionTemplate.id))) == 0
+
+    response = await client.post("/session-templates", json={**TEMPLATE, "recurrence_rule": " FREQ=WEEKLY;BYDAY=TU \n"})
+    assert response.status_code == 201
+    template = response.json()
+    assert template["recurrence_rule"] == "FREQ=WEEKLY;BYDAY=TU"
+
+    response = await client.put(f"/session-templates/{template['id']}", json={"recurrence_rule": "FREQ=WEEKLY;COUNT=0"})
+    assert response.status_code == 400
+    assert (await client.get(f"/session-templates/{template['id']}")).json()["recurrence_rule"] == "FREQ=WEEKLY;BYDAY=TU"
+
+    response = await client.put(f"/session-templates/{template['id']}", json={"recurrence_rule": "  "})
+    assert response.status_code == 200
+    assert response.json()["recurrence_rule"] is None
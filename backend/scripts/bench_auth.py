@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""Measure the per-request cost of authenticating a bearer token.
+
+Compares the old path (verify the HS256 signature with python-jose and
+load the user with its player on every request) with the current one (the
+verified-token cache plus the principal cache), for HS256 and ES256 tokens.
+Runs against an in-memory SQLite database; nothing is written elsewhere.
+
+Usage:
+    python scripts/bench_auth.py            # 2000 requests per case
+    python scripts/bench_auth.py -n 10000
+"""
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from jose import jwt
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import selectinload
+
+from app.auth import keys, principals, security
+from app.core.config import Settings
+from app.models import Base, Player, User
+
+SECRET = "bench-secret"
+
+
+async def old_path(db, token: str) -> User:
+    payload = jwt.decode(token, SECRET, algorithms=["HS256"])
+    result = await db.execute(
+        select(User)
+        .options(selectinload(User.player))
+        .where(User.id == int(payload["sub"]), User.deleted_at.is_(None))
+    )
+    return result.scalar_one()
+
+
+async def new_path(db, token: str) -> principals.Principal:
+    payload = security.decode_token(token)
+    return await principals.load(db, int(payload["sub"]), payload.get("iat"))
+
+
+async def measure(label: str, authenticate, db, token: str, requests: int) -> float:
+    await authenticate(db, token)  # warm up
+    start = time.perf_counter()
+    for _ in range(requests):
+        await authenticate(db, token)
+    per_request = (time.perf_counter() - start) / requests * 1e6
+    print(f"{label:<32} {per_request:9.1f} us/request")
+    return per_request
+
+
+def es256_keyring(directory: str) -> keys.Keyring:
+    key = ec.generate_private_key(ec.SECP256R1())
+    pem = key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption())
+    (Path(directory) / "bench.pem").write_bytes(pem)
+    return keys.Keyring.from_settings(Settings(jwt_keys_dir=directory, jwt_signing_kid="bench"))
+
+
+async def bench(requests: int) -> None:
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    maker = async_sessionmaker(engine, expire_on_commit=False)
+
+    async with maker() as db:
+        user = User(email="bench@example.com", username="bench", hashed_password="x")
+        db.add(user)
+        await db.flush()
+        db.add(Player(name="Bench", user_id=user.id))
+        await db.commit()
+
+        hs256 = keys.Keyring.from_settings(Settings(secret_key=SECRET))
+        keys.keyring = security.keyring = hs256
+        token = security.create_access_token({"sub": str(user.id)})
+        before = await measure("HS256, uncached (before)", old_path, db, token, requests)
+        after = await measure("HS256, cached", new_path, db, token, requests)
+
+        with tempfile.TemporaryDirectory() as directory:
+            keys.keyring = security.keyring = es256_keyring(directory)
+            token = security.create_access_token({"sub": str(user.id)})
+            await measure("ES256, cached", new_path, db, token, requests)
+
+            async def es256_uncached(db, token):
+                security.verified_tokens.clear()
+                principals.principal_cache.clear()
+                return await new_path(db, token)
+
+            await measure("ES256, uncached", es256_uncached, db, token, requests)
+
+    await engine.dispose()
+    print(f"Speed-up with caches (HS256): {before / after:.1f}x")
+
+
+def main():
+    """Main entry point."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark bearer token authentication")
+    parser.add_argument("-n", "--requests", type=int, default=2000, help="Requests per case")
+    args = parser.parse_args()
+
+    asyncio.run(bench(args.requests))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""Bulk-import historical matches from a CSV or NDJSON file.
+
+Usage:
+    python scripts/import_matches.py history.csv
+    python scripts/import_matches.py history.ndjson --batch-size 1000
+
+See app/services/match_import.py for the file layout.
+"""
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.db import SessionLocal
+from app.services import match_import
+
+
+async def run_import(path: Path, fmt: str, batch_size: int | None) -> None:
+    started = time.perf_counter()
+    async with SessionLocal() as db:
+        importer = match_import.MatchImporter(db, batch_size)
+        with path.open(encoding="utf-8", newline="") as stream:
+            try:
+                summary = await importer.run(match_import.parse(stream, fmt))
+            except match_import.MatchImportError as exc:
+                print(f"Import stopped: {exc}")
+                print(f"{importer.summary.matches_imported} match(es) were imported before the error")
+                sys.exit(1)
+    elapsed = time.perf_counter() - started
+    print(
+        f"Imported {summary.matches_imported} match(es) and {summary.stats_imported} stat line(s) "
+        f"in {elapsed:.1f}s; created {summary.players_created} player(s), "
+        f"skipped {summary.skipped_existing} existing match(es), "
+        f"replayed ratings over {summary.ratings_replayed} match(es)"
+    )
+
+
+def main():
+    """Main entry point."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Import historical matches")
+    parser.add_argument("path", type=Path, help="CSV or NDJSON file")
+    parser.add_argument(
+        "--format",
+        choices=match_import.FORMATS,
+        help="File format (default: from the file extension, .ndjson/.jsonl or CSV)",
+    )
+    parser.add_argument("--batch-size", type=int, help="Matches per transaction")
+    args = parser.parse_args()
+
+    fmt = args.format or ("ndjson" if args.path.suffix in (".ndjson", ".jsonl") else "csv")
+    asyncio.run(run_import(args.path, fmt, args.batch_size))
+
+
+if __name__ == "__main__":
+    main()
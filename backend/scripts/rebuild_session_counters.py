@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""Recompute the denormalized sign-up counters on sessions from session_players.
+
+Usage:
+    python scripts/rebuild_session_counters.py             # all sessions
+    python scripts/rebuild_session_counters.py 12 15 42    # specific sessions
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.db import SessionLocal
+from app.services.availability import rebuild_counters
+
+
+async def rebuild(session_ids: list[int] | None) -> None:
+    async with SessionLocal() as db:
+        updated = await rebuild_counters(db, session_ids)
+        await db.commit()
+    print(f"Rebuilt counters for {updated} session(s)")
+
+
+def main():
+    """Main entry point."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Rebuild session sign-up counters")
+    parser.add_argument("session_ids", nargs="*", type=int, help="Limit to these session ids")
+    args = parser.parse_args()
+
+    asyncio.run(rebuild(args.session_ids or None))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""Recompute all player ratings by replaying every match in date order.
+
+Also refreshes each match's pre-match team rating sums shown in GET /matches.
+
+Usage:
+    python scripts/replay_ratings.py
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.db import SessionLocal
+from app.services.ratings import replay_ratings
+
+
+async def replay() -> None:
+    async with SessionLocal() as db:
+        replayed = await replay_ratings(db)
+        await db.commit()
+    print(f"Replayed ratings over {replayed} match(es)")
+
+
+def main():
+    """Main entry point."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Replay player ratings over the match history")
+    parser.parse_args()
+
+    asyncio.run(replay())
+
+
+if __name__ == "__main__":
+    main()
@@ -54,9 +54,16 @@ export interface BalancedTeamsResponse {
   balance_score: number;
 }
 
+// The list is paginated; follow X-Next-Cursor until the last page.
 export async function getSessions(): Promise<Session[]> {
-  const { data } = await client.get<Session[]>("/sessions");
-  return data;
+  const sessions: Session[] = [];
+  let after: string | undefined;
+  do {
+    const response = await client.get<Session[]>("/sessions", { params: { after, limit: 500 } });
+    sessions.push(...response.data);
+    after = response.headers["x-next-cursor"] ?? undefined;
+  } while (after);
+  return sessions;
 }
 
 export async function createSession(payload: SessionCreate): Promise<Session> {